@@ -1,9 +1,18 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from problems.models import Problem
 from submissions.models import Result
+from .submission_dto import SubmissionDto
+
+
+class AiEvaluationError(Exception):
+    pass
 
 
 class AiEvaluator(ABC):
+    # Whether evaluations of this provider may be reused for equivalent
+    # submissions (see ai_evaluator.cache)
+    CACHEABLE = True
 
     @staticmethod
     @abstractmethod
@@ -15,3 +24,55 @@ class AiEvaluator(ABC):
                        outcome: Result.Outcome,
                        output: str) -> str:
         ...
+
+    @classmethod
+    def stream_evaluation(cls,
+                          problem_title: str,
+                          problem_description: str,
+                          problem_language: Problem.Language,
+                          solution_code: str,
+                          test_code: str,
+                          outcome: Result.Outcome,
+                          output: str) -> Iterator[str]:
+        """
+        Yields the evaluation in chunks as the provider produces it.
+        Providers without streaming yield the whole evaluation at once.
+        """
+        yield cls.get_evaluation(
+            problem_title=problem_title,
+            problem_description=problem_description,
+            problem_language=problem_language,
+            solution_code=solution_code,
+            test_code=test_code,
+            outcome=outcome,
+            output=output
+        )
+
+    @classmethod
+    def get_evaluations(cls,
+                        problem_title: str,
+                        problem_description: str,
+                        problem_language: Problem.Language,
+                        test_code: str,
+                        submissions: list[SubmissionDto]
+                        ) -> list[str | None]:
+        """
+        Evaluates submissions of one problem, in the same order. Failed
+        evaluations are None. Providers without batch requests evaluate
+        the submissions one by one.
+        """
+        evaluations = []
+        for submission in submissions:
+            try:
+                evaluations.append(cls.get_evaluation(
+                    problem_title=problem_title,
+                    problem_description=problem_description,
+                    problem_language=problem_language,
+                    solution_code=submission.solution_code,
+                    test_code=test_code,
+                    outcome=submission.outcome,
+                    output=submission.output
+                ))
+            except Exception:
+                evaluations.append(None)
+        return evaluations
@@ -0,0 +1,154 @@
+import io
+import re
+import time
+import tokenize
+from hashlib import sha256
+from django_redis import get_redis_connection
+from problems.models import Problem
+from submissions.models import Result
+from .consts import (
+    RedisKeysPrefixesEnum,
+    EVALUATION_FAILED_MESSAGE,
+    AI_EVALUATION_CACHE_TIMEOUT,
+    AI_EVALUATION_CACHE_MAX_ENTRIES,
+    AI_EVALUATION_MAX_CACHED_SIZE,
+    CHARS_PER_TOKEN,
+    INPUT_TOKEN_COST_USD,
+    OUTPUT_TOKEN_COST_USD,
+)
+
+# String literals are kept as they are, comments are dropped
+C_STYLE_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//[^\n]*|/\*.*?\*/', re.S)
+SKIPPED_PYTHON_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING,
+                         tokenize.ENDMARKER}
+
+
+def normalize_solution(code: str, language: Problem.Language) -> str:
+    """
+    Strips comments and formatting-only whitespace, so solutions that
+    differ only in those share an evaluation.
+    """
+    if language == Problem.Language.PYTHON:
+        try:
+            return _normalize_python(code)
+        except (tokenize.TokenError, SyntaxError):
+            code = re.sub(r'#[^\n]*', '', code)
+    return _normalize_c_style(code)
+
+
+def _normalize_python(code: str) -> str:
+    # Indentation is significant, so blocks are kept as markers
+    parts = []
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type in SKIPPED_PYTHON_TOKENS:
+            continue
+        if token.type == tokenize.INDENT:
+            parts.append('<INDENT>')
+        elif token.type == tokenize.DEDENT:
+            parts.append('<DEDENT>')
+        elif token.type == tokenize.NEWLINE:
+            parts.append('<NEWLINE>')
+        else:
+            parts.append(token.string)
+    return ' '.join(parts)
+
+
+def _normalize_c_style(code: str) -> str:
+    parts = []
+    position = 0
+    for match in C_STYLE_TOKENS.finditer(code):
+        parts.extend(code[position:match.start()].split())
+        if match.group()[0] in '"\'':
+            parts.append(match.group())
+        position = match.end()
+    parts.extend(code[position:].split())
+    return ' '.join(parts)
+
+
+def get_ai_evaluation_metrics(problem_id: int) -> dict:
+    redis = get_redis_connection('default')
+    values = redis.hgetall(
+        f'{RedisKeysPrefixesEnum.AI_EVALUATION_METRICS.value}:{problem_id}')
+    metrics = {key.decode(): int(value) for key, value in values.items()}
+    hits = metrics.get('hits', 0)
+    lookups = hits + metrics.get('misses', 0)
+    saved_input_tokens = metrics.get('saved_input_tokens', 0)
+    saved_output_tokens = metrics.get('saved_output_tokens', 0)
+    return {
+        'hits': hits,
+        'misses': metrics.get('misses', 0),
+        'hit_rate': hits / lookups if lookups else 0.0,
+        'saved_input_tokens': saved_input_tokens,
+        'saved_output_tokens': saved_output_tokens,
+        'cost_saved_usd': (saved_input_tokens * INPUT_TOKEN_COST_USD
+                           + saved_output_tokens * OUTPUT_TOKEN_COST_USD),
+    }
+
+
+class AiEvaluationCache:
+    """
+    Redis cache of AI evaluations of a problem version, keyed by the
+    normalized solution and the judge outcome. Each problem version keeps
+    at most AI_EVALUATION_CACHE_MAX_ENTRIES evaluations. `test_code` can
+    be passed by callers that loaded the problem without it.
+    """
+
+    def __init__(self, problem: Problem, test_code: str | None = None) -> None:
+        self.problem = problem
+        self.test_code = test_code
+        self.redis = get_redis_connection('default')
+        version = f'{problem.id}:{problem.version}'
+        self.index_key = (
+            f'{RedisKeysPrefixesEnum.AI_EVALUATION_INDEX.value}:{version}')
+        self.metrics_key = (
+            f'{RedisKeysPrefixesEnum.AI_EVALUATION_METRICS.value}'
+            f':{problem.id}')
+        self._key_prefix = (
+            f'{RedisKeysPrefixesEnum.AI_EVALUATION.value}:{version}')
+
+    def get_key(self, solution_code: str, outcome: Result.Outcome) -> str:
+        normalized = normalize_solution(solution_code, self.problem.language)
+        digest = sha256(normalized.encode()).hexdigest()
+        return f'{self._key_prefix}:{outcome}:{digest}'
+
+    def get(self, solution_code: str, outcome: Result.Outcome,
+            output: str | None):
+        evaluation = self.redis.get(self.get_key(solution_code, outcome))
+        if evaluation is None:
+            self.redis.hincrby(self.metrics_key, 'misses', 1)
+            return None
+
+        evaluation = evaluation.decode()
+        test_code = (self.test_code if self.test_code is not None
+                     else self.problem.test_code)
+        prompt_size = (len(self.problem.description) + len(test_code)
+                       + len(solution_code) + len(output or ''))
+        pipeline = self.redis.pipeline()
+        pipeline.hincrby(self.metrics_key, 'hits', 1)
+        pipeline.hincrby(self.metrics_key, 'saved_input_tokens',
+                         prompt_size // CHARS_PER_TOKEN)
+        pipeline.hincrby(self.metrics_key, 'saved_output_tokens',
+                         len(evaluation) // CHARS_PER_TOKEN)
+        pipeline.execute()
+        return evaluation
+
+    def set(self, solution_code: str, outcome: Result.Outcome,
+            evaluation: str) -> None:
+        if (outcome == Result.Outcome.INTERNAL_SERVER_ERROR
+                or evaluation == EVALUATION_FAILED_MESSAGE
+                or len(evaluation) > AI_EVALUATION_MAX_CACHED_SIZE):
+            return
+
+        key = self.get_key(solution_code, outcome)
+        pipeline = self.redis.pipeline()
+        pipeline.set(key, evaluation, ex=AI_EVALUATION_CACHE_TIMEOUT)
+        pipeline.zadd(self.index_key, {key: time.time()})
+        pipeline.expire(self.index_key, AI_EVALUATION_CACHE_TIMEOUT)
+        pipeline.zcard(self.index_key)
+        size = pipeline.execute()[-1]
+
+        if size > AI_EVALUATION_CACHE_MAX_ENTRIES:
+            evicted = self.redis.zpopmin(
+                self.index_key, size - AI_EVALUATION_CACHE_MAX_ENTRIES)
+            self.redis.delete(*[evicted_key for evicted_key, _ in evicted])
@@ -0,0 +1,102 @@
+import time
+from django_redis import get_redis_connection
+from .consts import (
+    RedisKeysPrefixesEnum,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of an AI provider with its state kept in Redis, so all
+    web and worker processes stop calling a failing provider together.
+
+    closed - requests go through, consecutive failures are counted
+    open - requests fail fast until the recovery timeout passes
+    half_open - a single probe request is let through, its outcome closes
+                or reopens the circuit
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str,
+                 failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: int = CIRCUIT_BREAKER_RECOVERY_TIMEOUT
+                 ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.redis = get_redis_connection('default')
+        self.key = f'{RedisKeysPrefixesEnum.AI_CIRCUIT_BREAKER.value}:{name}'
+        self.probe_key = f'{self.key}:probe'
+
+    @property
+    def state(self) -> str:
+        state = self.redis.hget(self.key, 'state')
+        return state.decode() if state else self.CLOSED
+
+    def allow_request(self) -> bool:
+        state, opened_at = self.redis.hmget(self.key, 'state', 'opened_at')
+        state = state.decode() if state else self.CLOSED
+        if state == self.CLOSED:
+            return True
+
+        if (state == self.OPEN
+                and time.time() - float(opened_at) < self.recovery_timeout):
+            self.redis.hincrby(self.key, 'rejected', 1)
+            return False
+
+        # The probe lock expires, so a probe that never reports back
+        # does not keep the circuit half open forever
+        if self.redis.set(self.probe_key, 1, nx=True,
+                          ex=self.recovery_timeout):
+            self.redis.hset(self.key, 'state', self.HALF_OPEN)
+            return True
+        self.redis.hincrby(self.key, 'rejected', 1)
+        return False
+
+    def record_success(self) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self.key, mapping={'state': self.CLOSED, 'failures': 0})
+        pipeline.hincrby(self.key, 'successes', 1)
+        pipeline.delete(self.probe_key)
+        pipeline.execute()
+
+    def record_failure(self) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.hget(self.key, 'state')
+        pipeline.hincrby(self.key, 'failures', 1)
+        pipeline.hincrby(self.key, 'total_failures', 1)
+        state, failures, _ = pipeline.execute()
+
+        if (state == self.HALF_OPEN.encode()
+                or failures >= self.failure_threshold):
+            self._open()
+
+    def _open(self) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self.key, mapping={'state': self.OPEN,
+                                         'opened_at': time.time(),
+                                         'failures': 0})
+        pipeline.hincrby(self.key, 'trips', 1)
+        pipeline.delete(self.probe_key)
+        pipeline.execute()
+
+    def reset(self) -> None:
+        self.redis.delete(self.key, self.probe_key)
+
+    def get_metrics(self) -> dict:
+        values = {key.decode(): value.decode()
+                  for key, value in self.redis.hgetall(self.key).items()}
+        opened_at = values.get('opened_at')
+        return {
+            'state': values.get('state', self.CLOSED),
+            'failures': int(values.get('failures', 0)),
+            'total_failures': int(values.get('total_failures', 0)),
+            'successes': int(values.get('successes', 0)),
+            'rejected': int(values.get('rejected', 0)),
+            'trips': int(values.get('trips', 0)),
+            'opened_at': float(opened_at) if opened_at else None,
+        }
@@ -0,0 +1,36 @@
+from enum import Enum
+
+
+class RedisKeysPrefixesEnum(str, Enum):
+    AI_EVALUATION = 'ai_evaluation'
+    AI_EVALUATION_INDEX = 'ai_evaluation_index'
+    AI_EVALUATION_METRICS = 'ai_evaluation_metrics'
+    AI_CIRCUIT_BREAKER = 'ai_circuit_breaker'
+
+
+EVALUATION_FAILED_MESSAGE = "Could not get AI evaluation."
+
+AI_EVALUATION_CACHE_TIMEOUT = 60*60*24*7             # 7 DAYS
+# Per problem version, oldest entries are evicted first
+AI_EVALUATION_CACHE_MAX_ENTRIES = 500
+AI_EVALUATION_MAX_CACHED_SIZE = 16 * 1024            # 16 KB
+
+# Rough provider pricing used to report the cost saved by cache hits
+CHARS_PER_TOKEN = 4
+INPUT_TOKEN_COST_USD = 0.30 / 1_000_000
+OUTPUT_TOKEN_COST_USD = 2.50 / 1_000_000
+
+# A provider is skipped for CIRCUIT_BREAKER_RECOVERY_TIMEOUT after this many
+# consecutive failures, then a single probe request is let through
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 30                # 30 SECONDS
+
+# Prompt budgets, in tokens estimated with CHARS_PER_TOKEN
+AI_PROBLEM_CONTEXT_MAX_TOKENS = 2000
+AI_SUBMISSION_PROMPT_MAX_TOKENS = 3000
+AI_OUTPUT_MAX_TOKENS = 750
+AI_OUTPUT_MAX_FAILURES = 3
+AI_PROBLEM_CONTEXT_CACHE_SIZE = 256
+
+# Submissions of one problem evaluated per batch request when re-judging
+AI_BATCH_SIZE = 8
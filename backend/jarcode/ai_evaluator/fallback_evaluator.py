@@ -0,0 +1,151 @@
+import logging
+from collections.abc import Callable
+from django.conf import settings
+from django.utils.module_loading import import_string
+from ai_evaluator.ai_evaluator import AiEvaluator
+from ai_evaluator.circuit_breaker import CircuitBreaker
+from ai_evaluator.consts import EVALUATION_FAILED_MESSAGE
+from ai_evaluator.submission_dto import SubmissionDto
+from problems.models import Problem
+from submissions.models import Result
+
+logger = logging.getLogger(__name__)
+
+
+def get_providers() -> list[type[AiEvaluator]]:
+    return [import_string(path) for path in settings.AI_EVALUATOR_PROVIDERS]
+
+
+class FallbackAiEvaluator(AiEvaluator):
+    """
+    Asks the AI_EVALUATOR_PROVIDERS in order, each guarded by its own
+    circuit breaker. Providers with an open circuit are skipped without
+    being called, failing ones are reported to their breaker and the next
+    provider is tried. `served_by` holds the provider of the last
+    evaluation, or None if every provider failed.
+    """
+
+    def __init__(self, providers: list[type[AiEvaluator]] | None = None
+                 ) -> None:
+        self.providers = (providers if providers is not None
+                          else get_providers())
+        self.served_by: type[AiEvaluator] | None = None
+        self.batch_served_by: list[type[AiEvaluator] | None] = []
+
+    def get_evaluation(self,
+                       problem_title: str,
+                       problem_description: str,
+                       problem_language: Problem.Language,
+                       solution_code: str,
+                       test_code: str,
+                       outcome: Result.Outcome,
+                       output: str) -> str:
+        return self._evaluate(lambda provider: provider.get_evaluation(
+            problem_title=problem_title,
+            problem_description=problem_description,
+            problem_language=problem_language,
+            solution_code=solution_code,
+            test_code=test_code,
+            outcome=outcome,
+            output=output
+        ))
+
+    def get_streamed_evaluation(self,
+                                on_chunk: Callable[[int, str], None],
+                                problem_title: str,
+                                problem_description: str,
+                                problem_language: Problem.Language,
+                                solution_code: str,
+                                test_code: str,
+                                outcome: Result.Outcome,
+                                output: str) -> str:
+        """
+        Like get_evaluation, but calls `on_chunk(offset, chunk)` for every
+        chunk as it arrives. A provider taking over after another one
+        failed mid-stream starts again from offset 0. Errors of `on_chunk`
+        are logged and don't count as failures of the provider.
+        """
+        def evaluate(provider: type[AiEvaluator]) -> str:
+            chunks = []
+            offset = 0
+            for chunk in provider.stream_evaluation(
+                    problem_title=problem_title,
+                    problem_description=problem_description,
+                    problem_language=problem_language,
+                    solution_code=solution_code,
+                    test_code=test_code,
+                    outcome=outcome,
+                    output=output):
+                try:
+                    on_chunk(offset, chunk)
+                except Exception:
+                    logger.exception('Failed to forward evaluation chunk')
+                chunks.append(chunk)
+                offset += len(chunk)
+            return ''.join(chunks)
+
+        return self._evaluate(evaluate)
+
+    def get_evaluations(self,
+                        problem_title: str,
+                        problem_description: str,
+                        problem_language: Problem.Language,
+                        test_code: str,
+                        submissions: list[SubmissionDto]) -> list[str]:
+        """
+        Batch counterpart of get_evaluation. Submissions a provider failed
+        to evaluate are passed on to the next one, those no provider
+        evaluated get EVALUATION_FAILED_MESSAGE. `batch_served_by` holds
+        the provider of every evaluation.
+        """
+        evaluations = [None] * len(submissions)
+        self.batch_served_by = [None] * len(submissions)
+        for provider in self.providers:
+            pending = [number for number, evaluation in enumerate(evaluations)
+                       if evaluation is None]
+            if not pending:
+                break
+
+            breaker = CircuitBreaker(provider.__name__)
+            if not breaker.allow_request():
+                continue
+
+            try:
+                provider_evaluations = provider.get_evaluations(
+                    problem_title=problem_title,
+                    problem_description=problem_description,
+                    problem_language=problem_language,
+                    test_code=test_code,
+                    submissions=[submissions[number] for number in pending]
+                )
+            except Exception:
+                breaker.record_failure()
+                continue
+
+            breaker.record_success()
+            for number, evaluation in zip(pending, provider_evaluations):
+                if evaluation:
+                    evaluations[number] = evaluation
+                    self.batch_served_by[number] = provider
+
+        return [evaluation if evaluation is not None
+                else EVALUATION_FAILED_MESSAGE
+                for evaluation in evaluations]
+
+    def _evaluate(self, evaluate: Callable[[type[AiEvaluator]], str]) -> str:
+        self.served_by = None
+        for provider in self.providers:
+            breaker = CircuitBreaker(provider.__name__)
+            if not breaker.allow_request():
+                continue
+
+            try:
+                evaluation = evaluate(provider)
+            except Exception:
+                breaker.record_failure()
+                continue
+
+            breaker.record_success()
+            self.served_by = provider
+            return evaluation
+        return EVALUATION_FAILED_MESSAGE
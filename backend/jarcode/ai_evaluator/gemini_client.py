@@ -0,0 +1,136 @@
+import asyncio
+import queue
+import threading
+import time
+import httpx
+from django.conf import settings
+from google import genai
+from google.genai import types
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled with `rate` tokens per second, holding up
+    to `capacity` tokens. Only used from a single event loop.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            refill = (now - self.updated_at) * self.rate
+            self.tokens = min(self.capacity, self.tokens + refill)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeminiClient:
+    """
+    Long-lived async Gemini client shared by all threads of a process.
+    It runs on its own event loop thread, so sync callers (e.g. dramatiq
+    worker threads) reuse one HTTP connection pool and are limited by one
+    concurrency semaphore and one rate limiter. Every call, including the
+    time spent waiting for a slot, is bounded by GEMINI_TIMEOUT.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, api_key: str, base_url: str | None, timeout: float,
+                 max_concurrency: int, requests_per_minute: int) -> None:
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name='gemini-client', daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = TokenBucket(rate=requests_per_minute / 60,
+                                         capacity=max_concurrency)
+        self._http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency),
+        )
+        self._client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url,
+                timeout=int(timeout * 1000),
+                httpx_async_client=self._http_client,
+            ),
+        )
+
+    @classmethod
+    def get_instance(cls) -> 'GeminiClient':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    api_key=settings.GEMINI_API_KEY,
+                    base_url=settings.GEMINI_BASE_URL,
+                    timeout=settings.GEMINI_TIMEOUT,
+                    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+                    requests_per_minute=settings.GEMINI_REQUESTS_PER_MINUTE,
+                )
+            return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.close()
+            cls._instance = None
+
+    async def generate_content(self, **kwargs):
+        return await asyncio.wait_for(self._generate_content(**kwargs),
+                                      timeout=self.timeout)
+
+    async def _generate_content(self, **kwargs):
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            return await self._client.aio.models.generate_content(**kwargs)
+
+    def generate_content_sync(self, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(
+            self.generate_content(**kwargs), self._loop)
+        return future.result()
+
+    async def generate_content_stream(self, on_chunk, **kwargs) -> None:
+        try:
+            await asyncio.wait_for(
+                self._generate_content_stream(on_chunk, **kwargs),
+                timeout=self.timeout)
+        finally:
+            on_chunk(None)
+
+    async def _generate_content_stream(self, on_chunk, **kwargs) -> None:
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            stream = await self._client.aio.models.generate_content_stream(
+                **kwargs)
+            async for chunk in stream:
+                on_chunk(chunk)
+
+    def generate_content_stream_sync(self, **kwargs):
+        """
+        Yields response chunks in the calling thread as they arrive.
+        Errors of the stream are raised after the chunks received before.
+        """
+        chunks = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self.generate_content_stream(chunks.put, **kwargs), self._loop)
+        while (chunk := chunks.get()) is not None:
+            yield chunk
+        future.result()
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._http_client.aclose(),
+                                         self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
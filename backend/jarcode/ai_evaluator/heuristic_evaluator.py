@@ -0,0 +1,122 @@
+import ast
+import re
+from ai_evaluator.ai_evaluator import AiEvaluator
+from problems.models import Problem
+from submissions.models import Result
+
+
+class HeuristicEvaluator(AiEvaluator):
+    """
+    Local last resort of the provider chain. It needs no network and never
+    fails, giving feedback from the judge outcome and simple static checks
+    of the solution while AI providers are unavailable.
+    """
+    # Heuristic feedback must not replace a real AI evaluation in the cache
+    CACHEABLE = False
+
+    MAX_LINE_LENGTH = 100
+    MAX_NESTING_DEPTH = 4
+    MAX_OUTPUT_EXCERPT = 300
+    ALLOWED_SHORT_NAMES = {'i', 'j', 'k', 'n', 'm', 'x', 'y', '_'}
+
+    OUTCOME_MESSAGES = {
+        Result.Outcome.PASSED: (
+            "All tests passed. Review the notes below to polish your "
+            "solution."),
+        Result.Outcome.FAILED: (
+            "Some tests failed. Compare the failing output with the "
+            "problem description and check edge cases such as empty "
+            "input, boundaries and negative values."),
+        Result.Outcome.COMPILATION_ERROR: (
+            "Your solution does not compile. Fix the first error reported "
+            "by the compiler, the next ones are often caused by it."),
+        Result.Outcome.TIMEOUT: (
+            "Your solution ran out of time. Look for nested loops over the "
+            "input or repeated work that could be avoided with a better "
+            "algorithm or data structure."),
+        Result.Outcome.INTERNAL_SERVER_ERROR: (
+            "Your solution could not be judged because of an internal "
+            "error. Please submit it again later."),
+    }
+
+    UNAVAILABLE_NOTE = (
+        "AI evaluation is temporarily unavailable, this is automated "
+        "feedback.")
+
+    @staticmethod
+    def get_evaluation(problem_title: str,
+                       problem_description: str,
+                       problem_language: Problem.Language,
+                       solution_code: str,
+                       test_code: str,
+                       outcome: Result.Outcome,
+                       output: str) -> str:
+        sections = [HeuristicEvaluator.UNAVAILABLE_NOTE,
+                    HeuristicEvaluator.OUTCOME_MESSAGES[outcome]]
+
+        if output and outcome in (Result.Outcome.FAILED,
+                                  Result.Outcome.COMPILATION_ERROR):
+            excerpt = output.strip()[:HeuristicEvaluator.MAX_OUTPUT_EXCERPT]
+            sections.append(f"First lines of the output:\n{excerpt}")
+
+        remarks = HeuristicEvaluator._get_remarks(solution_code,
+                                                  problem_language)
+        if remarks:
+            sections.append("\n".join(f"- {remark}" for remark in remarks))
+        return "\n\n".join(sections)
+
+    @staticmethod
+    def _get_remarks(solution_code: str,
+                     problem_language: Problem.Language) -> list[str]:
+        remarks = []
+        long_lines = [
+            number for number, line in enumerate(solution_code.splitlines(), 1)
+            if len(line) > HeuristicEvaluator.MAX_LINE_LENGTH]
+        if long_lines:
+            remarks.append(
+                f"Lines {', '.join(map(str, long_lines[:5]))} are longer than "
+                f"{HeuristicEvaluator.MAX_LINE_LENGTH} characters, split them "
+                f"to keep the code readable.")
+
+        if re.search(r'\b(TODO|FIXME)\b', solution_code):
+            remarks.append("Resolve the TODO/FIXME notes left in the code.")
+
+        if problem_language == Problem.Language.PYTHON:
+            remarks.extend(HeuristicEvaluator._get_python_remarks(
+                solution_code))
+        return remarks
+
+    @staticmethod
+    def _get_python_remarks(solution_code: str) -> list[str]:
+        try:
+            tree = ast.parse(solution_code)
+        except SyntaxError:
+            return []
+
+        remarks = []
+        short_names = sorted({
+            node.id for node in ast.walk(tree)
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)
+            and len(node.id) == 1
+            and node.id not in HeuristicEvaluator.ALLOWED_SHORT_NAMES})
+        if short_names:
+            remarks.append(
+                f"Use descriptive names instead of {', '.join(short_names)}.")
+
+        if HeuristicEvaluator._get_nesting_depth(tree) > \
+                HeuristicEvaluator.MAX_NESTING_DEPTH:
+            remarks.append(
+                "The code is deeply nested, consider extracting parts of it "
+                "into functions or returning early.")
+        return remarks
+
+    @staticmethod
+    def _get_nesting_depth(node: ast.AST, depth: int = 0) -> int:
+        blocks = (ast.If, ast.For, ast.While, ast.With, ast.Try,
+                  ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+        deepest = depth
+        for child in ast.iter_child_nodes(node):
+            child_depth = depth + 1 if isinstance(child, blocks) else depth
+            deepest = max(deepest, HeuristicEvaluator._get_nesting_depth(
+                child, child_depth))
+        return deepest
@@ -0,0 +1,179 @@
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from jarcode.content import render_content
+from problems.models import Problem
+from submissions.models import Result
+from .submission_dto import SubmissionDto
+from .consts import (
+    CHARS_PER_TOKEN,
+    AI_PROBLEM_CONTEXT_MAX_TOKENS,
+    AI_SUBMISSION_PROMPT_MAX_TOKENS,
+    AI_OUTPUT_MAX_TOKENS,
+    AI_OUTPUT_MAX_FAILURES,
+    AI_PROBLEM_CONTEXT_CACHE_SIZE,
+)
+
+# pytest, JUnit and GoogleTest failure lines and compiler errors
+FAILURE_LINE = re.compile(
+    r'^(FAILED|ERROR|E\s|\[\s+FAILED\s+\])|Error\b|error:|Exception\b'
+    r'|Traceback|expected', re.I)
+FAILURE_CONTEXT_BEFORE = 2
+FAILURE_CONTEXT_AFTER = 6
+PROBLEM_START = '<problem>'
+PROBLEM_END = '</problem>'
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """
+    `system_instruction` holds only trusted text. The problem `context`,
+    written by the problem author, and the `submission` are sent as two
+    parts of the contents, the context first.
+    """
+    system_instruction: str
+    context: str
+    submission: str
+
+    @property
+    def contents(self) -> list[str]:
+        return [self.context, self.submission]
+
+    @property
+    def size(self) -> int:
+        return (len(self.system_instruction) + len(self.context)
+                + len(self.submission))
+
+
+def truncate_middle(text: str, max_chars: int) -> str:
+    """
+    Keeps the beginning and the end of `text`, which usually carry the
+    most information (definitions, summaries), and drops the middle.
+    """
+    if len(text) <= max_chars:
+        return text
+    marker = '\n[... {} characters omitted ...]\n'
+    kept = max(0, max_chars - len(marker.format(len(text))))
+    head = kept * 2 // 3
+    tail = kept - head
+    return (text[:head] + marker.format(len(text) - kept)
+            + (text[-tail:] if tail else ''))
+
+
+def summarize_output(output: str | None, max_chars: int) -> str:
+    """
+    Reduces judge output to the first AI_OUTPUT_MAX_FAILURES failures with
+    a few lines of context around them and the final summary line.
+    """
+    if not output:
+        return ''
+    if len(output) <= max_chars:
+        return output
+
+    lines = output.splitlines()
+    kept = set()
+    failures = 0
+    for number, line in enumerate(lines):
+        if number in kept or not FAILURE_LINE.search(line):
+            continue
+        failures += 1
+        if failures > AI_OUTPUT_MAX_FAILURES:
+            break
+        kept.update(range(max(0, number - FAILURE_CONTEXT_BEFORE),
+                          min(len(lines), number + FAILURE_CONTEXT_AFTER + 1)))
+    if not kept:
+        return truncate_middle(output, max_chars)
+
+    # The last line usually sums up the run, e.g. "1 failed, 2 passed"
+    kept.add(len(lines) - 1)
+    parts = []
+    previous = -1
+    for number in sorted(kept):
+        if number != previous + 1:
+            parts.append('[...]')
+        parts.append(lines[number])
+        previous = number
+    return truncate_middle('\n'.join(parts), max_chars)
+
+
+@lru_cache(maxsize=AI_PROBLEM_CONTEXT_CACHE_SIZE)
+def build_problem_context(problem_title: str,
+                          problem_description: str,
+                          problem_language: Problem.Language,
+                          test_code: str) -> str:
+    """
+    Plain text context of a problem version, identical for all of its
+    submissions, so it can be sent as a cacheable prompt prefix. It is
+    enclosed in PROBLEM_START and PROBLEM_END, which the author's text
+    can't close early.
+    """
+    max_chars = AI_PROBLEM_CONTEXT_MAX_TOKENS * CHARS_PER_TOKEN
+    description = render_content(problem_description).text
+    test_code = truncate_middle(test_code, max_chars // 2)
+    description = truncate_middle(description, max_chars - len(test_code))
+    context = (f"Problem: {problem_title}\n"
+               f"Language: {Problem.Language(problem_language).label}\n\n"
+               f"Description:\n{description}\n\n"
+               f"Tests:\n{test_code}")
+    context = re.sub(r'</?\s*problem\s*>', '[...]', context, flags=re.I)
+    return f'{PROBLEM_START}\n{context}\n{PROBLEM_END}'
+
+
+def build_submission(solution_code: str,
+                     outcome: Result.Outcome,
+                     output: str | None) -> dict:
+    """
+    Submission part of the prompt fitted into
+    AI_SUBMISSION_PROMPT_MAX_TOKENS, of which judge output takes at most
+    AI_OUTPUT_MAX_TOKENS.
+    """
+    max_chars = AI_SUBMISSION_PROMPT_MAX_TOKENS * CHARS_PER_TOKEN
+    output_chars = AI_OUTPUT_MAX_TOKENS * CHARS_PER_TOKEN
+    return {
+        'solution_code': truncate_middle(solution_code,
+                                         max_chars - output_chars),
+        'outcome': outcome,
+        'output': summarize_output(output, output_chars),
+    }
+
+
+def build_prompt(instruction: str,
+                 problem_title: str,
+                 problem_description: str,
+                 problem_language: Problem.Language,
+                 solution_code: str,
+                 test_code: str,
+                 outcome: Result.Outcome,
+                 output: str | None) -> Prompt:
+    """
+    Splits the evaluation request into the instruction, the problem
+    context and the submission.
+    """
+    context = build_problem_context(problem_title, problem_description,
+                                    problem_language, test_code)
+    submission = json.dumps(build_submission(solution_code, outcome, output))
+    return Prompt(system_instruction=instruction, context=context,
+                  submission=submission)
+
+
+def build_batch_prompt(instruction: str,
+                       problem_title: str,
+                       problem_description: str,
+                       problem_language: Problem.Language,
+                       test_code: str,
+                       submissions: list[SubmissionDto]) -> Prompt:
+    """
+    Like build_prompt, but the contents are a list of submissions of the
+    problem, identified by their position in `submissions`.
+    """
+    context = build_problem_context(problem_title, problem_description,
+                                    problem_language, test_code)
+    batch = json.dumps([
+        {'id': number, **build_submission(submission.solution_code,
+                                          submission.outcome,
+                                          submission.output)}
+        for number, submission in enumerate(submissions)
+    ])
+    return Prompt(system_instruction=instruction, context=context,
+                  submission=batch)
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GeminiStubServer:
+    """
+    Local stand-in for the Gemini API answering `generateContent` calls
+    with `text` after `delay` seconds. `streamGenerateContent` calls get
+    `text` word by word as server-sent events, `chunk_delay` seconds apart.
+    Batch requests (JSON responses) get `text` for every submission, or
+    only for the first `max_batch_answers` of them. Records the requests
+    and the connections they arrived on, so tests can check pooling and
+    limits.
+    """
+
+    def __init__(self, text: str = 'Stub evaluation.',
+                 delay: float = 0, chunk_delay: float = 0) -> None:
+        self.text = text
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.max_batch_answers = None
+        self.requests = []
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                           self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'GeminiStubServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                with stub._lock:
+                    stub.requests.append({'path': self.path, 'body': body})
+                    stub.connections.add(self.client_address)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight,
+                                             stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    if ':streamGenerateContent' in self.path:
+                        self._send_stream()
+                    else:
+                        self._send_json(
+                            stub.make_response(stub.get_text(body)))
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for chunk in stub.get_chunks():
+                    event = f'data: {json.dumps(stub.make_response(chunk))}'
+                    data = f'{event}\r\n\r\n'.encode()
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+                    time.sleep(stub.chunk_delay)
+                self.wfile.write(b'0\r\n\r\n')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def get_text(self, body: dict) -> str:
+        config = body.get('generationConfig', {})
+        if config.get('responseMimeType') != 'application/json':
+            return self.text
+        submissions = json.loads(body['contents'][0]['parts'][-1]['text'])
+        return json.dumps([
+            {'id': submission['id'], 'evaluation': self.text}
+            for submission in submissions[:self.max_batch_answers]
+        ])
+
+    def get_chunks(self) -> list[str]:
+        words = self.text.split(' ')
+        return [f'{word} ' for word in words[:-1]] + words[-1:]
+
+    def make_response(self, text: str) -> dict:
+        return {
+            'candidates': [{
+                'content': {'role': 'model', 'parts': [{'text': text}]},
+                'finishReason': 'STOP',
+            }],
+        }
@@ -0,0 +1,10 @@
+from submissions.models import Result
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class SubmissionDto:
+    solution_code: str
+    outcome: Result.Outcome
+    output: Optional[str]
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Course, Chapter, Lesson, LessonImage
+from .models import Course, Chapter, Lesson, LessonImage, ChunkedUpload
+from jarcode.mixins import DeferredChangelistFieldsMixin
 
 
 class LessonImageInline(admin.TabularInline):
@@ -9,8 +10,10 @@ class LessonImageInline(admin.TabularInline):
 
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(DeferredChangelistFieldsMixin, admin.ModelAdmin):
     list_display = ('title', 'chapter', 'owner')
+    changelist_deferred_fields = ('content', 'content_text', 'toc',
+                                  'search_vector')
     search_fields = ('title', 'content', 'chapter__title')
     list_filter = ('chapter__course__owner',)
     readonly_fields = ('owner',)
@@ -41,8 +44,9 @@ class ChapterInline(admin.StackedInline):
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(DeferredChangelistFieldsMixin, admin.ModelAdmin):
     list_display = ('title', 'owner')
+    changelist_deferred_fields = ('description', 'search_vector')
     search_fields = ('title', 'description', 'owner__email')
     list_filter = ('owner',)
     inlines = [ChapterInline]
@@ -54,3 +58,11 @@ class LessonImageAdmin(admin.ModelAdmin):
     list_select_related = ('lesson', 'lesson__chapter__course')
     search_fields = ('lesson__title',)
     readonly_fields = ('owner',)
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'filename', 'lesson', 'owner', 'offset', 'size',
+                    'created_at')
+    list_select_related = ('lesson', 'owner')
+    search_fields = ('filename', 'owner__email')
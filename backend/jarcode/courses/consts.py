@@ -0,0 +1,20 @@
+from enum import Enum
+
+
+class RedisKeysPrefixesEnum(str, Enum):
+    COURSE_OUTLINE = 'course_outline'
+
+
+COURSE_OUTLINE_CACHE_TIMEOUT = 60*60*24            # 1 DAY
+
+# Spacing between sibling positions, leaves room for inserts in the middle
+POSITION_GAP = 1024
+
+# Chunked lesson image uploads
+LESSON_IMAGE_MAX_SIZE = 10 * 1024 * 1024     # 10 MB
+UPLOAD_CHUNK_MAX_SIZE = 1024 * 1024          # 1 MB
+UPLOAD_READ_SIZE = 64 * 1024                 # 64 KB
+
+# Content-addressed files reused (or, for the sweep, stored) more recently
+# are not deleted, the row referencing them may not be committed yet
+CONTENT_ADDRESSED_GRACE_PERIOD = 60*60       # 1 HOUR
@@ -0,0 +1,146 @@
+import io
+import re
+from PIL import Image, ImageOps, features
+from .storage import HASHED_DIR, content_addressed_storage as storage
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', {'quality': 60}),
+}
+VARIANTS_PREFIX = 'variants'
+# Image info carried over when an upload is re-encoded, everything else
+# (EXIF with GPS, XMP, comments) is dropped
+KEPT_IMAGE_INFO = {'icc_profile', 'transparency', 'background', 'duration',
+                   'loop', 'dpi'}
+METADATA_IMAGE_INFO = {'exif', 'xmp', 'XML:com.adobe.xmp', 'comment',
+                       'photoshop'}
+
+
+def get_variant_prefix(width: int) -> str:
+    return f'{VARIANTS_PREFIX}/{width}'
+
+
+def get_variant_lookup(name: str):
+    """
+    Returns the `{format: {width: name}}` fragment a variants JSON field
+    contains when it references `name`, or None for non-variant files.
+    """
+    parts = name.split('/')
+    if parts[:2] != [HASHED_DIR, VARIANTS_PREFIX] or len(parts) != 5:
+        return None
+    extension = parts[-1].rsplit('.', 1)[-1]
+    return {extension: {parts[2]: name}}
+
+
+def delete_variants(variants: dict) -> None:
+    for sizes in variants.values():
+        for name in sizes.values():
+            storage.delete(name)
+
+
+def has_image_metadata(image: Image.Image) -> bool:
+    return (bool(image.getexif())
+            or bool(METADATA_IMAGE_INFO.intersection(image.info))
+            or bool(getattr(image, 'text', None)))
+
+
+def strip_image_metadata(image_file) -> bytes | None:
+    """
+    Re-encodes an upload in its own format with its EXIF orientation
+    applied and its metadata dropped. JPEGs keep their original quality.
+    Returns None when there is no metadata to drop, so already stripped
+    files are not re-encoded again.
+    """
+    image_file.open('rb')
+    with Image.open(image_file) as image:
+        if not has_image_metadata(image):
+            return None
+        image_format = image.format
+        options = {'save_all': getattr(image, 'is_animated', False)}
+        if image_format == 'JPEG':
+            options.update(quality='keep', subsampling='keep')
+        ImageOps.exif_transpose(image, in_place=True)
+        image.info = {key: value for key, value in image.info.items()
+                      if key in KEPT_IMAGE_INFO}
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def strip_stored_image(image_file) -> None:
+    """
+    Replaces a stored original with its metadata-stripped version. The
+    name is kept, so URLs already in lesson content stay valid, and it
+    still identifies the content: the same upload always strips to the
+    same bytes.
+    """
+    data = strip_image_metadata(image_file)
+    image_file.close()
+    if data is not None:
+        storage.overwrite(image_file.name, data)
+
+
+def build_image_variants(image_file) -> dict:
+    """
+    Re-encodes an uploaded image into resized WebP/AVIF variants with
+    all metadata (EXIF, ICC, comments) dropped. Returns
+    {format: {width: storage name}}.
+    """
+    image_file.open('rb')
+    with Image.open(image_file) as uploaded:
+        uploaded.load()
+        image = ImageOps.exif_transpose(uploaded)
+
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    widths = {width for width in VARIANT_WIDTHS if width < image.width}
+    widths.add(min(image.width, VARIANT_WIDTHS[-1]))
+
+    variants = {}
+    for extension, (image_format, options) in VARIANT_FORMATS.items():
+        if not features.check(extension):
+            continue
+        variants[extension] = {}
+        for width in sorted(widths):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            resized.info = {}
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            variants[extension][str(width)] = storage.save_bytes(
+                buffer.getvalue(), f'.{extension}',
+                prefix=get_variant_prefix(width))
+
+    return variants
+
+
+def get_variants_urls(variants: dict) -> dict:
+    return {
+        extension: {width: storage.url(name)
+                    for width, name in sizes.items()}
+        for extension, sizes in variants.items()
+    }
+
+
+def make_srcset(sizes: dict) -> str:
+    return ', '.join(f'{storage.url(name)} {width}w'
+                     for width, name in sorted(sizes.items(),
+                                               key=lambda s: int(s[0])))
+
+
+def use_image_variants(content: str, original_url: str,
+                       variants: dict) -> str:
+    """
+    Points <img> tags referencing the original upload to the largest
+    WebP variant and adds a responsive srcset of all WebP sizes.
+    """
+    sizes = variants.get('webp')
+    if not sizes:
+        return content
+
+    largest = storage.url(sizes[max(sizes, key=int)])
+    pattern = re.compile(r'src="[^"]*' + re.escape(original_url) + '"')
+    return pattern.sub(f'src="{largest}" srcset="{make_srcset(sizes)}"',
+                       content)
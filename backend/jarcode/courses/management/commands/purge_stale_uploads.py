@@ -0,0 +1,23 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from courses.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = 'Deletes chunked uploads that were not finished in time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(hours=options['hours'])
+        stale_uploads = ChunkedUpload.objects.filter(created_at__lt=threshold)
+
+        deleted = 0
+        for upload in stale_uploads.iterator():
+            upload.delete()
+            deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} stale uploads.'))
@@ -0,0 +1,39 @@
+import os
+from django.core.management.base import BaseCommand
+from courses.consts import CONTENT_ADDRESSED_GRACE_PERIOD
+from courses.storage import (
+    HASHED_DIR,
+    DELETED_SUFFIX,
+    TEMP_SUFFIX,
+    content_addressed_storage as storage,
+)
+
+
+class Command(BaseCommand):
+    help = ('Deletes content-addressed files that are no longer referenced '
+            'and were left behind by deletes or interrupted tasks.')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for directory, _, file_names in os.walk(storage.path(HASHED_DIR)):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                try:
+                    if storage.is_reserved(path,
+                                           CONTENT_ADDRESSED_GRACE_PERIOD):
+                        continue
+                except FileNotFoundError:
+                    continue
+                if file_name.endswith((DELETED_SUFFIX, TEMP_SUFFIX)):
+                    # Left by an interrupted delete or save
+                    os.remove(path)
+                    continue
+
+                name = os.path.relpath(path, storage.location)
+                if storage.delete_unreferenced(
+                        name.replace(os.sep, '/'),
+                        min_age=CONTENT_ADDRESSED_GRACE_PERIOD):
+                    deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} unreferenced files.'))
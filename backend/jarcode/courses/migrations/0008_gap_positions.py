@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-19 12:30
+
+import django.db.models.constraints
+from django.db import migrations, models
+
+POSITION_GAP = 1024
+
+
+def spread_positions(apps, schema_editor):
+    for model_name in ('Chapter', 'Lesson'):
+        model = apps.get_model('courses', model_name)
+        model.objects.update(position=models.F('position') * POSITION_GAP)
+
+
+def compact_positions(apps, schema_editor):
+    for model_name, parent_field in (('Chapter', 'course_id'),
+                                     ('Lesson', 'chapter_id')):
+        model = apps.get_model('courses', model_name)
+        items = model.objects.order_by(parent_field, 'position')
+        parent_id, position = None, 0
+        for item in items:
+            if getattr(item, parent_field) != parent_id:
+                parent_id, position = getattr(item, parent_field), 0
+            position += 1
+            item.position = position
+        model.objects.bulk_update(items, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_versioning'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='chapter',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lesson',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='chapter',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['DEFERRED'], fields=('course', 'position'), name='unique_chapter_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='lesson',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['DEFERRED'], fields=('chapter', 'position'), name='unique_lesson_position'),
+        ),
+        migrations.RunPython(spread_positions, compact_positions),
+    ]
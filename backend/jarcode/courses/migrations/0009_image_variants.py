@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_gap_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='lessonimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 12:38
+
+import courses.models
+import courses.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=courses.storage.ContentAddressedStorage(), upload_to=courses.models.get_course_image_path),
+        ),
+        migrations.AlterField(
+            model_name='lessonimage',
+            name='image',
+            field=models.ImageField(storage=courses.storage.ContentAddressedStorage(), upload_to=courses.models.get_lesson_image_path),
+        ),
+    ]
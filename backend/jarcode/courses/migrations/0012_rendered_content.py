@@ -0,0 +1,79 @@
+# Generated by Django 5.2 on 2026-10-19 12:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+from jarcode.content import get_content_hash, render_content
+
+
+def render_lessons(apps, schema_editor):
+    Lesson = apps.get_model('courses', 'Lesson')
+    batch = []
+    for lesson in Lesson.objects.only('id', 'content').iterator(
+            chunk_size=500):
+        rendered = render_content(lesson.content)
+        lesson.content = rendered.html
+        lesson.content_hash = get_content_hash(rendered.html)
+        lesson.content_text = rendered.text
+        lesson.reading_time = rendered.reading_time
+        lesson.toc = rendered.toc
+        batch.append(lesson)
+        if len(batch) >= 500:
+            Lesson.objects.bulk_update(batch, ['content', 'content_hash',
+                                               'content_text',
+                                               'reading_time', 'toc'])
+            batch = []
+    if batch:
+        Lesson.objects.bulk_update(batch, ['content', 'content_hash',
+                                           'content_text', 'reading_time',
+                                           'toc'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='content_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(render_lessons, migrations.RunPython.noop),
+        # Generated columns cannot be altered, the search vector is
+        # rebuilt from the plain text instead of the stripped HTML
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='lesson_search_vector_idx',
+        ),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='search_vector',
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('content_text', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lesson_search_vector_idx'),
+        ),
+    ]
@@ -1,5 +1,20 @@
+import os
+import uuid
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from users.models import User
+from jarcode.models import VersionedModel
+from jarcode.content import (
+    get_content_hash,
+    is_content_unchanged,
+    render_content,
+)
+from search.utils import make_search_vector
+from .storage import content_addressed_storage
+from .images import use_image_variants
 import time
 
 
@@ -13,23 +28,36 @@ def get_lesson_image_path(instance, filename):
     return f'lessons/images/{instance.lesson.id}/{timestamp}_{filename}'
 
 
-class Course(models.Model):
+class Course(VersionedModel):
     title = models.CharField(blank=False, null=False)
     description = models.TextField(blank=False, null=False)
     owner = models.ForeignKey(User,
                               on_delete=models.CASCADE,
                               related_name='owned_courses')
     thumbnail = models.ImageField(blank=True, null=True,
-                                  upload_to=get_course_image_path)
+                                  upload_to=get_course_image_path,
+                                  storage=content_addressed_storage)
+    thumbnail_variants = models.JSONField(default=dict, blank=True)
+    search_vector = models.GeneratedField(
+        expression=make_search_vector('title', 'description'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['title']
+        indexes = [
+            GinIndex(fields=['search_vector'],
+                     name='course_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'),
+                     name='course_title_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Chapter(models.Model):
+class Chapter(VersionedModel):
     title = models.CharField(blank=False, null=False)
     course = models.ForeignKey(Course,
                                on_delete=models.CASCADE,
@@ -38,7 +66,13 @@ class Chapter(models.Model):
 
     class Meta:
         ordering = ['position']
-        unique_together = [['course', 'position']]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['course', 'position'],
+                name='unique_chapter_position',
+                deferrable=models.Deferrable.DEFERRED,
+            ),
+        ]
 
     @property
     def owner(self):
@@ -48,22 +82,80 @@ class Chapter(models.Model):
         return f"{self.position}. {self.title}"
 
 
-class Lesson(models.Model):
+class Lesson(VersionedModel):
     title = models.CharField(blank=False, null=False)
     chapter = models.ForeignKey(Chapter,
                                 on_delete=models.CASCADE,
                                 related_name='lessons')
     content = models.TextField(blank=False, null=False)
+    content_hash = models.CharField(max_length=64, blank=True,
+                                    editable=False)
+    content_text = models.TextField(blank=True, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
     position = models.IntegerField(default=0)
+    search_vector = models.GeneratedField(
+        expression=make_search_vector('title', 'content_text'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['position']
-        unique_together = [['chapter', 'position']]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chapter', 'position'],
+                name='unique_lesson_position',
+                deferrable=models.Deferrable.DEFERRED,
+            ),
+        ]
+        indexes = [
+            GinIndex(fields=['search_vector'],
+                     name='lesson_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'),
+                     name='lesson_title_trgm_idx'),
+        ]
 
     @property
     def owner(self):
         return self.chapter.owner
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            if self.refresh_rendered_content() and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_hash',
+                                           'content_text', 'reading_time',
+                                           'toc'}
+
+        super().save(*args, **kwargs)
+
+    def refresh_rendered_content(self) -> bool:
+        """
+        Recomputes the derived content fields, unless the content is the
+        same as the one they were computed from. Images of the lesson that
+        have variants are pointed at them.
+        """
+        if is_content_unchanged(self.content_hash, self.content):
+            return False
+
+        rendered = render_content(self.content)
+        self.content = self.apply_image_variants(rendered.html)
+        self.content_hash = get_content_hash(self.content)
+        self.content_text = rendered.text
+        self.reading_time = rendered.reading_time
+        self.toc = rendered.toc
+        return True
+
+    def apply_image_variants(self, content: str) -> str:
+        if self.pk is None or '<img' not in content:
+            return content
+        for lesson_image in self.images.exclude(variants={}):
+            content = use_image_variants(content=content,
+                                         original_url=lesson_image.image.url,
+                                         variants=lesson_image.variants)
+        return content
+
     def __str__(self):
         return f"{self.position}. {self.title}"
 
@@ -72,8 +164,40 @@ class LessonImage(models.Model):
     lesson = models.ForeignKey(Lesson,
                                on_delete=models.CASCADE,
                                related_name='images')
-    image = models.ImageField(upload_to=get_lesson_image_path)
+    image = models.ImageField(upload_to=get_lesson_image_path,
+                              storage=content_addressed_storage)
+    variants = models.JSONField(default=dict, blank=True)
 
     @property
     def owner(self):
         return self.lesson.owner
+
+
+class ChunkedUpload(models.Model):
+    """
+    Resumable lesson image upload. Chunks are appended to a temporary
+    file, `offset` is the number of bytes received so far.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    owner = models.ForeignKey(User,
+                              on_delete=models.CASCADE,
+                              related_name='chunked_uploads')
+    lesson = models.ForeignKey(Lesson,
+                               on_delete=models.CASCADE,
+                               related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def temp_path(self) -> str:
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, str(self.id))
+
+    @property
+    def is_complete(self) -> bool:
+        return self.offset == self.size
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -1,21 +1,34 @@
+import os
 from rest_framework import serializers
 from users.serializers import UserGenericInfoSerializer
-from .models import Course, Chapter, Lesson, LessonImage
-from django.conf import settings
-from nh3 import clean
+from .models import Course, Chapter, Lesson, LessonImage, ChunkedUpload
+from jarcode.content import sanitize_html, is_content_unchanged
+from jarcode.mixins import SparseFieldsetSerializerMixin
+from .images import get_variants_urls
+from .consts import LESSON_IMAGE_MAX_SIZE
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        return get_variants_urls(value)
+
+
+class CourseSerializer(SparseFieldsetSerializerMixin,
+                       serializers.ModelSerializer):
     owner = UserGenericInfoSerializer(read_only=True)
+    thumbnail_variants = ImageVariantsField()
 
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['owner']
 
 
-class ChapterSerializer(serializers.ModelSerializer):
+class ChapterSerializer(SparseFieldsetSerializerMixin,
+                        serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(read_only=True)
+    after = serializers.IntegerField(write_only=True, required=False,
+                                     allow_null=True)
 
     class Meta:
         model = Chapter
@@ -23,32 +36,70 @@ class ChapterSerializer(serializers.ModelSerializer):
         read_only_fields = ['position']
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsetSerializerMixin,
+                       serializers.ModelSerializer):
     chapter = serializers.PrimaryKeyRelatedField(read_only=True)
+    after = serializers.IntegerField(write_only=True, required=False,
+                                     allow_null=True)
 
     class Meta:
         model = Lesson
-        fields = '__all__'
+        exclude = ['search_vector', 'content_hash', 'content_text']
         read_only_fields = ['position']
 
     def validate_content(self, value):
+        if self.instance is not None and is_content_unchanged(
+                self.instance.content_hash, value):
+            return value
+
         try:
-            value = clean(html=value,
-                          tags=settings.ALLOWED_TAGS,
-                          attributes=settings.ALLOWED_ATTRIBUTES)
+            value = sanitize_html(value)
         except:
             raise serializers.ValidationError("Lesson content is invalid or insecure HTML")
 
         return value
 
 
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'position']
+
+
+class ChapterPositionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Chapter
+        fields = ['id', 'title', 'position']
+
+
+class ChapterOutlineSerializer(ChapterPositionSerializer):
+    lessons = LessonOutlineSerializer(many=True, read_only=True)
+
+    class Meta(ChapterPositionSerializer.Meta):
+        fields = ChapterPositionSerializer.Meta.fields + ['lessons']
+
+
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    chapters = ChapterOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'chapters']
+
+
+class ReorderSerializer(serializers.Serializer):
+    order = serializers.ListField(child=serializers.IntegerField(),
+                                  allow_empty=False)
+
+
 class LessonImageSerializer(serializers.ModelSerializer):
     lesson = serializers.PrimaryKeyRelatedField(queryset=Lesson.objects.all())
     image = serializers.ImageField()
+    variants = ImageVariantsField()
 
     class Meta:
         model = LessonImage
-        fields = ['id', 'lesson', 'image']
+        fields = ['id', 'lesson', 'image', 'variants']
         read_only_fields = ['id']
 
     def validate(self, attrs):
@@ -60,3 +111,30 @@ class LessonImageSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'lesson': msg})
 
         return attrs
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    lesson = serializers.PrimaryKeyRelatedField(queryset=Lesson.objects.all())
+    size = serializers.IntegerField(min_value=1,
+                                    max_value=LESSON_IMAGE_MAX_SIZE)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'lesson', 'filename', 'size', 'offset']
+        read_only_fields = ['id', 'offset']
+
+    def validate_filename(self, value):
+        filename = os.path.basename(value)
+        if not filename:
+            raise serializers.ValidationError('Filename cannot be empty.')
+        return filename
+
+    def validate(self, attrs):
+        request = self.context.get('request')
+        lesson = attrs.get('lesson')
+
+        if lesson.owner != request.user:
+            msg = 'You do not have permission to add images to this lesson.'
+            raise serializers.ValidationError({'lesson': msg})
+
+        return attrs
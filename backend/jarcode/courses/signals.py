@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from jarcode.models import bump_versions
+from users.models import User
+from users.utils import is_generic_info_saved
+from .models import Course, Chapter, Lesson, LessonImage, ChunkedUpload
+from .utils import invalidate_course_outline
+from .images import delete_variants
+from .uploads import remove_temp_file
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_outline_on_course_change(sender, instance, **kwargs):
+    invalidate_course_outline(course_id=instance.id)
+
+
+@receiver([post_save, post_delete], sender=Chapter)
+def invalidate_outline_on_chapter_change(sender, instance, **kwargs):
+    invalidate_course_outline(course_id=instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_outline_on_lesson_change(sender, instance, **kwargs):
+    course_id = Chapter.objects.filter(
+        pk=instance.chapter_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        invalidate_course_outline(course_id=course_id)
+
+
+@receiver(post_save, sender=User)
+def bump_courses_on_owner_change(sender, instance, created, update_fields,
+                                 **kwargs):
+    if is_generic_info_saved(created, update_fields):
+        bump_versions(Course.objects.filter(owner=instance))
+
+
+@receiver(post_delete, sender=Course)
+def delete_thumbnail_variants(sender, instance, **kwargs):
+    variants = instance.thumbnail_variants
+    transaction.on_commit(lambda: delete_variants(variants))
+
+
+@receiver(post_delete, sender=LessonImage)
+def delete_lesson_image_variants(sender, instance, **kwargs):
+    variants = instance.variants
+    transaction.on_commit(lambda: delete_variants(variants))
+
+
+@receiver(post_delete, sender=ChunkedUpload)
+def delete_upload_temp_file(sender, instance, **kwargs):
+    transaction.on_commit(lambda: remove_temp_file(instance))
@@ -0,0 +1,142 @@
+import os
+import time
+import uuid
+from hashlib import sha256
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from .consts import CONTENT_ADDRESSED_GRACE_PERIOD
+
+HASHED_DIR = 'hashed'
+DELETED_SUFFIX = '.deleted'
+TEMP_SUFFIX = '.tmp'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Names files after the sha256 of their content, so identical uploads
+    are stored once and their URLs never change meaning (safe for
+    immutable caching). Deleting a file (e.g. by django_cleanup) only
+    removes it when no row references it and it was not reused within
+    CONTENT_ADDRESSED_GRACE_PERIOD. The sweep_content_addressed_files
+    command removes the files left behind.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+
+        extension = os.path.splitext(name)[1].lower()
+        return self._store(self.get_hashed_name(digest.hexdigest(),
+                                                extension), content)
+
+    def save_bytes(self, data: bytes, extension: str,
+                   prefix: str = '') -> str:
+        name = self.get_hashed_name(sha256(data).hexdigest(), extension,
+                                    prefix=prefix)
+        return self._store(name, ContentFile(data))
+
+    def overwrite(self, name: str, data: bytes) -> None:
+        """
+        Atomically replaces the content stored under `name`, for derived
+        content that has to keep its name.
+        """
+        path = self.path(name)
+        temp_path = f'{path}.{uuid.uuid4().hex}{TEMP_SUFFIX}'
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        stat = os.stat(path)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, path)
+
+    def delete(self, name):
+        if name:
+            self.delete_unreferenced(name)
+
+    def delete_unreferenced(self, name, min_age: float = 0) -> bool:
+        """
+        The file is moved away before its mtime is checked, so a concurrent
+        `_store` either reserved it before (and the file is put back) or no
+        longer finds it and stores it again. Files modified within the last
+        `min_age` seconds are kept as well.
+        """
+        if self.is_referenced(name):
+            return False
+
+        path = self.path(name)
+        moved_path = f'{path}.{uuid.uuid4().hex}{DELETED_SUFFIX}'
+        try:
+            os.rename(path, moved_path)
+        except FileNotFoundError:
+            return False
+
+        if self.is_reserved(moved_path, min_age):
+            os.replace(moved_path, path)
+            return False
+        os.remove(moved_path)
+        return True
+
+    @staticmethod
+    def is_reserved(path: str, min_age: float = 0) -> bool:
+        return os.stat(path).st_mtime > time.time() - min_age
+
+    def _store(self, name, content) -> str:
+        # Moving the mtime into the future reserves the file, it keeps
+        # delete() from removing it before the row reusing it is saved.
+        # Files stored anew need no reservation, nothing references them
+        # yet, so nothing deletes them.
+        path = self.path(name)
+        now = time.time()
+        try:
+            os.utime(path, (now, now + CONTENT_ADDRESSED_GRACE_PERIOD))
+            return name
+        except FileNotFoundError:
+            pass
+
+        # Written under a unique name and linked into place, so the hashed
+        # name only ever points at a complete file and concurrent identical
+        # uploads end up sharing it
+        temp_path = self.path(
+            self._save(f'{name}.{uuid.uuid4().hex}{TEMP_SUFFIX}', content))
+        try:
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+        return name
+
+    @staticmethod
+    def get_hashed_name(digest: str, extension: str, prefix: str = '') -> str:
+        directory = f'{HASHED_DIR}/{prefix}' if prefix else HASHED_DIR
+        return f'{directory}/{digest[:2]}/{digest}{extension}'
+
+    @staticmethod
+    def is_referenced(name: str) -> bool:
+        from .models import Course, LessonImage
+        from .images import get_variant_lookup
+
+        variant_lookup = get_variant_lookup(name)
+        if variant_lookup is not None:
+            return (
+                LessonImage.objects.filter(
+                    variants__contains=variant_lookup).exists()
+                or Course.objects.filter(
+                    thumbnail_variants__contains=variant_lookup).exists()
+            )
+
+        return (LessonImage.objects.filter(image=name).exists()
+                or Course.objects.filter(thumbnail=name).exists())
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,43 @@
+from dramatiq import actor
+from django.db import transaction
+from jarcode.models import bump_versions
+from .models import Course, Lesson, LessonImage
+from .images import build_image_variants, delete_variants, strip_stored_image
+
+
+@actor
+def process_lesson_image(lesson_image_id: int) -> None:
+    lesson_image = LessonImage.objects.filter(id=lesson_image_id).first()
+    if lesson_image is None:
+        return
+
+    strip_stored_image(lesson_image.image)
+    variants = build_image_variants(lesson_image.image)
+
+    with transaction.atomic():
+        LessonImage.objects.filter(id=lesson_image_id).update(
+            variants=variants)
+        lesson = Lesson.objects.select_for_update().get(
+            id=lesson_image.lesson_id)
+        content = lesson.apply_image_variants(lesson.content)
+        if content != lesson.content:
+            lesson.content = content
+            lesson.save(update_fields=['content'])
+
+
+@actor
+def process_course_thumbnail(course_id: int) -> None:
+    course = Course.objects.filter(id=course_id).first()
+    if course is None or not course.thumbnail:
+        return
+
+    thumbnail_name = course.thumbnail.name
+    strip_stored_image(course.thumbnail)
+    variants = build_image_variants(course.thumbnail)
+
+    updated = bump_versions(
+        Course.objects.filter(id=course_id, thumbnail=thumbnail_name),
+        thumbnail_variants=variants)
+    if not updated:
+        # The thumbnail was replaced or the course deleted meanwhile
+        delete_variants(variants)
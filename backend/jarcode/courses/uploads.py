@@ -0,0 +1,85 @@
+import os
+from django.core.files import File
+from PIL import Image
+from rest_framework import serializers
+from .consts import UPLOAD_CHUNK_MAX_SIZE, UPLOAD_READ_SIZE
+from .models import ChunkedUpload, LessonImage
+
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',                # JPEG
+    b'\x89PNG\r\n\x1a\n',           # PNG
+    b'GIF87a',
+    b'GIF89a',
+)
+
+
+def has_image_signature(header: bytes) -> bool:
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return True
+    return header.startswith(IMAGE_SIGNATURES)
+
+
+def append_chunk(upload: ChunkedUpload, stream, length: int) -> int:
+    """
+    Streams `length` bytes from `stream` into the upload's temporary file
+    at the current offset, `UPLOAD_READ_SIZE` at a time.
+    Returns the number of bytes written.
+    """
+    if length <= 0 or stream is None:
+        raise serializers.ValidationError('Chunk is empty.')
+    if length > UPLOAD_CHUNK_MAX_SIZE:
+        raise serializers.ValidationError(
+            f'Chunk cannot be larger than {UPLOAD_CHUNK_MAX_SIZE} bytes.')
+    if upload.offset + length > upload.size:
+        raise serializers.ValidationError(
+            'Chunk exceeds the declared upload size.')
+
+    path = upload.temp_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    # r+b instead of append, bytes past the offset are leftovers
+    # of an interrupted request and get overwritten
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as temp_file:
+        temp_file.seek(upload.offset)
+        while written < length:
+            data = stream.read(min(UPLOAD_READ_SIZE, length - written))
+            if not data:
+                break
+            if upload.offset == 0 and written == 0 \
+                    and not has_image_signature(data):
+                raise serializers.ValidationError(
+                    'File is not a supported image.')
+            temp_file.write(data)
+            written += len(data)
+        temp_file.truncate()
+
+    if written != length:
+        raise serializers.ValidationError('Chunk is incomplete.')
+    return written
+
+
+def assemble_upload(upload: ChunkedUpload) -> LessonImage:
+    """
+    Verifies the received file and stores it as a LessonImage. The file
+    is read from disk in chunks, so it is never fully loaded into memory.
+    """
+    path = upload.temp_path
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        raise serializers.ValidationError('File is not a valid image.')
+
+    lesson_image = LessonImage(lesson=upload.lesson)
+    with open(path, 'rb') as temp_file:
+        lesson_image.image.save(upload.filename, File(temp_file),
+                                save=False)
+    lesson_image.save()
+    return lesson_image
+
+
+def remove_temp_file(upload: ChunkedUpload) -> None:
+    try:
+        os.remove(upload.temp_path)
+    except FileNotFoundError:
+        pass
@@ -1,6 +1,13 @@
 from django.urls import path, include
 from rest_framework_nested import routers
-from .views import CourseViewSet, ChapterViewSet, LessonViewSet, upload_lesson_image
+from .views import (
+    CourseViewSet,
+    ChapterViewSet,
+    LessonViewSet,
+    upload_lesson_image,
+    create_lesson_image_upload,
+    lesson_image_upload,
+)
 
 router = routers.DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -18,4 +25,8 @@ urlpatterns = [
     path('', include(courses_router.urls)),
     path('', include(chapters_router.urls)),
     path('lessons/upload-image/', upload_lesson_image, name='upload-image'),
+    path('lessons/uploads/', create_lesson_image_upload,
+         name='lesson-image-uploads'),
+    path('lessons/uploads/<uuid:upload_id>/', lesson_image_upload,
+         name='lesson-image-upload'),
 ]
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db.models import F, Max, QuerySet
+from django.utils import timezone
+from rest_framework import serializers
+from .consts import RedisKeysPrefixesEnum, POSITION_GAP
+
+
+def get_course_outline_redis_key(course_id: int) -> str:
+    return f'{RedisKeysPrefixesEnum.COURSE_OUTLINE.value}:{course_id}'
+
+
+def invalidate_course_outline(course_id: int) -> None:
+    cache.delete(get_course_outline_redis_key(course_id=course_id))
+
+
+def renumber_positions(items: list) -> None:
+    """
+    Spreads positions of already ordered siblings by POSITION_GAP. Relies
+    on the deferred unique constraint, so it must run inside a transaction.
+    """
+    if not items:
+        return
+
+    now = timezone.now()
+    for index, item in enumerate(items, start=1):
+        item.position = index * POSITION_GAP
+        item.version = F('version') + 1
+        item.updated_at = now
+    type(items[0]).objects.bulk_update(
+        items, ['position', 'version', 'updated_at'])
+
+
+def apply_order(items: QuerySet, order: list) -> list:
+    items_by_id = {item.id: item for item in items}
+    if len(order) != len(items_by_id) or set(order) != set(items_by_id):
+        raise serializers.ValidationError(
+            {'order': 'Order must list every item exactly once.'})
+
+    ordered = [items_by_id[item_id] for item_id in order]
+    renumber_positions(ordered)
+    return ordered
+
+
+def get_insert_position(siblings: QuerySet, after_id=None,
+                        append: bool = True) -> int:
+    """
+    Returns position for a new item placed after sibling `after_id`
+    (or first when it is None). Only when there is no gap left between
+    neighbours all siblings get renumbered.
+    """
+    if append:
+        max_position = siblings.aggregate(Max('position'))['position__max']
+        return (max_position or 0) + POSITION_GAP
+
+    previous_position = 0
+    if after_id is not None:
+        previous_position = siblings.filter(pk=after_id).values_list(
+            'position', flat=True).first()
+        if previous_position is None:
+            raise serializers.ValidationError(
+                {'after': 'Item does not exist in this parent.'})
+
+    next_position = siblings.filter(
+        position__gt=previous_position).order_by('position').values_list(
+            'position', flat=True).first()
+    if next_position is None:
+        return previous_position + POSITION_GAP
+    if next_position - previous_position > 1:
+        return (previous_position + next_position) // 2
+
+    renumber_positions(list(siblings.only('id', 'position')))
+    return get_insert_position(siblings, after_id=after_id, append=False)
@@ -1,34 +1,101 @@
 from rest_framework import viewsets
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import serializers
-from django.db.models import Max
+from django.db.models import Prefetch
 from django.db import transaction
-from .models import Course, Chapter, Lesson
-from .serializers import CourseSerializer, ChapterSerializer, LessonSerializer
+from django.core.cache import cache
+from rest_framework.generics import get_object_or_404
+from .models import Course, Chapter, Lesson, ChunkedUpload
+from .serializers import (
+    CourseSerializer,
+    ChapterSerializer,
+    LessonSerializer,
+    CourseOutlineSerializer,
+    ChapterPositionSerializer,
+    LessonOutlineSerializer,
+    ReorderSerializer,
+)
 from .permissions import IsOwnerOrReadOnly, IsContentCreatorOrReadOnly
-from rest_framework.decorators import api_view, permission_classes
+from .consts import COURSE_OUTLINE_CACHE_TIMEOUT
+from .utils import (
+    get_course_outline_redis_key,
+    invalidate_course_outline,
+    get_insert_position,
+    apply_order,
+)
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import LessonImageSerializer
+from .serializers import LessonImageSerializer, ChunkedUploadSerializer
 from .pagination import CourseCursorPagination
 from .filters import CourseFilter
+from .tasks import process_lesson_image, process_course_thumbnail
+from .images import delete_variants
+from .uploads import append_chunk, assemble_upload
+from jarcode.mixins import (
+    ConditionalRetrieveMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all()
+class CourseViewSet(ReplicaReadMixin, ConditionalRetrieveMixin,
+                    SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly,
                           IsContentCreatorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = CourseFilter
     pagination_class = CourseCursorPagination
+    lookup_value_regex = r'\d+'
+    unserialized_fields = ('search_vector',)
+    deferrable_fields = {'description': 'description'}
+    # The outline is cached until the next write, so a tree read from a
+    # lagging replica would be served long after the replica caught up
+    primary_read_actions = ('outline',)
+
+    def get_queryset(self):
+        return self.defer_unrequested_fields(Course.objects.all())
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        course = serializer.save(owner=self.request.user)
+        if course.thumbnail:
+            process_course_thumbnail.send(course_id=course.id)
+
+    def perform_update(self, serializer):
+        if 'thumbnail' not in serializer.validated_data:
+            serializer.save()
+            return
+
+        old_variants = serializer.instance.thumbnail_variants
+        course = serializer.save(thumbnail_variants={})
+        transaction.on_commit(lambda: delete_variants(old_variants))
+        if course.thumbnail:
+            process_course_thumbnail.send(course_id=course.id)
+
+    @action(detail=True, methods=['get'],
+            serializer_class=CourseOutlineSerializer)
+    def outline(self, request, pk=None):
+        key = get_course_outline_redis_key(course_id=int(pk))
+        data = cache.get(key)
+        if data is None:
+            lessons = Lesson.objects.only(
+                'id', 'title', 'position', 'chapter_id')
+            chapters = Chapter.objects.only(
+                'id', 'title', 'position', 'course_id'
+            ).prefetch_related(Prefetch('lessons', queryset=lessons))
+            queryset = Course.objects.only('id', 'title').prefetch_related(
+                Prefetch('chapters', queryset=chapters))
+            course = get_object_or_404(queryset, pk=pk)
+            data = CourseOutlineSerializer(course).data
+            cache.set(key, data, timeout=COURSE_OUTLINE_CACHE_TIMEOUT)
 
+        return Response(data)
 
-class ChapterViewSet(viewsets.ModelViewSet):
+
+class ChapterViewSet(ReplicaReadMixin, ConditionalRetrieveMixin,
+                     viewsets.ModelViewSet):
     serializer_class = ChapterSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly,
                           IsContentCreatorOrReadOnly]
@@ -43,61 +110,106 @@ class ChapterViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        course_id = self.kwargs.get('course_pk')
+        after_given = 'after' in serializer.validated_data
+        after_id = serializer.validated_data.pop('after', None)
+
+        with transaction.atomic():
+            course = self._get_locked_course(
+                "You can only add chapters to your own courses")
+            position = get_insert_position(
+                Chapter.objects.filter(course=course),
+                after_id=after_id, append=not after_given)
+
+            serializer.save(course=course, position=position)
+
+    @action(detail=False, methods=['post'],
+            serializer_class=ReorderSerializer)
+    def reorder(self, request, course_pk=None):
+        serializer = ReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
         with transaction.atomic():
-            try:
-                course = Course.objects.select_for_update().get(pk=course_id)
-            except Course.DoesNotExist:
-                raise serializers.ValidationError("Course does not exist")
+            course = self._get_locked_course(
+                "You can only reorder chapters of your own courses")
+            chapters = Chapter.objects.filter(course=course).only(
+                'id', 'title', 'position')
+            ordered = apply_order(chapters,
+                                  serializer.validated_data['order'])
+
+        invalidate_course_outline(course_id=course.id)
+        return Response(ChapterPositionSerializer(ordered, many=True).data)
 
-            if course.owner != self.request.user:
-                raise serializers.ValidationError(
-                    "You can only add chapters to your own courses"
-                )
+    def _get_locked_course(self, not_owner_message: str) -> Course:
+        try:
+            course = Course.objects.select_for_update().get(
+                pk=self.kwargs.get('course_pk'))
+        except Course.DoesNotExist:
+            raise serializers.ValidationError("Course does not exist")
 
-            max_position = Chapter.objects.filter(
-                course=course).aggregate(Max('position'))['position__max']
-            next_position = (max_position or 0) + 1
+        if course.owner != self.request.user:
+            raise serializers.ValidationError(not_owner_message)
 
-            serializer.save(course=course, position=next_position)
+        return course
 
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(ReplicaReadMixin, ConditionalRetrieveMixin,
+                    SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = LessonSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly,
                           IsContentCreatorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['title']
+    unserialized_fields = ('search_vector', 'content_hash', 'content_text')
+    deferrable_fields = {'content': 'content', 'toc': 'toc'}
 
     def get_queryset(self):
         queryset = Lesson.objects.all()
         chapter_id = self.kwargs.get('chapter_pk')
         if chapter_id:
             queryset = queryset.filter(chapter_id=chapter_id)
-        return queryset
+        return self.defer_unrequested_fields(queryset)
 
     def perform_create(self, serializer):
-        chapter_id = self.kwargs.get('chapter_pk')
+        after_given = 'after' in serializer.validated_data
+        after_id = serializer.validated_data.pop('after', None)
+
+        with transaction.atomic():
+            chapter = self._get_locked_chapter(
+                "You can only add lessons to your own chapters")
+            position = get_insert_position(
+                Lesson.objects.filter(chapter=chapter),
+                after_id=after_id, append=not after_given)
+
+            serializer.save(chapter=chapter, position=position)
+
+    @action(detail=False, methods=['post'],
+            serializer_class=ReorderSerializer)
+    def reorder(self, request, course_pk=None, chapter_pk=None):
+        serializer = ReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
         with transaction.atomic():
-            try:
-                chapter = Chapter.objects.select_for_update().get(
-                    pk=chapter_id
-                )
-            except Chapter.DoesNotExist:
-                raise serializers.ValidationError("Chapter does not exist")
+            chapter = self._get_locked_chapter(
+                "You can only reorder lessons of your own chapters")
+            lessons = Lesson.objects.filter(chapter=chapter).only(
+                'id', 'title', 'position')
+            ordered = apply_order(lessons,
+                                  serializer.validated_data['order'])
 
-            if chapter.owner != self.request.user:
-                raise serializers.ValidationError(
-                    "You can only add lessons to your own chapters"
-                )
+        invalidate_course_outline(course_id=chapter.course_id)
+        return Response(LessonOutlineSerializer(ordered, many=True).data)
 
-            max_position = Lesson.objects.filter(
-                chapter=chapter).aggregate(Max('position'))['position__max']
-            next_position = (max_position or 0) + 1
+    def _get_locked_chapter(self, not_owner_message: str) -> Chapter:
+        try:
+            chapter = Chapter.objects.select_for_update().get(
+                pk=self.kwargs.get('chapter_pk'))
+        except Chapter.DoesNotExist:
+            raise serializers.ValidationError("Chapter does not exist")
 
-            serializer.save(chapter=chapter, position=next_position)
+        if chapter.owner != self.request.user:
+            raise serializers.ValidationError(not_owner_message)
+
+        return chapter
 
 
 @api_view(['POST'])
@@ -106,7 +218,69 @@ def upload_lesson_image(request):
     serializer = LessonImageSerializer(data=request.data,
                                        context={'request': request})
     serializer.is_valid(raise_exception=True)
-    serializer.save()
+    lesson_image = serializer.save()
+    process_lesson_image.send(lesson_image_id=lesson_image.id)
 
     image_url = serializer.data.get('image')
     return Response({'location': image_url}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsContentCreatorOrReadOnly])
+def create_lesson_image_upload(request):
+    serializer = ChunkedUploadSerializer(data=request.data,
+                                         context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    serializer.save(owner=request.user)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated, IsContentCreatorOrReadOnly])
+def lesson_image_upload(request, upload_id):
+    """
+    GET returns the current offset to resume from, PATCH appends a raw
+    chunk sent at `Upload-Offset` and DELETE cancels the upload.
+    Once the last chunk arrives the image is stored as a LessonImage.
+    """
+    uploads = ChunkedUpload.objects.filter(owner=request.user)
+
+    if request.method == 'GET':
+        upload = get_object_or_404(uploads, pk=upload_id)
+        return Response(ChunkedUploadSerializer(upload).data)
+
+    if request.method == 'DELETE':
+        upload = get_object_or_404(uploads, pk=upload_id)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset'))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(
+            'Upload-Offset and Content-Length headers are required.')
+
+    with transaction.atomic():
+        upload = get_object_or_404(uploads.select_for_update(),
+                                   pk=upload_id)
+        if offset != upload.offset:
+            return Response({'offset': upload.offset},
+                            status=status.HTTP_409_CONFLICT)
+
+        upload.offset += append_chunk(upload, request.stream, length)
+        upload.save(update_fields=['offset'])
+
+    if not upload.is_complete:
+        return Response(ChunkedUploadSerializer(upload).data,
+                        headers={'Upload-Offset': str(upload.offset)})
+
+    try:
+        lesson_image = assemble_upload(upload)
+    finally:
+        upload.delete()
+    process_lesson_image.send(lesson_image_id=lesson_image.id)
+
+    image_url = LessonImageSerializer(
+        lesson_image, context={'request': request}).data.get('image')
+    return Response({'location': image_url}, status=status.HTTP_201_CREATED)
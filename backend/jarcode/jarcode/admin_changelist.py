@@ -0,0 +1,130 @@
+import json
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+# Below this many estimated rows changelists are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset) -> int:
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator taking the row count from the Postgres planner estimate of
+    the filtered query, so large changelists skip COUNT(*). Small results
+    are still counted exactly.
+    """
+    is_estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate < ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        self.is_estimated = True
+        return estimate
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList paging by primary key (`?cursor=<pk>`) instead of OFFSET
+    while sorted by the default descending primary key ordering, so
+    deep pages cost as much as the first one. Sorting by a column falls
+    back to numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        super().__init__(request, *args, **kwargs)
+        # Links to other filters, orderings or searches start over
+        self.params.pop(CURSOR_VAR, None)
+        self.filter_params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        ordering = list(self.queryset.query.order_by)
+        self.is_keyset = ordering in (['-pk'], [f'-{self.pk_name}'])
+        if not self.is_keyset:
+            return super().get_results(request)
+
+        queryset = self.queryset
+        if self.cursor is not None:
+            try:
+                queryset = queryset.filter(pk__lt=self.cursor)
+            except (ValueError, forms.ValidationError):
+                raise IncorrectLookupParameters
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.result_list = queryset[:self.list_per_page]
+        page = list(self.result_list)
+        self.next_cursor = (page[-1].pk if len(page) == self.list_per_page
+                            else None)
+        self.multi_page = self.cursor is not None or bool(self.next_cursor)
+
+    @property
+    def pk_name(self) -> str:
+        return self.lookup_opts.pk.name
+
+    def get_next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def get_first_page_url(self) -> str:
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign key filter picking the related object with the admin
+    autocomplete widget, instead of listing every related object. The
+    related model's admin must define `search_fields`.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        values = params.get(self.lookup_kwarg)
+        self.lookup_val = values[-1] if values else None
+        super().__init__(field, request, params, model, model_admin,
+                         field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        yield {
+            'widget': self.form_field.widget.render(self.lookup_kwarg,
+                                                    self.lookup_val),
+            'hidden_params': [(name, value) for name, value
+                              in changelist.params.items()
+                              if name != self.lookup_kwarg],
+            'clear_url': changelist.get_query_string(
+                remove=[self.lookup_kwarg]),
+            'selected': self.lookup_val is not None,
+        }
@@ -0,0 +1,109 @@
+import html
+import re
+from dataclasses import dataclass, field
+from functools import cache
+from hashlib import sha256
+from html.parser import HTMLParser
+from django.conf import settings
+from nh3 import Cleaner
+
+READING_WORDS_PER_MINUTE = 200
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+VOID_TAGS = {'br', 'col', 'hr', 'img'}
+
+
+@cache
+def get_cleaner() -> Cleaner:
+    # Built once per process, nh3.clean converts the allowed
+    # tags / attributes sets on every call
+    return Cleaner(tags=settings.ALLOWED_TAGS,
+                   attributes=settings.ALLOWED_ATTRIBUTES)
+
+
+def sanitize_html(value: str) -> str:
+    return get_cleaner().clean(value)
+
+
+def get_content_hash(value: str) -> str:
+    return sha256(value.encode()).hexdigest()
+
+
+def is_content_unchanged(stored_hash: str, value: str) -> bool:
+    """
+    True when `value` is exactly the already sanitized content the
+    stored hash was computed from, so cleaning it again can be skipped.
+    """
+    return bool(stored_hash) and get_content_hash(value) == stored_hash
+
+
+@dataclass
+class RenderedContent:
+    html: str
+    text: str
+    reading_time: int
+    toc: list = field(default_factory=list)
+
+
+class ContentRenderer(HTMLParser):
+    """
+    Walks sanitized HTML once, re-serializing it with `id` anchors on
+    headings while collecting the plain text and the table of contents.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html_parts = []
+        self.text_parts = []
+        self.toc = []
+        self.heading = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = [(name, value) for name, value in attrs if name != 'id']
+        if tag in HEADING_TAGS:
+            anchor = f'section-{len(self.toc) + 1}'
+            attrs.append(('id', anchor))
+            self.heading = {'level': int(tag[1]), 'title': [],
+                            'anchor': anchor}
+        self.html_parts.append(f'<{tag}{self._format_attrs(attrs)}>')
+        self.text_parts.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag in HEADING_TAGS and self.heading is not None:
+            title = ' '.join(''.join(self.heading['title']).split())
+            self.toc.append({**self.heading, 'title': title})
+            self.heading = None
+        self.html_parts.append(f'</{tag}>')
+        self.text_parts.append(' ')
+
+    def handle_data(self, data):
+        self.html_parts.append(html.escape(data, quote=False))
+        self.text_parts.append(data)
+        if self.heading is not None:
+            self.heading['title'].append(data)
+
+    @staticmethod
+    def _format_attrs(attrs) -> str:
+        return ''.join(
+            f' {name}' if value is None
+            else f' {name}="{html.escape(value)}"'
+            for name, value in attrs
+        )
+
+
+def render_content(value: str) -> RenderedContent:
+    renderer = ContentRenderer()
+    renderer.feed(value)
+    renderer.close()
+
+    text = re.sub(r'\s+', ' ', ''.join(renderer.text_parts)).strip()
+    words = len(text.split())
+    reading_time = -(-words // READING_WORDS_PER_MINUTE)
+    return RenderedContent(html=''.join(renderer.html_parts),
+                           text=text,
+                           reading_time=reading_time,
+                           toc=renderer.toc)
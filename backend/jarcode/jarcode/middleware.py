@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+READ_PRIMARY_COOKIE = 'read_primary'
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marks clients that just wrote something with a short-lived cookie, so
+    their next reads are served by the primary instead of a replica that
+    may not have caught up yet.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(READ_PRIMARY_COOKIE, '1',
+                                max_age=settings.REPLICA_STICKINESS_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,234 @@
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from .admin_changelist import EstimatedCountPaginator, KeysetChangeList
+from .db_router import read_from_replica
+from .middleware import READ_PRIMARY_COOKIE
+
+
+class ConditionalRetrieveMixin:
+    """
+    Adds ETag and Last-Modified headers to `retrieve` of viewsets whose
+    model derives from VersionedModel. Validators are read with a single
+    narrow query, so 304 responses skip loading and serializing the row.
+    `etag_fields` may list extra (e.g. annotated, per-user) values that
+    affect the representation. `updated_at` doesn't follow those, so such
+    viewsets only get an ETag. Viewsets can override `get_retrieve_data`
+    to build the representation from a cache keyed by the validators.
+    """
+    etag_fields = ['version']
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        validators = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values('pk', 'updated_at', *self.etag_fields)
+            .first()
+        )
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self._make_etag(validators)
+        headers = {'ETag': etag}
+        last_modified = None
+        if set(self.etag_fields) <= {'version'}:
+            last_modified = validators['updated_at'].timestamp()
+            headers['Last-Modified'] = http_date(last_modified)
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is not None:
+            return response
+
+        data = self.get_retrieve_data(validators)
+        return Response(data, headers=headers)
+
+    def get_retrieve_data(self, validators: dict) -> dict:
+        instance = self.get_object()
+        return self.get_serializer(instance).data
+
+    def _make_etag(self, validators: dict) -> str:
+        model_name = self.get_queryset().model._meta.model_name
+        values = '-'.join(str(validators[field])
+                          for field in ['pk', *self.etag_fields])
+        return quote_etag(f'{model_name}-{values}')
+
+
+class ReplicaReadMixin:
+    """
+    Runs safe requests of a view against the read replica. Clients that
+    recently wrote (see ReadYourWritesMiddleware) keep reading from the
+    primary, so they see their own changes. Actions listed in
+    `primary_read_actions` always read from the primary.
+    """
+    primary_read_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        # The routing is scoped to the request, so it is reset even when
+        # the view raises an exception DRF doesn't handle
+        if (request.method in SAFE_METHODS
+                and self._get_action(request) not in self.primary_read_actions
+                and READ_PRIMARY_COOKIE not in request.COOKIES):
+            with read_from_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def _get_action(self, request):
+        # Viewsets set `action_map` before dispatching, plain API views
+        # have no actions
+        action_map = getattr(self, 'action_map', None) or {}
+        return action_map.get(request.method.lower())
+
+
+SPARSE_FIELDS_PARAM = 'fields'
+
+
+def get_requested_fields(request) -> dict | None:
+    """
+    Parses `?fields=id,title,result.outcome` of safe requests into
+    {'id': {}, 'title': {}, 'result': {'outcome': {}}}. An empty dict
+    selects all fields of a nested representation. Returns None if the
+    client did not ask for a sparse fieldset.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(SPARSE_FIELDS_PARAM)
+    if not value:
+        return None
+
+    requested = {}
+    for path in value.split(','):
+        node = requested
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return requested or None
+
+
+def is_field_requested(requested: dict | None, path: str) -> bool:
+    if requested is None:
+        return True
+    node = requested
+    for name in path.split('.'):
+        if name not in node:
+            return False
+        node = node[name]
+        if not node:
+            return True
+    return True
+
+
+def check_requested_fields(requested: dict, available) -> None:
+    unknown = sorted(set(requested) - set(available))
+    if unknown:
+        raise serializers.ValidationError(
+            {SPARSE_FIELDS_PARAM: f"Unknown fields: {', '.join(unknown)}."})
+
+
+def select_fields(data: dict, requested: dict | None) -> dict:
+    """
+    Applies a sparse fieldset to an already built representation, e.g.
+    one read from a cache.
+    """
+    if requested is None:
+        return data
+    check_requested_fields(requested, data)
+    return {
+        name: (select_fields(data[name], nested)
+               if nested and isinstance(data[name], dict) else data[name])
+        for name, nested in requested.items()
+    }
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Drops the fields a client did not ask for with `?fields=` before
+    serializing, so they are neither computed nor sent. Dotted names
+    select fields of nested serializers using this mixin too.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self._get_requested_fields()
+        if requested is None:
+            return fields
+
+        check_requested_fields(requested, fields)
+        for name in list(fields):
+            if name not in requested:
+                fields.pop(name)
+            elif requested[name] and isinstance(
+                    fields[name], SparseFieldsetSerializerMixin):
+                fields[name].requested_fields = requested[name]
+        return fields
+
+    def _get_requested_fields(self) -> dict | None:
+        if hasattr(self, 'requested_fields'):
+            return self.requested_fields
+
+        # Nested serializers only follow what their parent passes down
+        parent = getattr(self, 'parent', None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return None
+        return get_requested_fields(self.context.get('request'))
+
+
+class SparseFieldsetMixin:
+    """
+    Narrows the queryset of safe requests. `unserialized_fields` are never
+    loaded, the fields of `deferrable_fields` (representation paths mapped
+    to model field lookups) only if the client did not leave them out of
+    `?fields=`.
+    """
+    unserialized_fields = ()
+    deferrable_fields = {}
+
+    def defer_unrequested_fields(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        requested = get_requested_fields(self.request)
+        deferred = [*self.unserialized_fields,
+                    *(lookup for path, lookup in self.deferrable_fields.items()
+                      if not is_field_requested(requested, path))]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class DeferredChangelistFieldsMixin:
+    """
+    ModelAdmin mixin deferring `changelist_deferred_fields` on the
+    changelist and in autocomplete results, which never display them.
+    Change forms load every field.
+    """
+    changelist_deferred_fields = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match is not None and (match.url_name.endswith('_changelist')
+                                  or match.url_name == 'autocomplete'):
+            queryset = queryset.defer(*self.changelist_deferred_fields)
+        return queryset
+
+
+class LargeChangelistMixin:
+    """
+    ModelAdmin mixin for tables with millions of rows: estimated counts,
+    keyset pagination and no unfiltered total count. Provides the media
+    of AutocompleteFilter, which should replace related list filters.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    @property
+    def media(self):
+        # The widget media does not depend on the field
+        return super().media + AutocompleteSelect(None, self.admin_site).media
@@ -0,0 +1,39 @@
+from django.db import models
+from django.db.models.expressions import CombinedExpression
+from django.utils import timezone
+
+
+class VersionedModel(models.Model):
+    """
+    Abstract model tracking a modification counter and timestamp, used
+    as cheap HTTP validators (ETag / Last-Modified) for read endpoints.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = models.F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields,
+                                           'version', 'updated_at'}
+
+        super().save(*args, **kwargs)
+
+        # Deferred, so the new counter is only read back when accessed
+        if isinstance(self.version, CombinedExpression):
+            del self.__dict__['version']
+
+
+def bump_versions(queryset, **fields) -> int:
+    """
+    Marks the rows of a VersionedModel queryset as modified, e.g. when
+    related data their representation includes has changed. `fields` are
+    updated along.
+    """
+    return queryset.update(version=models.F('version') + 1,
+                           updated_at=timezone.now(), **fields)
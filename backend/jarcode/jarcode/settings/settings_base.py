@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,6 +33,7 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 AUTH_USER_MODEL = "users.User"
+AUTHENTICATION_BACKENDS = ["users.backends.CachedModelBackend"]
 # Application definition
 
 
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_dramatiq",
     "rest_framework",
     "django_filters",
@@ -51,6 +54,7 @@ INSTALLED_APPS = [
     "courses.apps.CoursesConfig",
     "problems.apps.ProblemsConfig",
     "submissions.apps.SubmissionsConfig",
+    "search.apps.SearchConfig",
     'drf_spectacular',
     'drf_spectacular_sidecar'
 ]
@@ -63,6 +67,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "jarcode.middleware.ReadYourWritesMiddleware",
 ]
 
 ROOT_URLCONF = "jarcode.urls"
@@ -70,7 +75,7 @@ ROOT_URLCONF = "jarcode.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [os.path.join(BASE_DIR, 'templates')],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -99,6 +104,55 @@ DATABASES = {
     },
 }
 
+# Database connection reuse, POSTGRES_POOL_MODE is one of:
+#  - "pool": psycopg3 pool per process, sized by POSTGRES_POOL_MAX_SIZE
+#    (gunicorn threads for web, DRAMATIQ_THREADS for workers)
+#  - "pgbouncer": persistent connections to a transaction pooler, without
+#    server-side cursors and prepared statements
+#  - "persistent": plain persistent connections
+POSTGRES_POOL_MODE = os.environ.get('POSTGRES_POOL_MODE', 'pool')
+
+if POSTGRES_POOL_MODE == 'pool':
+    # Health checks make the pool validate connections on checkout
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 4)),
+            'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+            'max_idle': 5*60,                                # 5 MINUTES
+            'max_lifetime': 60*60,                           # 1 HOUR
+        },
+    }
+elif POSTGRES_POOL_MODE == 'pgbouncer':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+        'OPTIONS': {'prepare_threshold': None},
+    })
+else:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+
+# Read replica, safe requests of ReplicaReadMixin views are served by it
+REPLICA_DATABASE = None
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT',
+                               os.environ['POSTGRES_PORT']),
+    }
+    REPLICA_DATABASE = 'replica'
+
+DATABASE_ROUTERS = ['jarcode.db_router.PrimaryReplicaRouter']
+
+# How long a client reads from the primary after writing
+REPLICA_STICKINESS_SECONDS = 30
 
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_CLASSES': [
@@ -145,6 +199,9 @@ CACHES = {
     }
 }
 
+# Sessions are read from the cache, the database is only written through
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -196,6 +253,21 @@ DRAMATIQ_BROKER = {
 }
 
 
+# Gemini client used for AI evaluation of submissions
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL') or None
+GEMINI_MODEL = 'gemini-2.5-flash'
+GEMINI_TIMEOUT = 20                                  # 20 SECONDS
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', 4))
+GEMINI_REQUESTS_PER_MINUTE = int(
+    os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 60))
+
+# Tried in order, the heuristic evaluator needs no network and never fails
+AI_EVALUATOR_PROVIDERS = [
+    'ai_evaluator.gemini_evaluator.GeminiEvaluator',
+    'ai_evaluator.heuristic_evaluator.HeuristicEvaluator',
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -217,11 +289,29 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Not served, archives hold the submissions of all users
+    'submission_archives': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': os.path.join(BASE_DIR, 'archives')},
+    },
+}
+
 
 # Upload size limits (10 MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 
+# Partial chunked uploads are kept here until the last chunk arrives
+CHUNKED_UPLOAD_TEMP_DIR = os.path.join(tempfile.gettempdir(),
+                                       'jarcode_uploads')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -242,7 +332,8 @@ ALLOWED_TAGS = {
 }
 ALLOWED_ATTRIBUTES = {
     'a': {'href', 'title', 'target', 'style', 'class', 'border'},
-    'img': {'src', 'alt', 'title', 'width', 'height', 'style', 'class', 'border'},
+    'img': {'src', 'srcset', 'sizes', 'alt', 'title', 'width', 'height',
+            'style', 'class', 'border'},
 }
 ALLOWED_ATTRIBUTES.update({
     tag: {'style', 'class', 'border'}
@@ -6,3 +6,10 @@ DRAMATIQ_BROKER = {
     "OPTIONS": {},
     "MIDDLEWARE": [],
 }
+
+# Second local database standing in for a replica, tests opt in to
+# replica reads by setting REPLICA_DATABASE
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': f"{DATABASES['default']['NAME']}_replica",
+}
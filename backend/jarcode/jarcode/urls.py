@@ -25,6 +25,7 @@ urlpatterns = [
     path('api/', include('courses.urls')),
     path('api/', include('problems.urls')),
     path('api/', include('submissions.urls')),
+    path('api/', include('search.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/',
          SpectacularSwaggerView.as_view(url_name='schema'),
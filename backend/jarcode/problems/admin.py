@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import Problem
+from jarcode.mixins import DeferredChangelistFieldsMixin
 
 
 @admin.register(Problem)
-class ProblemAdmin(admin.ModelAdmin):
+class ProblemAdmin(DeferredChangelistFieldsMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'author',
@@ -11,9 +12,13 @@ class ProblemAdmin(admin.ModelAdmin):
         'difficulty',
         'created_at',
     )
+    changelist_deferred_fields = ('description', 'starting_code', 'test_code',
+                                  'search_vector')
 
     list_filter = ('difficulty', 'language', 'author__email')
     search_fields = ('title', 'author__email')
+    # Keeps the autocomplete pages of submission filters stable
+    ordering = ('-id',)
     date_hierarchy = 'created_at'
 
     readonly_fields = ('created_at',)
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class RedisKeysPrefixesEnum(str, Enum):
+    PROBLEM = 'problem'
+    PROBLEM_LIST_ITEM = 'problem_list_item'
+
+
+PROBLEM_CACHE_TIMEOUT = 60*60                      # 1 HOUR
+# Sent only to the problem's author
+AUTHOR_ONLY_FIELDS = ('test_code',)
@@ -0,0 +1,60 @@
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from problems.models import Problem
+from problems.utils import get_problem_redis_key
+from problems.consts import RedisKeysPrefixesEnum
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Measures request rate of problem list and detail endpoints '
+            'with a cold and a warm problem cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--email', type=str, default=None)
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.first()
+        problem = Problem.objects.order_by('-id').first()
+        if user is None or problem is None:
+            raise CommandError('At least one user and problem are required.')
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        endpoints = {
+            'list': reverse('problem-list'),
+            'detail': reverse('problem-detail', kwargs={'pk': problem.pk}),
+        }
+
+        for name, url in endpoints.items():
+            cold = self._measure(client, url, options['requests'], warm=False)
+            warm = self._measure(client, url, options['requests'], warm=True)
+            self.stdout.write(
+                f'{name}: cold {cold:.1f} req/s, warm {warm:.1f} req/s')
+
+    @staticmethod
+    def _measure(client, url, requests, warm) -> float:
+        keys = [get_problem_redis_key(problem_id=pid, version=version,
+                                      prefix=prefix)
+                for pid, version
+                in Problem.objects.values_list('id', 'version')
+                for prefix in RedisKeysPrefixesEnum]
+        cache.delete_many(keys)
+        if warm:
+            client.get(url)
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            if not warm:
+                cache.delete_many(keys)
+            client.get(url)
+        elapsed = time.perf_counter() - start
+
+        return requests / elapsed
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 12:48
+
+from django.db import migrations, models
+from jarcode.content import get_content_hash
+
+
+def hash_descriptions(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    batch = []
+    for problem in Problem.objects.only('id', 'description').iterator(
+            chunk_size=500):
+        problem.description_hash = get_content_hash(problem.description)
+        batch.append(problem)
+        if len(batch) >= 500:
+            Problem.objects.bulk_update(batch, ['description_hash'])
+            batch = []
+    if batch:
+        Problem.objects.bulk_update(batch, ['description_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0005_versioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='description_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(hash_descriptions, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,14 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from users.models import User
+from jarcode.models import VersionedModel
+from jarcode.content import get_content_hash
+from search.utils import make_search_vector
 
 
-class Problem(models.Model):
+class Problem(VersionedModel):
     class Language(models.TextChoices):
         PYTHON = 'PYTHON', 'Python'
         CPP = 'CPP', 'C++'
@@ -18,8 +24,36 @@ class Problem(models.Model):
                                on_delete=models.CASCADE)
     title = models.CharField()
     description = models.TextField()
+    description_hash = models.CharField(max_length=64, blank=True,
+                                        editable=False)
     language = models.CharField(choices=Language.choices)
     starting_code = models.TextField()
     test_code = models.TextField()
     difficulty = models.CharField(choices=Difficulty.choices)
     created_at = models.DateTimeField(auto_now_add=True)
+    search_vector = models.GeneratedField(
+        expression=make_search_vector('title', 'description',
+                                      strip_html=True),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'],
+                     name='problem_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'),
+                     name='problem_title_trgm_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'description' in update_fields:
+            self.description_hash = get_content_hash(self.description)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'description_hash'}
+
+        super().save(*args, **kwargs)
@@ -1,8 +1,7 @@
 from rest_framework import serializers
 from .models import Problem
 from users.serializers import UserGenericInfoSerializer
-from django.conf import settings
-from nh3 import clean
+from jarcode.content import sanitize_html, is_content_unchanged
 
 
 class ProblemSeriazlier(serializers.ModelSerializer):
@@ -11,15 +10,28 @@ class ProblemSeriazlier(serializers.ModelSerializer):
 
     class Meta:
         model = Problem
-        fields = '__all__'
+        exclude = ['search_vector', 'description_hash']
         read_only_fields = ['author', 'created_at']
 
     def validate_description(self, value):
+        if self.instance is not None and is_content_unchanged(
+                self.instance.description_hash, value):
+            return value
+
         try:
-            value = clean(html=value,
-                          tags=settings.ALLOWED_TAGS,
-                          attributes=settings.ALLOWED_ATTRIBUTES)
+            value = sanitize_html(value)
         except:
             raise serializers.ValidationError("Problem description is invalid or insecure HTML")
 
         return value
+
+
+class ProblemListSerializer(ProblemSeriazlier):
+    """
+    Representation of problems in lists, without the code needed only
+    to solve or to edit a problem.
+    """
+
+    class Meta(ProblemSeriazlier.Meta):
+        exclude = [*ProblemSeriazlier.Meta.exclude,
+                   'starting_code', 'test_code']
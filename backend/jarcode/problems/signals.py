@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from jarcode.models import bump_versions
+from users.models import User
+from users.utils import is_generic_info_saved
+from .models import Problem
+from .utils import invalidate_problem
+
+
+@receiver(post_save, sender=Problem)
+def invalidate_previous_problem_version(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_problem(problem_id=instance.id,
+                           version=instance.version - 1)
+
+
+@receiver(post_delete, sender=Problem)
+def invalidate_problem_on_delete(sender, instance, **kwargs):
+    invalidate_problem(problem_id=instance.id, version=instance.version)
+
+
+@receiver(post_save, sender=User)
+def bump_problems_on_author_change(sender, instance, created, update_fields,
+                                   **kwargs):
+    if is_generic_info_saved(created, update_fields):
+        bump_versions(Problem.objects.filter(author=instance))
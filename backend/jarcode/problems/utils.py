@@ -0,0 +1,16 @@
+from django.core.cache import cache
+from .consts import RedisKeysPrefixesEnum
+
+
+def get_problem_redis_key(problem_id: int, version: int,
+                          prefix=RedisKeysPrefixesEnum.PROBLEM) -> str:
+    return f'{prefix.value}:{problem_id}:{version}'
+
+
+def invalidate_problem(problem_id: int, version: int) -> None:
+    cache.delete_many([
+        get_problem_redis_key(problem_id=problem_id, version=version,
+                              prefix=prefix)
+        for prefix in (RedisKeysPrefixesEnum.PROBLEM,
+                       RedisKeysPrefixesEnum.PROBLEM_LIST_ITEM)
+    ])
@@ -1,38 +1,118 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
-from django.db.models import Exists, OuterRef
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Q,
+)
+from django.core.cache import cache
 from .models import Problem
 from .permissions import IsAuthorOrReadOnly, IsContentCreatorOrReadOnly
-from .serializers import ProblemSeriazlier
+from .serializers import ProblemSeriazlier, ProblemListSerializer
 from .pagination import ProblemCursorPagination
 from .filters import ProblemFilter
-from submissions.models import Submission, Result
+from .consts import (
+    PROBLEM_CACHE_TIMEOUT,
+    AUTHOR_ONLY_FIELDS,
+    RedisKeysPrefixesEnum,
+)
+from .utils import get_problem_redis_key
+from submissions.models import UserSolvedProblem
+from jarcode.mixins import (
+    ConditionalRetrieveMixin,
+    ReplicaReadMixin,
+    get_requested_fields,
+    select_fields,
+)
 
 
-class ProblemViewSet(viewsets.ModelViewSet):
+class ProblemViewSet(ReplicaReadMixin, ConditionalRetrieveMixin,
+                     viewsets.ModelViewSet):
     serializer_class = ProblemSeriazlier
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly,
                           IsContentCreatorOrReadOnly]
     authentication_classes = [SessionAuthentication]
     filterset_class = ProblemFilter
     pagination_class = ProblemCursorPagination
+    etag_fields = ['version', 'is_solved', 'is_author']
 
     def get_queryset(self):
         queryset = Problem.objects.all()
         user = self.request.user
 
         if user.is_authenticated:
-            is_solved_subquery = Submission.objects.filter(
+            is_solved_subquery = UserSolvedProblem.objects.filter(
                 problem=OuterRef('pk'),
-                author=user,
-                result__outcome=Result.Outcome.PASSED
+                user=user
             )
             queryset = queryset.annotate(
-                is_solved=Exists(is_solved_subquery)
+                is_solved=Exists(is_solved_subquery),
+                is_author=ExpressionWrapper(Q(author=user),
+                                            output_field=BooleanField())
             )
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(
+            queryset.values('id', 'version', 'is_solved'))
+        requested = get_requested_fields(request)
+        representations = self._get_cached_representations(
+            page, serializer_class=ProblemListSerializer,
+            prefix=RedisKeysPrefixesEnum.PROBLEM_LIST_ITEM)
+        return self.get_paginated_response(
+            [select_fields(data, requested) for data in representations])
+
+    def get_retrieve_data(self, validators):
+        row = {**validators, 'id': validators['pk']}
+        data = self._get_cached_representations(
+            [row], serializer_class=self.get_serializer_class(),
+            prefix=RedisKeysPrefixesEnum.PROBLEM)[0]
+        if not validators['is_author']:
+            data = {name: value for name, value in data.items()
+                    if name not in AUTHOR_ONLY_FIELDS}
+        return select_fields(data, get_requested_fields(self.request))
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+
+    def _get_cached_representations(self, rows, serializer_class, prefix):
+        """
+        Problem bodies are shared by all users and cached per version and
+        representation, only the `is_solved` flag of each row is merged in
+        per request.
+        """
+        keys = {
+            row['id']: get_problem_redis_key(problem_id=row['id'],
+                                             version=row['version'],
+                                             prefix=prefix)
+            for row in rows
+        }
+        cached = cache.get_many(keys.values())
+        bodies = {problem_id: cached[key]
+                  for problem_id, key in keys.items() if key in cached}
+
+        missing_ids = [pid for pid in keys if pid not in bodies]
+        if missing_ids:
+            problems = (Problem.objects.select_related('author')
+                        .defer(*serializer_class.Meta.exclude)
+                        .filter(id__in=missing_ids))
+            context = self.get_serializer_context()
+            fresh = {problem.id: serializer_class(problem,
+                                                  context=context).data
+                     for problem in problems}
+            cache.set_many(
+                {get_problem_redis_key(problem_id=pid,
+                                       version=body['version'],
+                                       prefix=prefix): body
+                 for pid, body in fresh.items()},
+                timeout=PROBLEM_CACHE_TIMEOUT
+            )
+            bodies.update(fresh)
+
+        return [{**bodies[row['id']], 'is_solved': row['is_solved']}
+                for row in rows if row['id'] in bodies]
@@ -0,0 +1,45 @@
+from rest_framework import serializers
+from problems.models import Problem
+from courses.models import Course, Lesson
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    class ResultType:
+        PROBLEM = 'problem'
+        COURSE = 'course'
+        LESSON = 'lesson'
+        CHOICES = [PROBLEM, COURSE, LESSON]
+
+    q = serializers.CharField(required=True, min_length=2, max_length=200)
+    type = serializers.ChoiceField(choices=ResultType.CHOICES, required=False)
+
+
+class ProblemSearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Problem
+        fields = ['id', 'title', 'language', 'difficulty', 'rank']
+
+
+class CourseSearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'rank']
+
+
+class LessonSearchResultSerializer(serializers.ModelSerializer):
+    course = serializers.IntegerField(source='course_id', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'chapter', 'course', 'rank']
+
+
+class SearchResultsSerializer(serializers.Serializer):
+    problems = ProblemSearchResultSerializer(many=True)
+    courses = CourseSearchResultSerializer(many=True)
+    lessons = LessonSearchResultSerializer(many=True)
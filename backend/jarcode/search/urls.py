@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import SearchApiView
+
+urlpatterns = [
+    path('search/', SearchApiView.as_view(), name='search'),
+]
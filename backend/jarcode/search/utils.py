@@ -0,0 +1,55 @@
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, Func, TextField
+from django.db.models.functions import Upper
+
+SEARCH_CONFIG = 'english'
+
+
+class StripHtml(Func):
+    """
+    Replaces HTML tags with spaces so that only the text of sanitized
+    HTML content ends up in search vectors.
+    """
+    function = 'regexp_replace'
+    template = "%(function)s(%(expressions)s, '<[^>]*>', ' ', 'g')"
+    output_field = TextField()
+
+
+def make_search_vector(title_field: str, body_field: str,
+                       strip_html: bool = False):
+    body = StripHtml(body_field) if strip_html else body_field
+    return (
+        SearchVector(title_field, weight='A', config=SEARCH_CONFIG)
+        + SearchVector(body, weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def rank_by_search_query(queryset, query: str, limit: int):
+    """
+    Full-text search ranked by relevance. When nothing matches (e.g. the
+    query contains typos) it falls back to trigram similarity of titles.
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG,
+                               search_type='websearch')
+    results = list(
+        queryset.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'id')[:limit]
+    )
+    if results:
+        return results
+
+    upper_query = query.upper()
+    return list(
+        queryset.annotate(
+            upper_title=Upper('title'),
+            rank=TrigramWordSimilarity(upper_query, Upper('title'))
+        )
+        .filter(upper_title__trigram_word_similar=upper_query)
+        .order_by('-rank', 'id')[:limit]
+    )
@@ -0,0 +1,64 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.authentication import SessionAuthentication
+from django.db.models import F
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from problems.models import Problem
+from courses.models import Course, Lesson
+from .serializers import (
+    SearchQuerySerializer,
+    SearchResultsSerializer,
+    ProblemSearchResultSerializer,
+    CourseSearchResultSerializer,
+    LessonSearchResultSerializer,
+)
+from .utils import rank_by_search_query
+from jarcode.mixins import ReplicaReadMixin
+
+
+class SearchApiView(ReplicaReadMixin, APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+    RESULTS_LIMIT = 10
+
+    @extend_schema(
+        summary="Search problems, courses and lessons",
+        description=("Full-text search ranked by relevance, falling back "
+                     "to title similarity when the query has no matches."),
+        parameters=[SearchQuerySerializer],
+        responses={
+            200: OpenApiResponse(SearchResultsSerializer,
+                                 description="Search results."),
+            400: OpenApiResponse(description="Invalid query.")
+        }
+    )
+    def get(self, request, format=None):
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        query = serializer.validated_data['q']
+        result_type = serializer.validated_data.get('type')
+        types = SearchQuerySerializer.ResultType
+
+        results = {'problems': [], 'courses': [], 'lessons': []}
+        if result_type in (None, types.PROBLEM):
+            problems = Problem.objects.only(
+                'id', 'title', 'language', 'difficulty')
+            results['problems'] = ProblemSearchResultSerializer(
+                self._search(problems, query), many=True).data
+        if result_type in (None, types.COURSE):
+            courses = Course.objects.only('id', 'title')
+            results['courses'] = CourseSearchResultSerializer(
+                self._search(courses, query), many=True).data
+        if result_type in (None, types.LESSON):
+            lessons = Lesson.objects.only(
+                'id', 'title', 'chapter').annotate(
+                    course_id=F('chapter__course_id'))
+            results['lessons'] = LessonSearchResultSerializer(
+                self._search(lessons, query), many=True).data
+
+        return Response(results)
+
+    def _search(self, queryset, query):
+        return rank_by_search_query(queryset, query, self.RESULTS_LIMIT)
@@ -1,5 +1,8 @@
-from django.contrib import admin
-from .models import Submission, Result
+from django.contrib import admin, messages
+from .models import Submission, Result, SubmissionArchive
+from .archive import restore_archive
+from jarcode.admin_changelist import AutocompleteFilter
+from jarcode.mixins import DeferredChangelistFieldsMixin, LargeChangelistMixin
 
 
 class ResultInline(admin.StackedInline):
@@ -11,7 +14,8 @@ class ResultInline(admin.StackedInline):
 
 
 @admin.register(Submission)
-class SubmissionAdmin(admin.ModelAdmin):
+class SubmissionAdmin(LargeChangelistMixin, DeferredChangelistFieldsMixin,
+                      admin.ModelAdmin):
     list_display = (
         'id',
         'problem',
@@ -19,8 +23,20 @@ class SubmissionAdmin(admin.ModelAdmin):
         'status',
         'created_at',
     )
+    list_select_related = ('problem', 'author')
+    changelist_deferred_fields = (
+        'solution',
+        'problem__description',
+        'problem__starting_code',
+        'problem__test_code',
+        'problem__search_vector',
+    )
 
-    list_filter = ('status', 'problem', 'author__email')
+    list_filter = (
+        'status',
+        ('problem', AutocompleteFilter),
+        ('author', AutocompleteFilter),
+    )
     search_fields = ('author__email', 'problem__title')
     date_hierarchy = 'created_at'
 
@@ -45,9 +61,16 @@ class SubmissionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Result)
-class ResultAdmin(admin.ModelAdmin):
+class ResultAdmin(LargeChangelistMixin, DeferredChangelistFieldsMixin,
+                  admin.ModelAdmin):
     list_display = ('submission_id', 'outcome', 'get_submission_author')
-    list_filter = ('outcome',)
+    list_select_related = ('submission__author',)
+    changelist_deferred_fields = ('output', 'ai_evaluation',
+                                  'submission__solution')
+    list_filter = (
+        'outcome',
+        ('submission__problem', AutocompleteFilter),
+    )
     search_fields = ('submission__author__email', 'submission__problem__title')
     readonly_fields = ('submission', 'output', 'outcome')
 
@@ -57,4 +80,22 @@ class ResultAdmin(admin.ModelAdmin):
 
     @admin.display(description='Submission ID')
     def submission_id(self, obj):
-        return obj.submission.id
+        return obj.submission_id
+
+
+@admin.register(SubmissionArchive)
+class SubmissionArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'first_submitted_at', 'last_submitted_at',
+                    'submission_count', 'created_at', 'restored_at')
+    readonly_fields = ('file_name', 'submission_count', 'first_submitted_at',
+                       'last_submitted_at', 'created_at', 'restored_at')
+    actions = ['restore_archives']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Restore selected archives')
+    def restore_archives(self, request, queryset):
+        restored = sum(restore_archive(archive) for archive in queryset)
+        self.message_user(request, f'Restored {restored} submissions.',
+                          messages.SUCCESS)
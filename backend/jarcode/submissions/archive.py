@@ -0,0 +1,161 @@
+import io
+import json
+import uuid
+from datetime import datetime
+import zstandard
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import Case, F, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from problems.models import Problem
+from users.models import User
+from .models import Submission, Result, SubmissionArchive
+from .consts import (
+    COMPRESSION_LEVEL,
+    SUBMISSION_ARCHIVE_BATCH_SIZE,
+    SUBMISSION_ARCHIVE_STORAGE,
+)
+
+
+def get_archivable_submissions(cutoff: datetime, keep_last: int):
+    """
+    Submissions created before `cutoff`, except the last `keep_last` ones
+    and the best one (passed first, then latest) of each author and
+    problem, and the ones restored from an archive. Ranks are computed
+    over all submissions, so recent ones count towards `keep_last`.
+    """
+    partition = [F('author_id'), F('problem_id')]
+    ranked = Submission.objects.annotate(
+        recency=Window(RowNumber(), partition_by=partition,
+                       order_by=F('id').desc()),
+        rank=Window(RowNumber(), partition_by=partition, order_by=[
+            Case(When(result__outcome=Result.Outcome.PASSED, then=Value(0)),
+                 default=Value(1)),
+            F('id').desc(),
+        ]),
+    ).filter(recency__gt=keep_last, rank__gt=1)
+    return Submission.objects.filter(id__in=ranked.values('id'),
+                                     created_at__lt=cutoff,
+                                     restored_at__isnull=True)
+
+
+def archive_submissions(cutoff: datetime,
+                        keep_last: int) -> list[SubmissionArchive]:
+    """
+    Moves the archivable submissions into archives of at most
+    SUBMISSION_ARCHIVE_BATCH_SIZE submissions, one month each.
+    """
+    rows = (get_archivable_submissions(cutoff, keep_last)
+            .order_by('created_at', 'id').values_list('id', 'created_at'))
+    archives = []
+    batch = []
+    for submission_id, created_at in rows.iterator():
+        if batch and (len(batch) >= SUBMISSION_ARCHIVE_BATCH_SIZE
+                      or _month(created_at) != _month(batch[0][1])):
+            archives.append(archive_batch([row[0] for row in batch]))
+            batch = []
+        batch.append((submission_id, created_at))
+    if batch:
+        archives.append(archive_batch([row[0] for row in batch]))
+    return archives
+
+
+def _month(created_at: datetime) -> str:
+    return f'{created_at:%Y-%m}'
+
+
+def archive_batch(submission_ids: list[int]) -> SubmissionArchive:
+    submissions = list(Submission.objects.select_related('result')
+                       .filter(id__in=submission_ids).order_by('created_at'))
+    lines = '\n'.join(json.dumps(_serialize(submission))
+                      for submission in submissions)
+    compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+    first, last = submissions[0].created_at, submissions[-1].created_at
+
+    storage = storages[SUBMISSION_ARCHIVE_STORAGE]
+    file_name = storage.save(f'{_month(first)}/{uuid.uuid4().hex}.jsonl.zst',
+                             ContentFile(compressor.compress(lines.encode())))
+    try:
+        with transaction.atomic():
+            archive = SubmissionArchive.objects.create(
+                file_name=file_name, submission_count=len(submissions),
+                first_submitted_at=first, last_submitted_at=last)
+            Submission.objects.filter(id__in=submission_ids).delete()
+    except Exception:
+        storage.delete(file_name)
+        raise
+    return archive
+
+
+def _serialize(submission: Submission) -> dict:
+    result = getattr(submission, 'result', None)
+    return {
+        'id': submission.id,
+        'author_id': submission.author_id,
+        'problem_id': submission.problem_id,
+        'solution': submission.solution,
+        'status': submission.status,
+        'created_at': submission.created_at.isoformat(),
+        'result': result and {
+            'output': result.output,
+            'outcome': result.outcome,
+            'ai_evaluation': result.ai_evaluation,
+        },
+    }
+
+
+def read_archive(archive: SubmissionArchive):
+    storage = storages[SUBMISSION_ARCHIVE_STORAGE]
+    with storage.open(archive.file_name, 'rb') as file:
+        reader = zstandard.ZstdDecompressor().stream_reader(file)
+        for line in io.TextIOWrapper(reader, encoding='utf-8'):
+            yield json.loads(line)
+
+
+def restore_archive(archive: SubmissionArchive) -> int:
+    """
+    Inserts the archived submissions back with their ids, marked as
+    restored so later runs don't archive them again. Submissions already
+    in the database, or whose author or problem was deleted, are skipped.
+    Returns the number of restored submissions.
+    """
+    records = list(read_archive(archive))
+    existing = set(Submission.objects.filter(
+        id__in=[record['id'] for record in records])
+        .values_list('id', flat=True))
+    problems = Problem.objects.only('id', 'language').in_bulk(
+        {record['problem_id'] for record in records})
+    authors = set(User.objects.filter(
+        id__in={record['author_id'] for record in records})
+        .values_list('id', flat=True))
+    records = [record for record in records
+               if record['id'] not in existing
+               and record['problem_id'] in problems
+               and record['author_id'] in authors]
+
+    restored_at = timezone.now()
+    submissions = [
+        Submission(id=record['id'], author_id=record['author_id'],
+                   problem=problems[record['problem_id']],
+                   solution=record['solution'], status=record['status'],
+                   restored_at=restored_at)
+        for record in records
+    ]
+    results = [
+        Result(submission=submission, **record['result'])
+        for submission, record in zip(submissions, records)
+        if record['result'] is not None
+    ]
+    with transaction.atomic():
+        Submission.objects.bulk_create(submissions)
+        # bulk_create sets auto_now_add fields to the current time
+        for submission, record in zip(submissions, records):
+            submission.created_at = datetime.fromisoformat(
+                record['created_at'])
+        Submission.objects.bulk_update(submissions, ['created_at'])
+        Result.objects.bulk_create(results)
+        archive.restored_at = restored_at
+        archive.save(update_fields=['restored_at'])
+    return len(submissions)
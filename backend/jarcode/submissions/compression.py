@@ -0,0 +1,91 @@
+import threading
+import time
+import zstandard
+from .consts import (
+    COMPRESSION_LEVEL,
+    COMPRESSION_DICTIONARY_CACHE_TIMEOUT,
+    COMPRESSION_DICTIONARY_ID_OFFSET,
+)
+
+# Never valid UTF-8 (0xFD), so frames cannot be confused with raw text
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# dictionary id -> ZstdCompressionDict, local to the process
+_dictionaries = {}
+# (kind, language) -> (expiry, ZstdCompressionDict or None)
+_latest_dictionaries = {}
+_dictionaries_lock = threading.Lock()
+
+
+def clear_dictionary_cache() -> None:
+    with _dictionaries_lock:
+        _dictionaries.clear()
+        _latest_dictionaries.clear()
+
+
+def load_dictionary(data: bytes) -> zstandard.ZstdCompressionDict:
+    dictionary = zstandard.ZstdCompressionDict(bytes(data))
+    dictionary.precompute_compress(level=COMPRESSION_LEVEL)
+    return dictionary
+
+
+def get_dictionary(dict_id: int) -> zstandard.ZstdCompressionDict:
+    with _dictionaries_lock:
+        dictionary = _dictionaries.get(dict_id)
+    if dictionary is None:
+        from .models import CompressionDictionary
+        data = (CompressionDictionary.objects.values_list('data', flat=True)
+                .get(id=dict_id - COMPRESSION_DICTIONARY_ID_OFFSET))
+        dictionary = load_dictionary(data)
+        with _dictionaries_lock:
+            _dictionaries[dict_id] = dictionary
+    return dictionary
+
+
+def get_latest_dictionary(kind: str, language: str):
+    """
+    Returns the newest dictionary trained for `kind` and `language`, or
+    None if there is none yet.
+    """
+    key = (kind, language)
+    with _dictionaries_lock:
+        cached = _latest_dictionaries.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    from .models import CompressionDictionary
+    latest = (CompressionDictionary.objects
+              .filter(kind=kind, language=language)
+              .order_by('-id').values_list('id', flat=True).first())
+    dictionary = (get_dictionary(COMPRESSION_DICTIONARY_ID_OFFSET + latest)
+                  if latest is not None else None)
+    with _dictionaries_lock:
+        _latest_dictionaries[key] = (
+            time.monotonic() + COMPRESSION_DICTIONARY_CACHE_TIMEOUT,
+            dictionary)
+    return dictionary
+
+
+def compress(text: str, dictionary=None) -> bytes:
+    """
+    Returns a zstd frame of `text`, or its UTF-8 encoding if the frame
+    would not be smaller, which is common for short texts.
+    """
+    raw = text.encode()
+    compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL,
+                                          dict_data=dictionary)
+    compressed = compressor.compress(raw)
+    return compressed if len(compressed) < len(raw) else raw
+
+
+def decompress(data: bytes) -> str:
+    """
+    Frames name the dictionary they were compressed with, so rows written
+    before a dictionary was retrained stay readable.
+    """
+    if not data.startswith(ZSTD_MAGIC):
+        return data.decode()
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    dictionary = get_dictionary(dict_id) if dict_id else None
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return decompressor.decompress(data).decode()
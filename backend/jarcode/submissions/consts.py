@@ -0,0 +1,27 @@
+LANGUAGE_TIMEOUTS = {
+    'PYTHON': 30.0,
+    'CPP': 30.0,
+    'JAVA': 30.0,
+}
+
+JUDGE_CONFIG_CACHE_MAX_SIZE = 256
+# Columns judge jobs load on demand, see judge_config.get_judge_config
+JUDGE_DEFERRED_PROBLEM_FIELDS = ('problem__test_code',
+                                 'problem__starting_code',
+                                 'problem__search_vector')
+
+COMPRESSION_LEVEL = 9
+COMPRESSION_BATCH_SIZE = 500
+COMPRESSION_DICTIONARY_SIZE = 16 * 1024                  # 16 KB
+COMPRESSION_DICTIONARY_SAMPLES = 5000
+COMPRESSION_DICTIONARY_MIN_SAMPLES = 100
+# Newly trained dictionaries are picked up by other processes after this
+COMPRESSION_DICTIONARY_CACHE_TIMEOUT = 60*5              # 5 MINUTES
+# zstd reserves lower dictionary ids for public dictionaries
+COMPRESSION_DICTIONARY_ID_OFFSET = 2**15
+
+# Retention policy, see submissions.archive
+SUBMISSION_RETENTION_DAYS = 180
+SUBMISSION_RETENTION_KEEP_LAST = 10
+SUBMISSION_ARCHIVE_BATCH_SIZE = 5000
+SUBMISSION_ARCHIVE_STORAGE = 'submission_archives'
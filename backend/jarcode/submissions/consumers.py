@@ -24,3 +24,8 @@ class SubmissionConsumer(JsonWebsocketConsumer):
         data = event.get('data')
         if data:
             self.send_json(content=data)
+
+    def submission_ai_chunk(self, event: dict):
+        data = event.get('data')
+        if data:
+            self.send_json(content={'event': 'ai_chunk', **data})
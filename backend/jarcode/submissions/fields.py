@@ -0,0 +1,42 @@
+from django.db import models
+from .compression import compress, decompress, get_latest_dictionary
+
+
+class CompressedTextField(models.TextField):
+    """
+    Text stored as a zstd frame in a bytea column, read back as str, so
+    models, forms and serializers keep handling plain text. Saved values
+    are compressed with the newest dictionary trained for
+    `dictionary_kind` and the language returned by the instance's
+    `get_compression_language()`. Compressed values cannot be filtered on.
+    """
+
+    def __init__(self, *args, dictionary_kind, **kwargs):
+        self.dictionary_kind = dictionary_kind
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['dictionary_kind'] = self.dictionary_kind
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return models.BinaryField().db_type(connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress(bytes(value))
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if value is None:
+            return value
+        dictionary = get_latest_dictionary(
+            self.dictionary_kind, model_instance.get_compression_language())
+        return compress(value, dictionary)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return value
+        return compress(self.to_python(value))
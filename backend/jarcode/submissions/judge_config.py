@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from problems.models import Problem
+from .consts import LANGUAGE_TIMEOUTS, JUDGE_CONFIG_CACHE_MAX_SIZE
+
+
+@dataclass(frozen=True)
+class JudgeConfig:
+    test_code: str
+    language: Problem.Language
+    timeout: float
+
+
+# (problem id, version) -> JudgeConfig, local to the process
+_judge_configs = OrderedDict()
+_judge_configs_lock = threading.Lock()
+
+
+def clear_judge_config_cache() -> None:
+    with _judge_configs_lock:
+        _judge_configs.clear()
+
+
+def get_judge_config(problem: Problem) -> JudgeConfig:
+    """
+    Returns what judging a solution of `problem` needs, from a per-process
+    LRU cache keyed by the problem version. Saving a problem bumps its
+    version, so configs of edited problems are never served again and
+    age out of the cache.
+    """
+    key = (problem.id, problem.version)
+    with _judge_configs_lock:
+        config = _judge_configs.get(key)
+        if config is not None:
+            _judge_configs.move_to_end(key)
+            return config
+
+    row = (Problem.objects.filter(id=problem.id)
+           .values('version', 'language', 'test_code').get())
+    config = JudgeConfig(test_code=row['test_code'],
+                         language=row['language'],
+                         timeout=LANGUAGE_TIMEOUTS[row['language']])
+    # Stored under the version read, which is newer if the problem was
+    # edited after the submission was loaded
+    with _judge_configs_lock:
+        _judge_configs[(problem.id, row['version'])] = config
+        while len(_judge_configs) > JUDGE_CONFIG_CACHE_MAX_SIZE:
+            _judge_configs.popitem(last=False)
+    return config
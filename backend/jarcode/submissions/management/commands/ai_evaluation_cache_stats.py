@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from ai_evaluator.cache import get_ai_evaluation_metrics
+from problems.models import Problem
+
+
+class Command(BaseCommand):
+    help = 'Shows AI evaluation cache hit rate and cost saved per problem.'
+
+    def handle(self, *args, **options):
+        for problem_id, title in Problem.objects.values_list('id', 'title'):
+            metrics = get_ai_evaluation_metrics(problem_id)
+            if not metrics['hits'] + metrics['misses']:
+                continue
+            self.stdout.write(
+                f"{problem_id} {title}: "
+                f"hit rate {metrics['hit_rate']:.1%} "
+                f"({metrics['hits']}/{metrics['hits'] + metrics['misses']}), "
+                f"saved {metrics['saved_input_tokens']} input and "
+                f"{metrics['saved_output_tokens']} output tokens "
+                f"(~${metrics['cost_saved_usd']:.4f})")
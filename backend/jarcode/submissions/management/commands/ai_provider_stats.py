@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from ai_evaluator.circuit_breaker import CircuitBreaker
+from ai_evaluator.fallback_evaluator import get_providers
+
+
+class Command(BaseCommand):
+    help = 'Shows circuit breaker state and counters of AI providers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Close the circuits of all providers.')
+
+    def handle(self, *args, **options):
+        for provider in get_providers():
+            breaker = CircuitBreaker(provider.__name__)
+            if options['reset']:
+                breaker.reset()
+            metrics = breaker.get_metrics()
+            self.stdout.write(
+                f"{provider.__name__}: {metrics['state']}, "
+                f"{metrics['successes']} successes, "
+                f"{metrics['total_failures']} failures "
+                f"({metrics['failures']} consecutive), "
+                f"{metrics['rejected']} rejected, "
+                f"{metrics['trips']} trips")
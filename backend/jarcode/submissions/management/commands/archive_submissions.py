@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from submissions.archive import archive_submissions, get_archivable_submissions
+from submissions.consts import (
+    SUBMISSION_RETENTION_DAYS,
+    SUBMISSION_RETENTION_KEEP_LAST,
+)
+
+
+class Command(BaseCommand):
+    help = ('Moves old submissions into compressed archives, keeping the '
+            'best and the last ones of each user and problem.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=SUBMISSION_RETENTION_DAYS)
+        parser.add_argument('--keep-last', type=int,
+                            default=SUBMISSION_RETENTION_KEEP_LAST)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the submissions to archive.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        if options['dry_run']:
+            count = get_archivable_submissions(
+                cutoff, options['keep_last']).count()
+            self.stdout.write(f'{count} submissions would be archived.')
+            return
+
+        archives = archive_submissions(cutoff, options['keep_last'])
+        count = sum(archive.submission_count for archive in archives)
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {count} submissions into {len(archives)} archives.'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from submissions.models import Submission, Result, UserSolvedProblem
+
+
+class Command(BaseCommand):
+    help = 'Populates UserSolvedProblem from already passed submissions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        solved_pairs = (
+            Submission.objects
+            .filter(result__outcome=Result.Outcome.PASSED)
+            .values_list('author_id', 'problem_id')
+            .order_by()
+            .distinct()
+        )
+
+        batch = []
+        created = 0
+        for author_id, problem_id in solved_pairs.iterator(
+                chunk_size=batch_size):
+            batch.append(UserSolvedProblem(user_id=author_id,
+                                           problem_id=problem_id))
+            if len(batch) >= batch_size:
+                created += self._flush(batch)
+                batch = []
+
+        if batch:
+            created += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {created} solved problem entries.'))
+
+    @staticmethod
+    def _flush(batch) -> int:
+        UserSolvedProblem.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
@@ -0,0 +1,89 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from ai_evaluator.consts import AI_BATCH_SIZE
+from ai_evaluator.gemini_client import GeminiClient
+from ai_evaluator.gemini_evaluator import GeminiEvaluator
+from ai_evaluator.stub_server import GeminiStubServer
+from ai_evaluator.submission_dto import SubmissionDto
+from problems.models import Problem
+from submissions.models import Result
+
+
+class Command(BaseCommand):
+    help = ('Compares AI evaluation throughput of per submission requests '
+            'with batch requests, against a local Gemini stub answering '
+            'with a fixed latency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=40)
+        parser.add_argument('--latency', type=float, default=1.0,
+                            help='Seconds the stub takes to answer.')
+
+    def handle(self, *args, **options):
+        problem = {
+            'problem_title': 'Two sum',
+            'problem_description': (
+                '<p>Return indices of the two numbers adding up to the '
+                '<b>target</b>.</p>') * 10,
+            'problem_language': Problem.Language.PYTHON,
+            'test_code': '\n'.join(
+                f'def test_{number}():\n'
+                f'    assert two_sum([{number}, 1], {number + 1}) == [0, 1]'
+                for number in range(30)),
+        }
+        submissions = [
+            SubmissionDto(
+                solution_code=(f'def two_sum(nums, target):\n'
+                               f'    seen = {{}}  # {number}\n'
+                               f'    for i, n in enumerate(nums):\n'
+                               f'        if target - n in seen:\n'
+                               f'            return [seen[target - n], i]\n'
+                               f'        seen[n] = i\n'),
+                outcome=Result.Outcome.PASSED,
+                output='30 passed in 0.05s')
+            for number in range(options['submissions'])
+        ]
+
+        stub = GeminiStubServer(delay=options['latency']).start()
+        try:
+            with override_settings(GEMINI_API_KEY='benchmark',
+                                   GEMINI_BASE_URL=stub.url):
+                GeminiClient.reset_instance()
+                per_item = self._measure(
+                    stub, lambda: [GeminiEvaluator.get_evaluation(
+                        **problem,
+                        solution_code=submission.solution_code,
+                        outcome=submission.outcome,
+                        output=submission.output)
+                        for submission in submissions])
+                batches = [submissions[start:start + AI_BATCH_SIZE]
+                           for start in range(0, len(submissions),
+                                              AI_BATCH_SIZE)]
+                batched = self._measure(
+                    stub, lambda: [
+                        GeminiEvaluator.get_evaluations(**problem,
+                                                        submissions=batch)
+                        for batch in batches])
+                GeminiClient.reset_instance()
+        finally:
+            stub.stop()
+
+        for label, (elapsed, requests, size) in (('per submission', per_item),
+                                                 ('batched', batched)):
+            self.stdout.write(
+                f'{label}: {len(submissions) / elapsed:.2f} submissions/s, '
+                f'{requests} requests, {size} prompt chars')
+        self.stdout.write(self.style.SUCCESS(
+            f'Batches of {AI_BATCH_SIZE} evaluated submissions '
+            f'{per_item[0] / batched[0]:.1f}x faster with '
+            f'{1 - batched[2] / per_item[2]:.0%} less prompt text.'))
+
+    @staticmethod
+    def _measure(stub: GeminiStubServer, evaluate) -> tuple[float, int, int]:
+        stub.requests.clear()
+        start = time.perf_counter()
+        evaluate()
+        elapsed = time.perf_counter() - start
+        size = sum(len(str(request['body'])) for request in stub.requests)
+        return elapsed, len(stub.requests), size
@@ -0,0 +1,69 @@
+import json
+from django.core.management.base import BaseCommand
+from ai_evaluator.consts import CHARS_PER_TOKEN
+from ai_evaluator.gemini_evaluator import GeminiEvaluator
+from ai_evaluator.prompt import build_prompt
+from submissions.models import Submission
+
+
+class Command(BaseCommand):
+    help = ('Compares the size of full AI evaluation prompts with budgeted '
+            'ones on the latest evaluated submissions.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=200)
+
+    def handle(self, *args, **options):
+        submissions = (Submission.objects
+                       .filter(result__isnull=False)
+                       .select_related('problem', 'result')
+                       .order_by('-id')[:options['submissions']])
+
+        full_size = budgeted_size = cached_size = 0
+        problem_versions = set()
+        for submission in submissions:
+            problem, result = submission.problem, submission.result
+            full_size += len(GeminiEvaluator.SYSTEM_INSTRUCTION) + len(
+                json.dumps({
+                    'problem_title': problem.title,
+                    'problem_description': problem.description,
+                    'problem_language': problem.language,
+                    'solution_code': submission.solution,
+                    'test_code': problem.test_code,
+                    'outcome': result.outcome,
+                    'output': result.output,
+                }))
+            prompt = build_prompt(
+                instruction=GeminiEvaluator.SYSTEM_INSTRUCTION,
+                problem_title=problem.title,
+                problem_description=problem.description,
+                problem_language=problem.language,
+                solution_code=submission.solution,
+                test_code=problem.test_code,
+                outcome=result.outcome,
+                output=result.output,
+            )
+            budgeted_size += prompt.size
+            # Once cached, the problem context is only paid for once
+            cached_size += len(prompt.submission)
+            if (problem.id, problem.version) not in problem_versions:
+                problem_versions.add((problem.id, problem.version))
+                cached_size += (len(prompt.system_instruction)
+                                + len(prompt.context))
+
+        count = len(submissions)
+        if not count:
+            self.stdout.write('No evaluated submissions to measure.')
+            return
+
+        for label, size in (('full prompt', full_size),
+                            ('budgeted prompt', budgeted_size),
+                            ('budgeted, cached context', cached_size)):
+            self.stdout.write(
+                f'{label}: {size // count} chars, '
+                f'~{size // count // CHARS_PER_TOKEN} tokens per submission')
+        self.stdout.write(self.style.SUCCESS(
+            f'Budgeting cut prompts by {1 - budgeted_size / full_size:.1%}, '
+            f'{1 - cached_size / full_size:.1%} with the cached context, '
+            f'over {count} submissions of {len(problem_versions)} '
+            f'problem versions.'))
@@ -0,0 +1,36 @@
+import time
+import psycopg
+from django.core.management.base import BaseCommand
+from django.db import connection
+from psycopg_pool import ConnectionPool
+
+
+class Command(BaseCommand):
+    help = ('Compares running a query on a new database connection with '
+            'running it on a pooled one.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200)
+
+    def handle(self, *args, **options):
+        params = connection.get_connection_params()
+        queries = options['queries']
+
+        direct = self._measure(lambda: psycopg.connect(**params), queries)
+        with ConnectionPool(kwargs=params, min_size=1, max_size=1) as pool:
+            pool.wait()
+            pooled = self._measure(pool.connection, queries)
+
+        self.stdout.write(f'new connection: {direct * 1000:.2f} ms/query')
+        self.stdout.write(f'pooled connection: {pooled * 1000:.2f} ms/query')
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {(direct - pooled) * 1000:.2f} ms of connection setup '
+            f'per query.'))
+
+    @staticmethod
+    def _measure(get_connection, queries) -> float:
+        start = time.perf_counter()
+        for _ in range(queries):
+            with get_connection() as conn:
+                conn.execute('SELECT 1')
+        return (time.perf_counter() - start) / queries
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from courses.models import Chapter
+from submissions.models import Submission
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Compares bytes read from Postgres and sent to the client by '
+            'list endpoints with and without a sparse fieldset.')
+
+    def handle(self, *args, **options):
+        scenarios = []
+        busiest = (Submission.objects.values('author', 'problem')
+                   .annotate(count=Count('id')).order_by('-count').first())
+        if busiest:
+            scenarios.append((
+                'submissions', busiest['author'],
+                reverse('problem-submissions-list',
+                        kwargs={'problem_pk': busiest['problem']}),
+                'id,status,created_at,problem,result.outcome'))
+        chapter = (Chapter.objects.annotate(count=Count('lessons'))
+                   .select_related('course').order_by('-count').first())
+        if chapter:
+            scenarios.append((
+                'lessons', chapter.course.owner_id,
+                reverse('chapter-lessons-list',
+                        kwargs={'course_pk': chapter.course_id,
+                                'chapter_pk': chapter.id}),
+                'id,title,position,reading_time'))
+        if not scenarios:
+            self.stdout.write('No submissions or lessons to measure.')
+            return
+
+        client = APIClient()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, user_id, url, fields in scenarios:
+                client.force_authenticate(user=User.objects.get(id=user_id))
+                full = self._measure(client, url, {})
+                sparse = self._measure(client, url, {'fields': fields})
+                for label, (db_bytes, wire_bytes) in (('full', full),
+                                                      ('sparse', sparse)):
+                    self.stdout.write(
+                        f'{name} ({label}): {db_bytes} bytes from Postgres, '
+                        f'{wire_bytes} bytes over the wire')
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name}: ?fields={fields} read '
+                    f'{1 - sparse[0] / full[0]:.0%} less from Postgres and '
+                    f'sent {1 - sparse[1] / full[1]:.0%} less.'))
+
+    @staticmethod
+    def _measure(client: APIClient, url: str,
+                 params: dict) -> tuple[int, int]:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        db_bytes = 0
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute(
+                    f"SELECT coalesce(sum(octet_length(q::text)), 0) "
+                    f"FROM ({query['sql']}) q")
+                db_bytes += cursor.fetchone()[0]
+        return db_bytes, len(response.content)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from problems.models import Problem
+from submissions.tasks import rejudge_problem
+
+
+class Command(BaseCommand):
+    help = ('Queues all submissions of a problem for evaluation, e.g. after '
+            'its tests changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('problem_id', type=int)
+
+    def handle(self, *args, **options):
+        problem = Problem.objects.filter(id=options['problem_id']).first()
+        if problem is None:
+            raise CommandError(
+                f"Problem {options['problem_id']} does not exist.")
+
+        rejudge_problem.send(problem_id=problem.id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued re-judging of {problem.problem_sumbissions.count()} '
+            f'submissions of "{problem.title}".'))
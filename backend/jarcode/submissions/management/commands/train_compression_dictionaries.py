@@ -0,0 +1,99 @@
+import zstandard
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from problems.models import Problem
+from submissions.compression import clear_dictionary_cache, compress
+from submissions.models import CompressionDictionary, Submission, Result
+from submissions.consts import (
+    COMPRESSION_LEVEL,
+    COMPRESSION_BATCH_SIZE,
+    COMPRESSION_DICTIONARY_SIZE,
+    COMPRESSION_DICTIONARY_SAMPLES,
+    COMPRESSION_DICTIONARY_MIN_SAMPLES,
+)
+
+# kind -> (model, compressed field, lookup of the language)
+COMPRESSED_FIELDS = {
+    CompressionDictionary.Kind.SOLUTION: (Submission, 'solution',
+                                          'problem__language'),
+    CompressionDictionary.Kind.OUTPUT: (Result, 'output',
+                                        'submission__problem__language'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Trains zstd dictionaries for solutions and outputs of each '
+            'language on recent submissions.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int,
+                            default=COMPRESSION_DICTIONARY_SAMPLES)
+        parser.add_argument('--recompress', action='store_true',
+                            help='Rewrite existing rows with the new '
+                                 'dictionaries.')
+
+    def handle(self, *args, **options):
+        for kind, (model, field, language_lookup) in COMPRESSED_FIELDS.items():
+            for language in Problem.Language:
+                rows = (model.objects.filter(**{language_lookup: language})
+                        .order_by('-id'))
+                samples = [text.encode() for text in rows.values_list(
+                    field, flat=True)[:options['samples']] if text]
+                if len(samples) < COMPRESSION_DICTIONARY_MIN_SAMPLES:
+                    self.stdout.write(
+                        f'{kind.label} / {language.label}: skipped, '
+                        f'{len(samples)} samples')
+                    continue
+
+                try:
+                    dictionary = self._train(kind, language, samples)
+                except zstandard.ZstdError as e:
+                    self.stdout.write(self.style.WARNING(
+                        f'{kind.label} / {language.label}: {e}'))
+                    continue
+                self._report(kind, language, samples, dictionary)
+
+                if options['recompress']:
+                    updated = self._recompress(rows, field, dictionary)
+                    self.stdout.write(f'  recompressed {updated} rows')
+
+        clear_dictionary_cache()
+
+    @staticmethod
+    def _train(kind, language, samples) -> zstandard.ZstdCompressionDict:
+        with transaction.atomic():
+            row = CompressionDictionary.objects.create(
+                kind=kind, language=language, data=b'')
+            dictionary = zstandard.train_dictionary(
+                COMPRESSION_DICTIONARY_SIZE, samples, dict_id=row.dict_id,
+                level=COMPRESSION_LEVEL)
+            row.data = dictionary.as_bytes()
+            row.save(update_fields=['data'])
+        return dictionary
+
+    def _report(self, kind, language, samples, dictionary) -> None:
+        raw = sum(len(sample) for sample in samples)
+        plain = sum(len(compress(sample.decode())) for sample in samples)
+        trained = sum(len(compress(sample.decode(), dictionary))
+                      for sample in samples)
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind.label} / {language.label}: {len(samples)} samples, '
+            f'{raw} bytes, {plain} compressed ({raw / plain:.1f}x), '
+            f'{trained} with the dictionary ({raw / trained:.1f}x)'))
+
+    @staticmethod
+    def _recompress(rows, field, dictionary) -> int:
+        model = rows.model
+        updated = 0
+        batch = []
+        for instance in rows.only('id', field).iterator(
+                chunk_size=COMPRESSION_BATCH_SIZE):
+            setattr(instance, field,
+                    compress(getattr(instance, field), dictionary))
+            batch.append(instance)
+            if len(batch) >= COMPRESSION_BATCH_SIZE:
+                updated += model.objects.bulk_update(batch, [field])
+                batch = []
+        if batch:
+            updated += model.objects.bulk_update(batch, [field])
+        return updated
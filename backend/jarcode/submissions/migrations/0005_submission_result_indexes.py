@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0003_delete_problemreview'),
+        ('submissions', '0004_usersolvedproblem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('outcome', 'PASSED')), fields=['submission'], name='result_passed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['author', 'problem', '-id'], name='submission_author_problem_idx'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2 on 2026-10-19 13:50
+
+from django.db import migrations, models
+import submissions.fields
+from submissions.compression import compress
+from submissions.consts import COMPRESSION_BATCH_SIZE
+
+
+def copy_field(Model, source, target, convert):
+    batch = []
+    for instance in Model.objects.only('id', source).iterator(
+            chunk_size=COMPRESSION_BATCH_SIZE):
+        setattr(instance, target, convert(getattr(instance, source)))
+        batch.append(instance)
+        if len(batch) >= COMPRESSION_BATCH_SIZE:
+            Model.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        Model.objects.bulk_update(batch, [target])
+
+
+def compress_rows(apps, schema_editor):
+    # No dictionaries are trained yet, train_compression_dictionaries
+    # --recompress rewrites the rows with them later
+    copy_field(apps.get_model('submissions', 'Submission'),
+               'solution', 'solution_compressed', compress)
+    copy_field(apps.get_model('submissions', 'Result'),
+               'output', 'output_compressed', compress)
+
+
+def decompress_rows(apps, schema_editor):
+    # Compressed values are read back as text already
+    copy_field(apps.get_model('submissions', 'Submission'),
+               'solution_compressed', 'solution', str)
+    copy_field(apps.get_model('submissions', 'Result'),
+               'output_compressed', 'output', str)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0005_submission_result_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SOLUTION', 'Solution'), ('OUTPUT', 'Output')])),
+                ('language', models.CharField(choices=[('PYTHON', 'Python'), ('CPP', 'C++'), ('JAVA', 'Java')])),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='solution_compressed',
+            field=submissions.fields.CompressedTextField(dictionary_kind='SOLUTION', null=True),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='output_compressed',
+            field=submissions.fields.CompressedTextField(blank=True, dictionary_kind='OUTPUT', null=True),
+        ),
+        # Nullable, so the text columns can be restored when unapplied
+        migrations.AlterField(
+            model_name='submission',
+            name='solution',
+            field=models.TextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='output',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_rows, decompress_rows),
+        migrations.RemoveField(
+            model_name='submission',
+            name='solution',
+        ),
+        migrations.RemoveField(
+            model_name='result',
+            name='output',
+        ),
+        migrations.RenameField(
+            model_name='submission',
+            old_name='solution_compressed',
+            new_name='solution',
+        ),
+        migrations.RenameField(
+            model_name='result',
+            old_name='output_compressed',
+            new_name='output',
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='solution',
+            field=submissions.fields.CompressedTextField(dictionary_kind='SOLUTION'),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='output',
+            field=submissions.fields.CompressedTextField(blank=True, dictionary_kind='OUTPUT'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 13:52
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0006_rendered_content'),
+        ('submissions', '0006_compressed_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField()),
+                ('submission_count', models.PositiveIntegerField()),
+                ('first_submitted_at', models.DateTimeField()),
+                ('last_submitted_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('restored_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='submission_created_at_brin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0007_submission_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='restored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,29 @@
 from django.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from users.models import User
 from problems.models import Problem
+from .fields import CompressedTextField
+from .consts import COMPRESSION_DICTIONARY_ID_OFFSET
+
+
+class CompressionDictionary(models.Model):
+    """
+    zstd dictionary trained on samples of one kind of submission text in
+    one language, see the train_compression_dictionaries command. Rows
+    are never changed, compressed values reference them by `dict_id`.
+    """
+    class Kind(models.TextChoices):
+        SOLUTION = 'SOLUTION', 'Solution'
+        OUTPUT = 'OUTPUT', 'Output'
+
+    kind = models.CharField(choices=Kind.choices)
+    language = models.CharField(choices=Problem.Language.choices)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def dict_id(self) -> int:
+        return COMPRESSION_DICTIONARY_ID_OFFSET + self.id
 
 
 class Submission(models.Model):
@@ -15,9 +38,26 @@ class Submission(models.Model):
     problem = models.ForeignKey(Problem,
                                 related_name='problem_sumbissions',
                                 on_delete=models.CASCADE)
-    solution = models.TextField()
+    solution = CompressedTextField(
+        dictionary_kind=CompressionDictionary.Kind.SOLUTION)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(choices=Status.choices)
+    # Set when restored from an archive, such submissions aren't archived
+    # again
+    restored_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'problem', '-id'],
+                         name='submission_author_problem_idx'),
+            # Rows are appended in time order, so a few block ranges
+            # answer the date range filters of the admin date hierarchy
+            BrinIndex(fields=['created_at'],
+                      name='submission_created_at_brin'),
+        ]
+
+    def get_compression_language(self) -> str:
+        return self.problem.language
 
 
 class Result(models.Model):
@@ -33,6 +73,49 @@ class Result(models.Model):
         related_name='result',
         on_delete=models.CASCADE
     )
-    output = models.TextField(blank=True)
+    output = CompressedTextField(
+        blank=True, dictionary_kind=CompressionDictionary.Kind.OUTPUT)
     outcome = models.CharField(choices=Outcome.choices)
     ai_evaluation = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['submission'],
+                         condition=models.Q(outcome='PASSED'),
+                         name='result_passed_idx'),
+        ]
+
+    def get_compression_language(self) -> str:
+        return self.submission.problem.language
+
+
+class UserSolvedProblem(models.Model):
+    user = models.ForeignKey(User,
+                             related_name='solved_problems',
+                             on_delete=models.CASCADE)
+    problem = models.ForeignKey(Problem,
+                                related_name='solved_by',
+                                on_delete=models.CASCADE)
+    solved_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['user', 'problem']]
+
+
+class SubmissionArchive(models.Model):
+    """
+    zstd-compressed JSON lines file in the `submission_archives` storage,
+    holding submissions and their results moved out of the database by
+    the retention policy, see submissions.archive.
+    """
+    file_name = models.CharField()
+    submission_count = models.PositiveIntegerField()
+    first_submitted_at = models.DateTimeField()
+    last_submitted_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    restored_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return (f'{self.submission_count} submissions from '
+                f'{self.first_submitted_at:%Y-%m-%d} to '
+                f'{self.last_submitted_at:%Y-%m-%d}')
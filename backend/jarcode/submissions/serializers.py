@@ -1,18 +1,21 @@
 from rest_framework import serializers
 from .models import Submission, Result
+from jarcode.mixins import SparseFieldsetSerializerMixin
 
 
-class ResultSerializer(serializers.ModelSerializer):
+class ResultSerializer(SparseFieldsetSerializerMixin,
+                       serializers.ModelSerializer):
     class Meta:
         model = Result
         fields = ['id', 'output', 'outcome', 'ai_evaluation']
 
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(SparseFieldsetSerializerMixin,
+                           serializers.ModelSerializer):
     problem = serializers.PrimaryKeyRelatedField(read_only=True)
     result = ResultSerializer(read_only=True, default=None)
 
     class Meta:
         model = Submission
-        fields = '__all__'
+        exclude = ['restored_at']
         read_only_fields = ['author', 'created_at', 'status']
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Result, UserSolvedProblem
+
+
+@receiver(post_save, sender=Result)
+def update_solved_problem(sender, instance, created, **kwargs):
+    submission = instance.submission
+    author_problem = {'user_id': submission.author_id,
+                      'problem_id': submission.problem_id}
+
+    if instance.outcome == Result.Outcome.PASSED:
+        UserSolvedProblem.objects.get_or_create(**author_problem)
+        return
+
+    # A re-judged result may have been the only passing one
+    if not created and not Result.objects.filter(
+            submission__author_id=submission.author_id,
+            submission__problem_id=submission.problem_id,
+            outcome=Result.Outcome.PASSED).exists():
+        UserSolvedProblem.objects.filter(**author_problem).delete()
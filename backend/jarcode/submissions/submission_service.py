@@ -3,9 +3,13 @@ from judge.cpp_judge import CppJudge
 from judge.java_judge import JavaJudge
 from judge.judge import Judge
 from judge.result_dto import ResultDto
-from ai_evaluator.gemini_evaluator import GeminiEvaluator
+from ai_evaluator.fallback_evaluator import FallbackAiEvaluator
+from ai_evaluator.cache import AiEvaluationCache
+from ai_evaluator.consts import AI_BATCH_SIZE
+from ai_evaluator.submission_dto import SubmissionDto
 from problems.models import Problem
 from .models import Submission, Result
+from .judge_config import JudgeConfig, get_judge_config
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from .serializers import SubmissionSerializer
@@ -18,24 +22,19 @@ class SubmissionService:
         Problem.Language.JAVA: JavaJudge,
     }
 
-    LANGUAGE_TIMEOUT_MAP = {
-        Problem.Language.PYTHON: 30.0,
-        Problem.Language.CPP: 30.0,
-        Problem.Language.JAVA: 30.0,
-    }
-
     def __init__(self, submission: Submission) -> None:
         self.submission: Submission = submission
         self.submission_author = self.submission.author
         self.problem: Problem = self.submission.problem
-        self.judge_cls: Judge = self.LANGUAGE_TO_JUDGE_MAP[self.problem.language]
-        self.timeout: float = self.LANGUAGE_TIMEOUT_MAP[self.problem.language]
-        self.AI_EVALUATOR = GeminiEvaluator
+        self.judge_config: JudgeConfig = get_judge_config(self.problem)
+        self.judge_cls: Judge = self.LANGUAGE_TO_JUDGE_MAP[self.judge_config.language]
+        self.timeout: float = self.judge_config.timeout
+        self.AI_EVALUATOR = FallbackAiEvaluator()
 
     def _get_results(self) -> ResultDto:
         return self.judge_cls.run_solution(
             solution_code=self.submission.solution,
-            test_code=self.problem.test_code,
+            test_code=self.judge_config.test_code,
             timeout=self.timeout
         )
 
@@ -60,20 +59,112 @@ class SubmissionService:
              'data': payload}
         )
 
-    def evaluate(self) -> None:
-        results = self._get_results()
+    def _notify_ai_chunk(self, offset: int, chunk: str):
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            f"user_{self.submission_author.id}",
+            {'type': 'submission.ai_chunk',
+             'data': {'submission_id': self.submission.id,
+                      'offset': offset,
+                      'chunk': chunk}}
+        )
+
+    def _get_ai_evaluation(self, results: ResultDto) -> str:
+        ai_cache = AiEvaluationCache(problem=self.problem,
+                                     test_code=self.judge_config.test_code)
+        ai_evaluation = ai_cache.get(solution_code=self.submission.solution,
+                                     outcome=results.outcome,
+                                     output=results.output)
+        if ai_evaluation is not None:
+            return ai_evaluation
+
         try:
-            ai_evaluation = self.AI_EVALUATOR.get_evaluation(
+            ai_evaluation = self.AI_EVALUATOR.get_streamed_evaluation(
+                on_chunk=self._notify_ai_chunk,
                 problem_title=self.problem.title,
                 problem_description=self.problem.description,
                 problem_language=self.problem.language,
                 solution_code=self.submission.solution,
-                test_code=self.problem.test_code,
+                test_code=self.judge_config.test_code,
                 outcome=results.outcome,
                 output=results.output
             )
         except Exception as e:
-            ai_evaluation = str(e)
+            return str(e)
+
+        if (self.AI_EVALUATOR.served_by is None
+                or not self.AI_EVALUATOR.served_by.CACHEABLE):
+            return ai_evaluation
+        ai_cache.set(solution_code=self.submission.solution,
+                     outcome=results.outcome,
+                     evaluation=ai_evaluation)
+        return ai_evaluation
+
+    def _save_results(self, results: ResultDto, ai_evaluation: str) -> None:
         self._create_results_db(results=results, ai_evaluation=ai_evaluation)
         submission_serialized = SubmissionSerializer(self.submission).data
         self._notify_consumers(payload=submission_serialized)
+
+    def evaluate(self) -> None:
+        results = self._get_results()
+        ai_evaluation = self._get_ai_evaluation(results=results)
+        self._save_results(results=results, ai_evaluation=ai_evaluation)
+
+
+class BatchSubmissionService:
+    """
+    Re-evaluates submissions of one problem, e.g. after its tests changed.
+    Solutions are judged one by one, while AI evaluations missing from the
+    cache are requested for AI_BATCH_SIZE submissions at a time.
+    """
+
+    def __init__(self, problem: Problem,
+                 submissions: list[Submission]) -> None:
+        self.problem = problem
+        self.services = [SubmissionService(submission=submission)
+                         for submission in submissions]
+        self.judge_config = get_judge_config(problem)
+        self.AI_EVALUATOR = FallbackAiEvaluator()
+
+    def _get_ai_evaluations(self, results: list[ResultDto]) -> list[str]:
+        ai_cache = AiEvaluationCache(problem=self.problem,
+                                     test_code=self.judge_config.test_code)
+        solutions = [service.submission.solution for service in self.services]
+        ai_evaluations = [
+            ai_cache.get(solution_code=solution,
+                         outcome=solution_results.outcome,
+                         output=solution_results.output)
+            for solution, solution_results in zip(solutions, results)
+        ]
+        missing = [number for number, ai_evaluation
+                   in enumerate(ai_evaluations) if ai_evaluation is None]
+
+        for start in range(0, len(missing), AI_BATCH_SIZE):
+            batch = missing[start:start + AI_BATCH_SIZE]
+            batch_evaluations = self.AI_EVALUATOR.get_evaluations(
+                problem_title=self.problem.title,
+                problem_description=self.problem.description,
+                problem_language=self.problem.language,
+                test_code=self.judge_config.test_code,
+                submissions=[SubmissionDto(solution_code=solutions[number],
+                                           outcome=results[number].outcome,
+                                           output=results[number].output)
+                             for number in batch]
+            )
+            served_by = self.AI_EVALUATOR.batch_served_by
+            for number, ai_evaluation, provider in zip(
+                    batch, batch_evaluations, served_by):
+                ai_evaluations[number] = ai_evaluation
+                if provider is not None and provider.CACHEABLE:
+                    ai_cache.set(solution_code=solutions[number],
+                                 outcome=results[number].outcome,
+                                 evaluation=ai_evaluation)
+        return ai_evaluations
+
+    def evaluate(self) -> None:
+        results = [service._get_results() for service in self.services]
+        ai_evaluations = self._get_ai_evaluations(results=results)
+        for service, service_results, ai_evaluation in zip(
+                self.services, results, ai_evaluations):
+            service._save_results(results=service_results,
+                                  ai_evaluation=ai_evaluation)
@@ -1,15 +1,18 @@
 from dramatiq import actor
 from .models import Submission
-from .submission_service import SubmissionService
+from .submission_service import SubmissionService, BatchSubmissionService
 from .serializers import SubmissionSerializer
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from ai_evaluator.consts import AI_BATCH_SIZE
+from .consts import JUDGE_DEFERRED_PROBLEM_FIELDS
 
 
 @actor
 def evaluate_submission(submission_id):
     submission = Submission.objects.select_related(
-        'author', 'problem').filter(id=submission_id).first()
+        'author', 'problem').defer(*JUDGE_DEFERRED_PROBLEM_FIELDS).filter(
+        id=submission_id).first()
     submission.status = Submission.Status.EVALUATING
 
     submission_serialized = SubmissionSerializer(submission).data
@@ -22,3 +25,27 @@ def evaluate_submission(submission_id):
 
     service = SubmissionService(submission=submission)
     service.evaluate()
+
+
+@actor
+def rejudge_problem(problem_id):
+    submission_ids = list(
+        Submission.objects.filter(problem_id=problem_id)
+        .order_by('id').values_list('id', flat=True))
+    for start in range(0, len(submission_ids), AI_BATCH_SIZE):
+        evaluate_submissions_batch.send(
+            problem_id=problem_id,
+            submission_ids=submission_ids[start:start + AI_BATCH_SIZE])
+
+
+@actor
+def evaluate_submissions_batch(problem_id, submission_ids):
+    submissions = list(Submission.objects.select_related(
+        'author', 'problem').defer(*JUDGE_DEFERRED_PROBLEM_FIELDS).filter(
+        problem_id=problem_id, id__in=submission_ids).order_by('id'))
+    if not submissions:
+        return
+
+    service = BatchSubmissionService(problem=submissions[0].problem,
+                                     submissions=submissions)
+    service.evaluate()
@@ -7,14 +7,22 @@ from rest_framework.generics import get_object_or_404
 from problems.models import Problem
 from .tasks import evaluate_submission
 from .pagination import SubmissionCursorPagination
+from jarcode.mixins import ReplicaReadMixin, SparseFieldsetMixin
 
 
-class SubmissionViewSet(mixins.CreateModelMixin,
+class SubmissionViewSet(ReplicaReadMixin,
+                        SparseFieldsetMixin,
+                        mixins.CreateModelMixin,
                         viewsets.ReadOnlyModelViewSet,):
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [SessionAuthentication]
     pagination_class = SubmissionCursorPagination
+    deferrable_fields = {
+        'solution': 'solution',
+        'result.output': 'result__output',
+        'result.ai_evaluation': 'result__ai_evaluation',
+    }
 
     def get_throttles(self):
         if self.action == 'create':
@@ -25,16 +33,19 @@ class SubmissionViewSet(mixins.CreateModelMixin,
         return super().get_throttles()
 
     def get_queryset(self):
-        problem = get_object_or_404(Problem, id=self.kwargs['problem_pk'])
-        return (
-            Submission.objects.select_related('problem')
+        problem = get_object_or_404(Problem.objects.only('id'),
+                                    id=self.kwargs['problem_pk'])
+        queryset = (
+            Submission.objects.select_related('result')
             .filter(author=self.request.user, problem=problem)
-            .order_by('-created_at')
+            .order_by('-id')
             .all()
         )
+        return self.defer_unrequested_fields(queryset)
 
     def perform_create(self, serializer):
-        problem = get_object_or_404(Problem, id=self.kwargs['problem_pk'])
+        problem = get_object_or_404(Problem.objects.only('id', 'language'),
+                                    id=self.kwargs['problem_pk'])
 
         submission = serializer.save(
             author=self.request.user,
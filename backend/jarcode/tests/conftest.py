@@ -3,6 +3,10 @@ from unittest.mock import patch
 from rest_framework.test import APIClient
 from dramatiq import get_broker
 from dramatiq.encoder import JSONEncoder
+from django.core.cache import cache
+from users.backends import clear_user_cache
+from submissions.judge_config import clear_judge_config_cache
+from submissions.compression import clear_dictionary_cache
 
 
 @pytest.fixture(autouse=True, scope='session')
@@ -42,3 +46,36 @@ def decode_message():
 @pytest.fixture(autouse=True)
 def set_tmp_media_root(settings, tmp_path):
     settings.MEDIA_ROOT = tmp_path / "media"
+    settings.CHUNKED_UPLOAD_TEMP_DIR = tmp_path / "uploads"
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'submission_archives': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': tmp_path / "archives"},
+        },
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+    clear_user_cache()
+    clear_judge_config_cache()
+    clear_dictionary_cache()
+
+
+@pytest.fixture
+def explain_plan(db):
+    """
+    Returns a callable producing the Postgres plan of a queryset, with
+    sequential scans disabled so small seeded tables still show whether
+    a usable index exists.
+    """
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+    yield lambda queryset: queryset.explain()
+    with connection.cursor() as cursor:
+        cursor.execute('RESET enable_seqscan')
@@ -1,13 +1,21 @@
 import pytest
 import io
+import os
+import time
 from PIL import Image
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
-from courses.models import Course, Chapter, Lesson, LessonImage
+from courses.models import Course, Chapter, Lesson, LessonImage, ChunkedUpload
 from courses.factories import CourseFactory, ChapterFactory, LessonFactory
+from courses.consts import POSITION_GAP, CONTENT_ADDRESSED_GRACE_PERIOD
+from courses.tasks import process_lesson_image, process_course_thumbnail
+from courses.images import build_image_variants
 from users.factories import UserFactory
 from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 
 @pytest.mark.django_db
@@ -232,7 +240,7 @@ def test_create_chapter_owner(api_client):
     assert Chapter.objects.count() == 1
     chapter = Chapter.objects.get()
     assert chapter.course == course
-    assert chapter.position == 1
+    assert chapter.position == POSITION_GAP
 
 
 @pytest.mark.django_db
@@ -263,8 +271,8 @@ def test_chapter_position_auto_increment(api_client):
 
     chapters = Chapter.objects.filter(course=course).order_by('position')
     assert chapters.count() == 2
-    assert chapters[0].position == 1
-    assert chapters[1].position == 2
+    assert chapters[0].position == POSITION_GAP
+    assert chapters[1].position == 2 * POSITION_GAP
 
 
 @pytest.mark.django_db
@@ -302,7 +310,7 @@ def test_create_lesson_owner(api_client):
     assert Lesson.objects.count() == 1
     lesson = Lesson.objects.get()
     assert lesson.chapter == chapter
-    assert lesson.position == 1
+    assert lesson.position == POSITION_GAP
 
 
 @pytest.mark.django_db
@@ -372,8 +380,8 @@ def test_lesson_position_auto_increment(api_client):
 
     lessons = Lesson.objects.filter(chapter=chapter).order_by('position')
     assert lessons.count() == 2
-    assert lessons[0].position == 1
-    assert lessons[1].position == 2
+    assert lessons[0].position == POSITION_GAP
+    assert lessons[1].position == 2 * POSITION_GAP
 
 
 @pytest.mark.django_db
@@ -486,3 +494,805 @@ def test_upload_lesson_image_unauthenticated(api_client):
     response = api_client.post(url, data)
 
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_course_outline(api_client, django_assert_num_queries):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    course = CourseFactory()
+    chapter1 = ChapterFactory(course=course, position=1)
+    chapter2 = ChapterFactory(course=course, position=2)
+    lesson2 = LessonFactory(chapter=chapter1, position=2)
+    lesson1 = LessonFactory(chapter=chapter1, position=1)
+    url = reverse('course-outline', kwargs={'pk': course.pk})
+
+    with django_assert_num_queries(3):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['id'] == course.id
+    chapters = response.data['chapters']
+    assert [c['id'] for c in chapters] == [chapter1.id, chapter2.id]
+    assert [lsn['id'] for lsn in chapters[0]['lessons']] == [lesson1.id,
+                                                              lesson2.id]
+    assert chapters[1]['lessons'] == []
+    assert 'content' not in chapters[0]['lessons'][0]
+
+
+@pytest.mark.django_db
+def test_course_outline_is_cached(api_client, django_assert_num_queries):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    course = CourseFactory()
+    LessonFactory(chapter=ChapterFactory(course=course))
+    url = reverse('course-outline', kwargs={'pk': course.pk})
+    api_client.get(url)
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['chapters']) == 1
+
+
+@pytest.mark.django_db
+def test_course_outline_invalidated_on_lesson_change(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    course = CourseFactory()
+    chapter = ChapterFactory(course=course)
+    lesson = LessonFactory(chapter=chapter, title="Old title")
+    url = reverse('course-outline', kwargs={'pk': course.pk})
+    api_client.get(url)
+
+    lesson.title = "New title"
+    lesson.save()
+    response = api_client.get(url)
+
+    assert response.data['chapters'][0]['lessons'][0]['title'] == "New title"
+
+    lesson.delete()
+    response = api_client.get(url)
+
+    assert response.data['chapters'][0]['lessons'] == []
+
+    chapter.delete()
+    response = api_client.get(url)
+
+    assert response.data['chapters'] == []
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_course_outline_rebuilt_from_primary(api_client, settings):
+    settings.REPLICA_DATABASE = 'replica'
+    user = UserFactory()
+    course = CourseFactory()
+    ChapterFactory(course=course)
+    api_client.force_authenticate(user=user)
+    url = reverse('course-outline', kwargs={'pk': course.pk})
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['chapters']) == 1
+
+
+@pytest.mark.django_db
+def test_course_outline_not_found(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('course-outline', kwargs={'pk': 9999})
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_retrieve_lesson_conditional_request(api_client):
+    user = UserFactory(is_content_creator=True)
+    api_client.force_authenticate(user=user)
+    lesson = LessonFactory(chapter__course__owner=user)
+    url = reverse('chapter-lessons-detail', kwargs={
+        'course_pk': lesson.chapter.course_id,
+        'chapter_pk': lesson.chapter_id,
+        'pk': lesson.pk
+    })
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    etag = response['ETag']
+    assert response.has_header('Last-Modified')
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    api_client.patch(url, {'title': 'Renamed'})
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+    assert response.data['title'] == 'Renamed'
+
+
+@pytest.mark.django_db
+def test_course_version_increments_on_save():
+    course = CourseFactory()
+    assert course.version == 1
+
+    course.title = "New title"
+    course.save()
+
+    assert course.version == 2
+    course.save(update_fields=['title'])
+    course.refresh_from_db()
+    assert course.version == 3
+
+
+@pytest.mark.django_db
+def test_course_version_read_back_only_when_accessed(
+        django_assert_num_queries):
+    course = CourseFactory()
+
+    with django_assert_num_queries(1):
+        course.save(update_fields=['title'])
+    with django_assert_num_queries(1):
+        assert course.version == 2
+
+
+@pytest.mark.django_db
+def test_course_etag_changes_with_owner_name(api_client):
+    user = UserFactory()
+    course = CourseFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('course-detail', kwargs={'pk': course.pk})
+    etag = api_client.get(url)['ETag']
+
+    course.owner.first_name = 'Renamed'
+    course.owner.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['owner']['first_name'] == 'Renamed'
+
+
+@pytest.mark.django_db
+def test_create_lesson_after_sibling_touches_single_row(api_client):
+    user = UserFactory(is_content_creator=True)
+    chapter = ChapterFactory(course__owner=user)
+    first = LessonFactory(chapter=chapter, position=POSITION_GAP)
+    last = LessonFactory(chapter=chapter, position=2 * POSITION_GAP)
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-list', kwargs={
+        'course_pk': chapter.course_id,
+        'chapter_pk': chapter.pk
+    })
+
+    response = api_client.post(url, {"title": "Middle", "content": "c",
+                                     "after": first.id})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    titles = list(Lesson.objects.filter(chapter=chapter).order_by(
+        'position').values_list('title', flat=True))
+    assert titles == [first.title, "Middle", last.title]
+    first.refresh_from_db()
+    last.refresh_from_db()
+    assert (first.version, last.version) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_create_lesson_renumbers_when_gap_exhausted(api_client):
+    user = UserFactory(is_content_creator=True)
+    chapter = ChapterFactory(course__owner=user)
+    first = LessonFactory(chapter=chapter, position=1)
+    LessonFactory(chapter=chapter, position=2)
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-list', kwargs={
+        'course_pk': chapter.course_id,
+        'chapter_pk': chapter.pk
+    })
+
+    api_client.post(url, {"title": "New first", "content": "c",
+                          "after": None}, format='json')
+    response = api_client.post(url, {"title": "New second", "content": "c",
+                                     "after": first.id}, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    titles = list(Lesson.objects.filter(chapter=chapter).values_list(
+        'title', flat=True))
+    assert titles[:3] == ["New first", first.title, "New second"]
+
+
+@pytest.mark.django_db
+def test_reorder_lessons(api_client):
+    user = UserFactory(is_content_creator=True)
+    chapter = ChapterFactory(course__owner=user)
+    lessons = [LessonFactory(chapter=chapter, position=i + 1)
+               for i in range(5)]
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-reorder', kwargs={
+        'course_pk': chapter.course_id,
+        'chapter_pk': chapter.pk
+    })
+    order = [lesson.id for lesson in reversed(lessons)]
+
+    response = api_client.post(url, {'order': order}, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [lsn['id'] for lsn in response.data] == order
+    assert list(Lesson.objects.filter(chapter=chapter).values_list(
+        'id', flat=True)) == order
+
+
+@pytest.mark.django_db
+def test_reorder_lessons_requires_all_lessons(api_client):
+    user = UserFactory(is_content_creator=True)
+    chapter = ChapterFactory(course__owner=user)
+    lesson = LessonFactory(chapter=chapter)
+    other = LessonFactory(chapter=chapter)
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-reorder', kwargs={
+        'course_pk': chapter.course_id,
+        'chapter_pk': chapter.pk
+    })
+
+    response = api_client.post(url, {'order': [lesson.id, lesson.id]},
+                               format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'order' in response.data
+    other.refresh_from_db()
+    assert other.version == 1
+
+
+@pytest.mark.django_db
+def test_reorder_chapters_non_owner(api_client):
+    owner = UserFactory(is_content_creator=True)
+    other_user = UserFactory(is_content_creator=True)
+    course = CourseFactory(owner=owner)
+    chapter = ChapterFactory(course=course)
+    api_client.force_authenticate(user=other_user)
+    url = reverse('course-chapters-reorder', kwargs={'course_pk': course.pk})
+
+    response = api_client.post(url, {'order': [chapter.id]}, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "your own courses" in str(response.data)
+
+
+@pytest.mark.django_db
+def test_reorder_chapters_invalidates_outline(api_client):
+    user = UserFactory(is_content_creator=True)
+    course = CourseFactory(owner=user)
+    first = ChapterFactory(course=course, position=1)
+    second = ChapterFactory(course=course, position=2)
+    api_client.force_authenticate(user=user)
+    outline_url = reverse('course-outline', kwargs={'pk': course.pk})
+    api_client.get(outline_url)
+    url = reverse('course-chapters-reorder', kwargs={'course_pk': course.pk})
+
+    api_client.post(url, {'order': [second.id, first.id]}, format='json')
+    response = api_client.get(outline_url)
+
+    assert [c['id'] for c in response.data['chapters']] == [second.id,
+                                                             first.id]
+
+
+def make_image_file(name="test.jpg", size=(800, 400)):
+    image_file = io.BytesIO()
+    image = Image.new('RGB', size, 'white')
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    image.save(image_file, 'JPEG', exif=exif)
+    image_file.seek(0)
+    return SimpleUploadedFile(name, image_file.read(),
+                              content_type="image/jpeg")
+
+
+@pytest.mark.django_db
+def test_upload_lesson_image_enqueues_processing(api_client, broker,
+                                                 decode_message):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    api_client.force_authenticate(user=user)
+    url = reverse('upload-image')
+
+    response = api_client.post(url, {"lesson": lesson.id,
+                                     "image": make_image_file()},
+                               format='multipart')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    queue = broker.queues.get('default').queue
+    message = decode_message(queue[0])
+    assert message['actor_name'] == 'process_lesson_image'
+    assert message['kwargs']['lesson_image_id'] == LessonImage.objects.get().id
+
+
+@pytest.mark.django_db
+def test_process_lesson_image_generates_variants():
+    lesson = LessonFactory()
+    lesson_image = LessonImage.objects.create(lesson=lesson,
+                                              image=make_image_file())
+    lesson.content = f'<p><img src="http://host{lesson_image.image.url}"></p>'
+    lesson.save()
+
+    process_lesson_image(lesson_image_id=lesson_image.id)
+
+    lesson_image.refresh_from_db()
+    webp = lesson_image.variants['webp']
+    assert sorted(webp, key=int) == ['320', '640', '800']
+    assert 'avif' in lesson_image.variants
+    with Image.open(lesson_image.image.storage.open(webp['320'])) as variant:
+        assert variant.format == 'WEBP'
+        assert variant.size == (320, 160)
+        assert not variant.getexif()
+    lesson.refresh_from_db()
+    assert lesson_image.image.url not in lesson.content
+    assert 'srcset=' in lesson.content
+    assert '800w' in lesson.content
+
+
+@pytest.mark.django_db
+def test_lesson_content_saved_later_uses_image_variants(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    lesson_image = LessonImage.objects.create(lesson=lesson,
+                                              image=make_image_file())
+    process_lesson_image(lesson_image_id=lesson_image.id)
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-detail', kwargs={
+        'course_pk': lesson.chapter.course_id,
+        'chapter_pk': lesson.chapter_id,
+        'pk': lesson.pk,
+    })
+
+    response = api_client.patch(url, {
+        'content': f'<p><img src="http://host{lesson_image.image.url}"></p>'})
+
+    assert response.status_code == status.HTTP_200_OK
+    lesson.refresh_from_db()
+    assert lesson_image.image.url not in lesson.content
+    assert 'srcset=' in lesson.content
+
+
+@pytest.mark.django_db
+def test_process_lesson_image_strips_original_metadata():
+    lesson_image = LessonImage.objects.create(lesson=LessonFactory(),
+                                              image=make_image_file())
+    name = lesson_image.image.name
+    storage = lesson_image.image.storage
+
+    process_lesson_image(lesson_image_id=lesson_image.id)
+    with storage.open(name) as stored_file:
+        stripped = stored_file.read()
+    process_lesson_image(lesson_image_id=lesson_image.id)
+
+    lesson_image.refresh_from_db()
+    assert lesson_image.image.name == name
+    with Image.open(storage.open(name)) as stored:
+        assert stored.format == 'JPEG'
+        assert stored.size == (800, 400)
+        assert not stored.getexif()
+    with storage.open(name) as stored_file:
+        assert stored_file.read() == stripped
+
+
+@pytest.mark.django_db
+def test_process_lesson_image_reuses_identical_variants():
+    lesson = LessonFactory()
+    first = LessonImage.objects.create(lesson=lesson, image=make_image_file())
+    second = LessonImage.objects.create(lesson=lesson,
+                                        image=make_image_file())
+
+    process_lesson_image(lesson_image_id=first.id)
+    process_lesson_image(lesson_image_id=second.id)
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.variants == second.variants
+
+
+@pytest.mark.django_db
+def test_course_thumbnail_variants(api_client, broker):
+    user = UserFactory(is_content_creator=True)
+    course = CourseFactory(owner=user)
+    api_client.force_authenticate(user=user)
+    url = reverse('course-detail', kwargs={'pk': course.pk})
+
+    response = api_client.patch(url, {"thumbnail": make_image_file()},
+                                format='multipart')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['thumbnail_variants'] == {}
+    assert len(broker.queues.get('default').queue) == 1
+
+    process_course_thumbnail(course_id=course.id)
+    response = api_client.get(url)
+
+    assert response.data['thumbnail_variants']['webp']['320'].endswith(
+        '.webp')
+    course.refresh_from_db()
+    with Image.open(course.thumbnail.open('rb')) as thumbnail:
+        assert not thumbnail.getexif()
+
+
+@pytest.mark.django_db
+def test_course_thumbnail_processing_changes_etag(api_client):
+    course = CourseFactory(thumbnail=make_image_file())
+    api_client.force_authenticate(user=UserFactory())
+    url = reverse('course-detail', kwargs={'pk': course.pk})
+    etag = api_client.get(url)['ETag']
+
+    process_course_thumbnail(course_id=course.id)
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+    assert response.data['thumbnail_variants']
+
+
+@pytest.mark.django_db
+def test_replaced_course_thumbnail_variants_deleted(
+        api_client, django_capture_on_commit_callbacks):
+    user = UserFactory(is_content_creator=True)
+    course = CourseFactory(owner=user, thumbnail=make_image_file())
+    process_course_thumbnail(course_id=course.id)
+    course.refresh_from_db()
+    old_variants = [name for sizes in course.thumbnail_variants.values()
+                    for name in sizes.values()]
+    api_client.force_authenticate(user=user)
+    url = reverse('course-detail', kwargs={'pk': course.pk})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.patch(
+            url, {"thumbnail": make_image_file(size=(640, 480))},
+            format='multipart')
+
+    assert response.status_code == status.HTTP_200_OK
+    storage = course.thumbnail.storage
+    assert old_variants
+    assert not any(storage.exists(name) for name in old_variants)
+
+
+@pytest.mark.django_db
+def test_variants_of_thumbnail_replaced_during_processing_deleted():
+    course = CourseFactory(thumbnail=make_image_file())
+    built = {}
+
+    def build_and_replace(image_file):
+        built.update(build_image_variants(image_file))
+        # The owner uploads another thumbnail meanwhile
+        Course.objects.filter(id=course.id).update(thumbnail='other.jpg')
+        return built
+
+    with patch('courses.tasks.build_image_variants',
+               side_effect=build_and_replace):
+        process_course_thumbnail(course_id=course.id)
+
+    course.refresh_from_db()
+    storage = course.thumbnail.storage
+    assert course.thumbnail_variants == {}
+    assert built
+    assert not any(storage.exists(name) for sizes in built.values()
+                   for name in sizes.values())
+
+
+@pytest.mark.django_db
+def test_identical_uploads_share_content_addressed_file(api_client):
+    user = UserFactory(is_content_creator=True)
+    first_lesson = LessonFactory(chapter__course__owner=user)
+    second_lesson = LessonFactory(chapter__course__owner=user)
+    api_client.force_authenticate(user=user)
+    url = reverse('upload-image')
+
+    first = api_client.post(url, {"lesson": first_lesson.id,
+                                  "image": make_image_file("a.jpg")},
+                            format='multipart')
+    second = api_client.post(url, {"lesson": second_lesson.id,
+                                   "image": make_image_file("b.jpg")},
+                             format='multipart')
+
+    assert first.data['location'] == second.data['location']
+    assert '/media/hashed/' in first.data['location']
+    names = set(LessonImage.objects.values_list('image', flat=True))
+    assert len(names) == 1
+
+
+@pytest.mark.django_db
+def test_shared_file_deleted_with_last_reference(
+        django_capture_on_commit_callbacks):
+    lesson = LessonFactory()
+    first = LessonImage.objects.create(lesson=lesson, image=make_image_file())
+    second = LessonImage.objects.create(lesson=lesson,
+                                        image=make_image_file())
+    process_lesson_image(lesson_image_id=first.id)
+    process_lesson_image(lesson_image_id=second.id)
+    first.refresh_from_db()
+    second.refresh_from_db()
+    storage = first.image.storage
+    name = first.image.name
+    variant = first.variants['webp']['320']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+
+    assert storage.exists(name)
+    assert storage.exists(variant)
+
+    age_files(storage, [name, *first.variants['webp'].values(),
+                        *first.variants['avif'].values()])
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+
+    assert not storage.exists(name)
+    assert not storage.exists(variant)
+
+
+def age_files(storage, names):
+    old = time.time() - CONTENT_ADDRESSED_GRACE_PERIOD - 1
+    for name in names:
+        os.utime(storage.path(name), (old, old))
+
+
+@pytest.mark.django_db
+def test_reused_file_survives_delete_of_old_reference(
+        django_capture_on_commit_callbacks):
+    lesson = LessonFactory()
+    first = LessonImage.objects.create(lesson=lesson, image=make_image_file())
+    storage = first.image.storage
+    name = first.image.name
+    age_files(storage, [name])
+
+    # Another upload reuses the file, but its row is not saved yet
+    with storage.open(name) as image_file:
+        assert storage.save('b.jpg', image_file) == name
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+
+    assert storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_concurrent_identical_uploads_share_file():
+    lesson = LessonFactory()
+    first = LessonImage.objects.create(lesson=lesson, image=make_image_file())
+    storage = first.image.storage
+    name = first.image.name
+
+    # The other upload stored the file after this one found it missing
+    with patch('courses.storage.os.utime', side_effect=FileNotFoundError), \
+            storage.open(name) as image_file:
+        assert storage.save('b.jpg', image_file) == name
+
+    directory, _ = os.path.split(storage.path(name))
+    assert os.listdir(directory) == [os.path.basename(name)]
+
+
+@pytest.mark.django_db
+def test_sweep_deletes_unreferenced_files_after_grace_period():
+    lesson = LessonFactory()
+    kept = LessonImage.objects.create(lesson=lesson, image=make_image_file())
+    storage = kept.image.storage
+    orphan = storage.save('orphan.png', make_image_file(size=(10, 10)))
+    recent = storage.save('recent.png', make_image_file(size=(20, 20)))
+    age_files(storage, [kept.image.name, orphan])
+
+    call_command('sweep_content_addressed_files')
+
+    assert storage.exists(kept.image.name)
+    assert not storage.exists(orphan)
+    assert storage.exists(recent)
+
+
+def send_chunk(api_client, upload_id, data, offset):
+    url = reverse('lesson-image-upload', kwargs={'upload_id': upload_id})
+    return api_client.patch(url, data,
+                            content_type='application/octet-stream',
+                            HTTP_UPLOAD_OFFSET=str(offset))
+
+
+@pytest.mark.django_db
+def test_chunked_upload_lesson_image(api_client, broker,
+                                     django_capture_on_commit_callbacks):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    api_client.force_authenticate(user=user)
+    content = make_image_file().read()
+    response = api_client.post(reverse('lesson-image-uploads'),
+                               {'lesson': lesson.id, 'filename': 'test.jpg',
+                                'size': len(content)},
+                               format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    upload_id = response.data['id']
+    middle = len(content) // 2
+
+    first = send_chunk(api_client, upload_id, content[:middle], 0)
+    status_response = api_client.get(
+        reverse('lesson-image-upload', kwargs={'upload_id': upload_id}))
+    with django_capture_on_commit_callbacks(execute=True):
+        last = send_chunk(api_client, upload_id, content[middle:], middle)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first['Upload-Offset'] == str(middle)
+    assert status_response.data['offset'] == middle
+    assert last.status_code == status.HTTP_201_CREATED
+    assert '/media/hashed/' in last.data['location']
+    lesson_image = LessonImage.objects.get(lesson=lesson)
+    with lesson_image.image.open('rb') as image_file:
+        assert image_file.read() == content
+    assert not ChunkedUpload.objects.exists()
+    assert len(broker.queues.get('default').queue) == 1
+
+
+@pytest.mark.django_db
+def test_chunked_upload_offset_mismatch(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    upload = ChunkedUpload.objects.create(owner=user, lesson=lesson,
+                                          filename='test.jpg', size=100)
+    api_client.force_authenticate(user=user)
+
+    response = send_chunk(api_client, upload.id, b'\xff\xd8\xff' * 4, 50)
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.data['offset'] == 0
+
+
+@pytest.mark.django_db
+def test_chunked_upload_rejects_non_image(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    upload = ChunkedUpload.objects.create(owner=user, lesson=lesson,
+                                          filename='test.jpg', size=100)
+    api_client.force_authenticate(user=user)
+
+    response = send_chunk(api_client, upload.id, b'#!/bin/sh\n' * 4, 0)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    upload.refresh_from_db()
+    assert upload.offset == 0
+
+
+@pytest.mark.django_db
+def test_chunked_upload_rejects_chunk_past_declared_size(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    upload = ChunkedUpload.objects.create(owner=user, lesson=lesson,
+                                          filename='test.jpg', size=10)
+    api_client.force_authenticate(user=user)
+
+    response = send_chunk(api_client, upload.id, b'\xff\xd8\xff' * 4, 0)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "declared upload size" in str(response.data)
+
+
+@pytest.mark.django_db
+def test_create_chunked_upload_too_large(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('lesson-image-uploads'),
+                               {'lesson': lesson.id, 'filename': 'big.jpg',
+                                'size': 11 * 1024 * 1024},
+                               format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'size' in response.data
+
+
+@pytest.mark.django_db
+def test_chunked_upload_of_other_user_not_found(api_client):
+    owner = UserFactory(is_content_creator=True)
+    upload = ChunkedUpload.objects.create(
+        owner=owner, lesson=LessonFactory(chapter__course__owner=owner),
+        filename='test.jpg', size=100)
+    api_client.force_authenticate(user=UserFactory(is_content_creator=True))
+
+    response = send_chunk(api_client, upload.id, b'\xff\xd8\xff' * 4, 0)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_lesson_content_rendered_on_save():
+    lesson = LessonFactory(content='<h2>Intro</h2><p>First &amp; second '
+                                   'paragraph.</p><h3>Details <b>here</b>'
+                                   '</h3><p>More text.</p>')
+
+    assert lesson.toc == [
+        {'level': 2, 'title': 'Intro', 'anchor': 'section-1'},
+        {'level': 3, 'title': 'Details here', 'anchor': 'section-2'},
+    ]
+    assert '<h2 id="section-1">Intro</h2>' in lesson.content
+    assert '&amp; second' in lesson.content
+    assert lesson.content_text == ('Intro First & second paragraph. '
+                                   'Details here More text.')
+    assert lesson.reading_time == 1
+    assert lesson.content_hash
+
+
+@pytest.mark.django_db
+def test_update_lesson_skips_sanitizing_unchanged_content(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user,
+                           content='<h2>Intro</h2><p>Text</p>')
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-detail', kwargs={
+        'course_pk': lesson.chapter.course.pk,
+        'chapter_pk': lesson.chapter.pk,
+        'pk': lesson.pk
+    })
+
+    with patch('courses.serializers.sanitize_html') as sanitize:
+        response = api_client.put(url, {'title': 'Renamed',
+                                        'content': lesson.content})
+
+    assert response.status_code == status.HTTP_200_OK
+    sanitize.assert_not_called()
+    assert response.data['toc'][0]['title'] == 'Intro'
+
+
+@pytest.mark.django_db
+def test_update_lesson_with_changed_content_is_sanitized(api_client):
+    user = UserFactory(is_content_creator=True)
+    lesson = LessonFactory(chapter__course__owner=user)
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-detail', kwargs={
+        'course_pk': lesson.chapter.course.pk,
+        'chapter_pk': lesson.chapter.pk,
+        'pk': lesson.pk
+    })
+
+    response = api_client.patch(url, {
+        'content': '<script>alert(1)</script><h2 id="x">New</h2>'})
+
+    assert response.status_code == status.HTTP_200_OK
+    lesson.refresh_from_db()
+    assert '<script>' not in lesson.content
+    assert lesson.content == '<h2 id="section-1">New</h2>'
+    assert lesson.toc == [{'level': 2, 'title': 'New',
+                           'anchor': 'section-1'}]
+
+
+@pytest.mark.django_db
+def test_list_lessons_sparse_fieldset_skips_content(api_client):
+    user = UserFactory()
+    chapter = ChapterFactory()
+    LessonFactory.create_batch(2, chapter=chapter, content="<p>Heavy</p>")
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-list', kwargs={
+        'course_pk': chapter.course_id, 'chapter_pk': chapter.id})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url, {'fields': 'id,title,position'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert all(set(lesson) == {'id', 'title', 'position'}
+               for lesson in response.data)
+    sql = queries.captured_queries[-1]['sql']
+    assert '"content"' not in sql
+    assert '"content_text"' not in sql
+    assert '"search_vector"' not in sql
+
+
+@pytest.mark.django_db
+def test_retrieve_lesson_skips_unserialized_fields(api_client):
+    user = UserFactory()
+    lesson = LessonFactory(content="<p>Heavy</p>")
+    api_client.force_authenticate(user=user)
+    url = reverse('chapter-lessons-detail', kwargs={
+        'course_pk': lesson.chapter.course_id,
+        'chapter_pk': lesson.chapter_id,
+        'pk': lesson.id})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url)
+
+    assert response.data['content'] == "<p>Heavy</p>"
+    assert all('"content_text"' not in query['sql']
+               for query in queries.captured_queries)
@@ -1,10 +1,15 @@
 import pytest
 from unittest.mock import patch
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
+from jarcode.db_router import PrimaryReplicaRouter
 from problems.models import Problem
 from problems.factories import ProblemFactory
 from users.factories import UserFactory
+from submissions.models import Result, UserSolvedProblem
+from submissions.factories import SubmissionFactory, ResultFactory
 
 
 @pytest.mark.django_db
@@ -314,3 +319,328 @@ def test_problem_pagination(api_client):
         assert len(data['results']) == 1
         assert data['results'][0]['id'] == expected_order[6].id
         assert data['next'] is None
+
+
+@pytest.mark.django_db
+def test_passed_result_marks_problem_as_solved(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    solved = ProblemFactory()
+    unsolved = ProblemFactory()
+    ResultFactory(submission=SubmissionFactory(author=user, problem=solved))
+    ResultFactory(submission=SubmissionFactory(author=user, problem=unsolved),
+                  outcome=Result.Outcome.FAILED)
+    url = reverse('problem-list')
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    is_solved = {p['id']: p['is_solved'] for p in response.data['results']}
+    assert is_solved == {solved.id: True, unsolved.id: False}
+
+
+@pytest.mark.django_db
+def test_rejudged_failure_unmarks_problem_as_solved():
+    user = UserFactory()
+    problem = ProblemFactory()
+    passed = ResultFactory(
+        submission=SubmissionFactory(author=user, problem=problem))
+    other = ResultFactory(
+        submission=SubmissionFactory(author=user, problem=problem))
+
+    passed.outcome = Result.Outcome.FAILED
+    passed.save()
+
+    assert UserSolvedProblem.objects.filter(user=user,
+                                            problem=problem).exists()
+
+    other.outcome = Result.Outcome.FAILED
+    other.save()
+
+    assert not UserSolvedProblem.objects.filter(user=user,
+                                                problem=problem).exists()
+
+
+@pytest.mark.django_db
+def test_filter_problems_by_is_solved(api_client):
+    user = UserFactory()
+    other_user = UserFactory()
+    api_client.force_authenticate(user=user)
+    solved = ProblemFactory()
+    solved_by_other = ProblemFactory()
+    ResultFactory(submission=SubmissionFactory(author=user, problem=solved))
+    ResultFactory(submission=SubmissionFactory(author=other_user,
+                                               problem=solved_by_other))
+    url = reverse('problem-list')
+
+    response = api_client.get(url, {'is_solved': True})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [p['id'] for p in response.data['results']] == [solved.id]
+
+    response = api_client.get(url, {'is_solved': False})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [p['id'] for p in response.data['results']] == [solved_by_other.id]
+
+
+@pytest.mark.django_db
+def test_backfill_solved_problems_command():
+    user = UserFactory()
+    problem = ProblemFactory()
+    ResultFactory.create_batch(
+        2, submission__author=user, submission__problem=problem)
+    ResultFactory(outcome=Result.Outcome.FAILED)
+    UserSolvedProblem.objects.all().delete()
+
+    call_command('backfill_solved_problems', batch_size=1)
+
+    assert list(UserSolvedProblem.objects.values_list(
+        'user_id', 'problem_id')) == [(user.id, problem.id)]
+
+
+@pytest.mark.django_db
+def test_retrieve_problem_conditional_request(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    problem = ProblemFactory()
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    response = api_client.get(url)
+    etag = response['ETag']
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    ResultFactory(submission=SubmissionFactory(author=user, problem=problem))
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['is_solved'] is True
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_retrieve_problem_etag_changes_with_author_name(api_client):
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+    etag = api_client.get(url)['ETag']
+
+    problem.author.last_name = 'Renamed'
+    problem.author.save(update_fields=['last_name'])
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['author']['last_name'] == 'Renamed'
+
+
+@pytest.mark.django_db
+def test_retrieve_problem_ignores_if_modified_since(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    problem = ProblemFactory()
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+    since = http_date(problem.updated_at.timestamp() + 60)
+
+    response = api_client.get(url)
+
+    assert not response.has_header('Last-Modified')
+
+    ResultFactory(submission=SubmissionFactory(author=user, problem=problem))
+    response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['is_solved'] is True
+
+
+@pytest.mark.django_db
+def test_list_problems_served_from_cache(api_client,
+                                         django_assert_num_queries):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    ProblemFactory.create_batch(3)
+    url = reverse('problem-list')
+    first_response = api_client.get(url)
+
+    with django_assert_num_queries(1):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == first_response.data['results']
+
+
+@pytest.mark.django_db
+def test_cached_problem_merges_per_user_is_solved(api_client):
+    user = UserFactory()
+    other_user = UserFactory()
+    problem = ProblemFactory()
+    ResultFactory(submission=SubmissionFactory(author=user, problem=problem))
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    api_client.force_authenticate(user=user)
+    response = api_client.get(url)
+    assert response.data['is_solved'] is True
+
+    api_client.force_authenticate(user=other_user)
+    response = api_client.get(url)
+    assert response.data['is_solved'] is False
+
+
+@pytest.mark.django_db
+def test_cached_problem_invalidated_on_update(api_client):
+    user = UserFactory(is_content_creator=True)
+    problem = ProblemFactory(author=user, title="Old title")
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+    api_client.get(url)
+
+    api_client.patch(url, {'title': 'New title'})
+    response = api_client.get(url)
+
+    assert response.data['title'] == 'New title'
+    response = api_client.get(reverse('problem-list'))
+    assert response.data['results'][0]['title'] == 'New title'
+
+
+@pytest.mark.django_db
+def test_update_problem_skips_sanitizing_unchanged_description(api_client):
+    user = UserFactory(is_content_creator=True)
+    problem = ProblemFactory(author=user, description='<p>Statement</p>')
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    with patch('problems.serializers.sanitize_html') as sanitize:
+        response = api_client.patch(url, {'title': 'Renamed',
+                                          'description': problem.description})
+
+    assert response.status_code == status.HTTP_200_OK
+    sanitize.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_problem_reads_skip_session_and_user_queries(
+        api_client, django_assert_num_queries):
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_login(user)
+    list_url = reverse('problem-list')
+    detail_url = reverse('problem-detail', kwargs={'pk': problem.pk})
+    api_client.get(list_url)
+    api_client.get(detail_url)
+
+    # Only the problem (with is_solved) lookups remain
+    with django_assert_num_queries(1):
+        assert api_client.get(list_url).status_code == status.HTTP_200_OK
+    with django_assert_num_queries(1):
+        assert api_client.get(detail_url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_problem_reads_served_by_replica(api_client, settings):
+    settings.REPLICA_DATABASE = 'replica'
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_authenticate(user=user)
+
+    list_response = api_client.get(reverse('problem-list'))
+    detail_response = api_client.get(
+        reverse('problem-detail', kwargs={'pk': problem.pk}))
+
+    assert list_response.data['results'] == []
+    assert detail_response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_replica_reads_reset_after_unhandled_error(api_client, settings):
+    settings.REPLICA_DATABASE = 'replica'
+    api_client.force_authenticate(user=UserFactory())
+
+    with patch('problems.views.ProblemViewSet.list',
+               side_effect=RuntimeError('Unexpected')), \
+            pytest.raises(RuntimeError):
+        api_client.get(reverse('problem-list'))
+
+    assert PrimaryReplicaRouter().db_for_read(Problem) == 'default'
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_problem_writes_go_to_primary(api_client, settings):
+    settings.REPLICA_DATABASE = 'replica'
+    user = UserFactory(is_content_creator=True)
+    problem = ProblemFactory(author=user)
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    response = api_client.patch(url, {"title": "Updated Title"})
+
+    assert response.status_code == status.HTTP_200_OK
+    problem.refresh_from_db()
+    assert problem.title == "Updated Title"
+    assert not Problem.objects.using('replica').exists()
+
+
+@pytest.mark.django_db
+def test_list_problems_sparse_fieldset(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    ProblemFactory.create_batch(2)
+    url = reverse('problem-list')
+    api_client.get(url)
+
+    response = api_client.get(url, {'fields': 'id,title,is_solved'})
+    full_response = api_client.get(url)
+
+    assert all(set(problem) == {'id', 'title', 'is_solved'}
+               for problem in response.data['results'])
+    assert 'description' in full_response.data['results'][0]
+
+
+@pytest.mark.django_db
+def test_retrieve_problem_sparse_fieldset(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    problem = ProblemFactory()
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    response = api_client.get(url, {'fields': 'title,author.first_name'})
+    invalid = api_client.get(url, {'fields': 'title,secret'})
+
+    assert response.data == {'title': problem.title,
+                             'author': {'first_name': problem.author.first_name}}
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_list_problems_omits_code(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    ProblemFactory(author=user)
+    url = reverse('problem-list')
+
+    response = api_client.get(url)
+    invalid = api_client.get(url, {'fields': 'id,test_code'})
+
+    problem = response.data['results'][0]
+    assert 'test_code' not in problem
+    assert 'starting_code' not in problem
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_retrieve_problem_test_code_only_for_author(api_client):
+    author = UserFactory()
+    student = UserFactory()
+    problem = ProblemFactory(author=author)
+    url = reverse('problem-detail', kwargs={'pk': problem.pk})
+
+    api_client.force_authenticate(user=student)
+    student_response = api_client.get(url)
+    api_client.force_authenticate(user=author)
+    author_response = api_client.get(url)
+
+    assert 'test_code' not in student_response.data
+    assert student_response.data['starting_code'] == problem.starting_code
+    assert author_response.data['test_code'] == problem.test_code
+    assert student_response['ETag'] != author_response['ETag']
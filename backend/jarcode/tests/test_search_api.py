@@ -0,0 +1,102 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from problems.models import Problem
+from problems.factories import ProblemFactory
+from courses.factories import CourseFactory, LessonFactory
+from users.factories import UserFactory
+
+
+@pytest.mark.django_db
+def test_search_unauthenticated(api_client):
+    url = reverse('search')
+
+    response = api_client.get(url, {'q': 'graph'})
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_search_requires_query(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('search')
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'q' in response.data
+
+
+@pytest.mark.django_db
+def test_search_returns_all_result_types(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    problem = ProblemFactory(title="Shortest path in graphs")
+    course = CourseFactory(title="Graph algorithms")
+    lesson = LessonFactory(title="Traversals",
+                           content="<p>Walking a <b>graph</b> with BFS</p>")
+    ProblemFactory(title="String reversal", description="Unrelated")
+    url = reverse('search')
+
+    response = api_client.get(url, {'q': 'graph'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [p['id'] for p in response.data['problems']] == [problem.id]
+    assert [c['id'] for c in response.data['courses']] == [course.id]
+    assert [lsn['id'] for lsn in response.data['lessons']] == [lesson.id]
+    assert response.data['lessons'][0]['course'] == lesson.chapter.course_id
+
+
+@pytest.mark.django_db
+def test_search_ignores_html_markup(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    LessonFactory(content='<p class="strong">Plain text</p>')
+    url = reverse('search')
+
+    response = api_client.get(url, {'q': 'strong', 'type': 'lesson'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['lessons'] == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    in_description = ProblemFactory(title="Warmup",
+                                    description="<p>Uses recursion</p>")
+    in_title = ProblemFactory(title="Recursion basics",
+                              description="<p>Intro</p>")
+    url = reverse('search')
+
+    response = api_client.get(url, {'q': 'recursion', 'type': 'problem'})
+
+    assert response.status_code == status.HTTP_200_OK
+    ids = [p['id'] for p in response.data['problems']]
+    assert ids == [in_title.id, in_description.id]
+    assert response.data['courses'] == []
+
+
+@pytest.mark.django_db
+def test_search_falls_back_to_trigram_similarity(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    course = CourseFactory(title="Dynamic Programming")
+    url = reverse('search')
+
+    response = api_client.get(url, {'q': 'programing', 'type': 'course'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [c['id'] for c in response.data['courses']] == [course.id]
+
+
+@pytest.mark.django_db
+def test_title_filter_uses_trigram_index(explain_plan):
+    ProblemFactory.create_batch(5)
+    queryset = Problem.objects.filter(title__icontains='graph')
+
+    plan = explain_plan(queryset)
+
+    assert 'problem_title_trgm_idx' in plan
@@ -1,11 +1,23 @@
 import pytest
+import factory
+import zstandard
+from io import StringIO
 from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from submissions.models import Submission
-from submissions.factories import SubmissionFactory
+from datetime import timedelta
+from django.utils import timezone
+from submissions.models import Submission, Result, CompressionDictionary
+from submissions.archive import archive_submissions, restore_archive
+from submissions.admin import SubmissionAdmin
+from submissions.factories import SubmissionFactory, ResultFactory
 from problems.factories import ProblemFactory
 from users.factories import UserFactory
+from submissions.tasks import rejudge_problem, evaluate_submission
+from submissions.judge_config import get_judge_config
 
 
 @pytest.mark.django_db
@@ -85,6 +97,39 @@ def test_create_submission_success(api_client, broker, decode_message):
     assert message['kwargs']['submission_id'] == submission.id
 
 
+@pytest.mark.django_db
+def test_create_submission_loads_problem_once(api_client, broker):
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(url, {"solution": "print(1)"})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    problem_queries = [query for query in queries.captured_queries
+                       if 'FROM "problems_problem"' in query['sql']]
+    assert len(problem_queries) == 1
+
+
+@pytest.mark.django_db
+def test_create_submission_ignores_restored_at(api_client, broker):
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+
+    response = api_client.post(url, {"solution": "print(1)",
+                                     "restored_at": timezone.now()})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert 'restored_at' not in response.data
+    assert Submission.objects.get().restored_at is None
+
+
 @pytest.mark.django_db
 def test_create_submission_unauthenticated(api_client, broker):
     problem = ProblemFactory()
@@ -225,3 +270,396 @@ def test_submission_pagination(api_client):
         assert len(data['results']) == 1
         assert data['results'][0]['id'] == expected_order[6].id
         assert data['next'] is None
+
+
+@pytest.mark.django_db
+def test_submission_history_uses_composite_index(explain_plan):
+    user = UserFactory()
+    problem = ProblemFactory()
+    SubmissionFactory.create_batch(20, author=user, problem=problem)
+    queryset = Submission.objects.filter(
+        author=user, problem=problem).order_by('-id')
+
+    plan = explain_plan(queryset)
+
+    assert 'submission_author_problem_idx' in plan
+
+
+@pytest.mark.django_db
+def test_passed_results_use_partial_index(explain_plan):
+    ResultFactory.create_batch(5)
+    ResultFactory.create_batch(5, outcome=Result.Outcome.FAILED)
+    queryset = Result.objects.filter(
+        outcome=Result.Outcome.PASSED).values('submission_id')
+
+    plan = explain_plan(queryset)
+
+    assert 'result_passed_idx' in plan
+
+
+@pytest.mark.django_db
+def test_list_submissions_skips_session_and_user_queries(
+        api_client, django_assert_num_queries):
+    user = UserFactory()
+    problem = ProblemFactory()
+    SubmissionFactory(author=user, problem=problem)
+    api_client.force_login(user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+    api_client.get(url)
+
+    # Problem, and submissions joined with their results
+    with django_assert_num_queries(2):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_submission_history_reads_primary_after_submit(api_client, broker,
+                                                       settings):
+    settings.REPLICA_DATABASE = 'replica'
+    user = UserFactory()
+    problem = ProblemFactory()
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+
+    # The simulated replica never receives the rows written to the primary
+    assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    create_response = api_client.post(url, {"solution": "print(1)"})
+    response = api_client.get(url)
+
+    assert create_response.cookies['read_primary']['max-age'] == 30
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 1
+
+
+@pytest.mark.django_db
+def test_rejudge_problem_queues_batches(broker, decode_message):
+    problem = ProblemFactory()
+    submissions = SubmissionFactory.create_batch(3, problem=problem)
+    SubmissionFactory()
+
+    with patch('submissions.tasks.AI_BATCH_SIZE', 2):
+        rejudge_problem.fn(problem_id=problem.id)
+
+    queue = broker.queues.get('default').queue
+    messages = [decode_message(raw) for raw in queue]
+    assert [message['actor_name'] for message in messages] == [
+        'evaluate_submissions_batch'] * 2
+    assert [message['kwargs']['submission_ids'] for message in messages] == [
+        [submissions[0].id, submissions[1].id], [submissions[2].id]]
+
+
+@pytest.mark.django_db
+def test_list_submissions_sparse_fieldset(api_client):
+    user = UserFactory()
+    problem = ProblemFactory()
+    submission = SubmissionFactory(author=user, problem=problem,
+                                   solution="heavy solution")
+    ResultFactory(submission=submission, output="heavy output")
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url, {'fields': 'id,status,result.outcome'})
+
+    assert response.status_code == status.HTTP_200_OK
+    item = response.data['results'][0]
+    assert set(item) == {'id', 'status', 'result'}
+    assert set(item['result']) == {'outcome'}
+    sql = queries.captured_queries[-1]['sql']
+    assert '"solution"' not in sql
+    assert '"output"' not in sql
+    assert '"ai_evaluation"' not in sql
+
+
+@pytest.mark.django_db
+def test_list_submissions_unknown_sparse_field(api_client):
+    user = UserFactory()
+    problem = ProblemFactory()
+    SubmissionFactory(author=user, problem=problem)
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-list',
+                  kwargs={'problem_pk': problem.pk})
+
+    response = api_client.get(url, {'fields': 'id,password'})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'password' in str(response.data['fields'])
+
+
+@pytest.mark.django_db
+def test_retrieve_submission_returns_heavy_fields(api_client):
+    user = UserFactory()
+    submission = SubmissionFactory(author=user, solution="heavy solution")
+    ResultFactory(submission=submission, output="heavy output")
+    api_client.force_authenticate(user=user)
+    url = reverse('problem-submissions-detail',
+                  kwargs={'problem_pk': submission.problem_id,
+                          'pk': submission.pk})
+
+    response = api_client.get(url)
+
+    assert response.data['solution'] == "heavy solution"
+    assert response.data['result']['output'] == "heavy output"
+
+
+@pytest.mark.django_db
+def test_submission_admin_changelist_defers_heavy_fields(admin_client):
+    SubmissionFactory.create_batch(2)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(
+            reverse('admin:submissions_submission_changelist'))
+
+    assert response.status_code == status.HTTP_200_OK
+    sql = ' '.join(query['sql'] for query in queries.captured_queries
+                   if 'submissions_submission' in query['sql'])
+    assert '"solution"' not in sql
+    assert '"test_code"' not in sql
+
+
+@pytest.mark.django_db
+def test_judge_config_cached_per_problem_version():
+    problem = ProblemFactory(test_code='assert True')
+    first = get_judge_config(problem)
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = get_judge_config(problem)
+    problem.test_code = 'assert False'
+    problem.save()
+    updated = get_judge_config(problem)
+
+    assert len(queries) == 0
+    assert cached is first
+    assert first.test_code == 'assert True'
+    assert updated.test_code == 'assert False'
+
+
+@pytest.mark.django_db
+def test_judge_job_does_not_load_test_code(broker):
+    submission = SubmissionFactory()
+    get_judge_config(submission.problem)
+
+    with patch('submissions.submission_service.SubmissionService.evaluate'), \
+            CaptureQueriesContext(connection) as queries:
+        evaluate_submission.fn(submission_id=submission.id)
+
+    assert not any('"test_code"' in query['sql']
+                   for query in queries.captured_queries)
+
+
+def get_stored_value(table, column, row_id) -> bytes:
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {column} FROM {table} WHERE id = %s',
+                       [row_id])
+        return bytes(cursor.fetchone()[0])
+
+
+@pytest.mark.django_db
+def test_solution_and_output_stored_compressed(api_client):
+    user = UserFactory()
+    api_client.force_authenticate(user=user)
+    solution = "print('solution')\n" * 200
+    output = 'test_add ... ok\n' * 500
+    submission = SubmissionFactory(author=user, solution=solution)
+    result = ResultFactory(submission=submission, output=output)
+    url = reverse('problem-submissions-detail',
+                  kwargs={'problem_pk': submission.problem.pk,
+                          'pk': submission.pk})
+
+    response = api_client.get(url)
+
+    stored_solution = get_stored_value('submissions_submission', 'solution',
+                                       submission.id)
+    stored_output = get_stored_value('submissions_result', 'output',
+                                     result.id)
+    assert len(stored_solution) < len(solution) / 10
+    assert len(stored_output) < len(output) / 10
+    assert response.data['solution'] == solution
+    assert response.data['result']['output'] == output
+    assert Submission.objects.get(id=submission.id).solution == solution
+
+
+@pytest.mark.django_db
+def test_short_solution_stored_as_text():
+    submission = SubmissionFactory(solution='x = 1')
+
+    assert get_stored_value('submissions_submission', 'solution',
+                            submission.id) == b'x = 1'
+    assert Submission.objects.get(id=submission.id).solution == 'x = 1'
+
+
+@pytest.mark.django_db
+def test_train_compression_dictionaries():
+    problem = ProblemFactory(language='PYTHON')
+    author = UserFactory()
+    SubmissionFactory.create_batch(
+        100, problem=problem, author=author,
+        solution=factory.Sequence(
+            lambda n: f'def add_{n}(a, b):\n    return a + b + {n}\n'))
+    old = Submission.objects.order_by('id').first()
+
+    call_command('train_compression_dictionaries', '--recompress',
+                 stdout=StringIO())
+    dictionary = CompressionDictionary.objects.get(
+        kind=CompressionDictionary.Kind.SOLUTION, language='PYTHON')
+    new = SubmissionFactory(problem=problem, author=author,
+                            solution=old.solution)
+    call_command('train_compression_dictionaries', stdout=StringIO())
+
+    for submission in (old, new):
+        stored = get_stored_value('submissions_submission', 'solution',
+                                  submission.id)
+        assert (zstandard.get_frame_parameters(stored).dict_id
+                == dictionary.dict_id)
+        assert (Submission.objects.get(id=submission.id).solution
+                == old.solution)
+
+
+def create_old_submissions(author, problem, outcomes, days_ago=365):
+    submissions = []
+    for outcome in outcomes:
+        submission = SubmissionFactory(author=author, problem=problem)
+        ResultFactory(submission=submission, outcome=outcome)
+        submissions.append(submission)
+    Submission.objects.filter(id__in=[s.id for s in submissions]).update(
+        created_at=timezone.now() - timedelta(days=days_ago))
+    return submissions
+
+
+@pytest.mark.django_db
+def test_archive_submissions_keeps_best_and_last():
+    author = UserFactory()
+    problem = ProblemFactory()
+    outcomes = [Result.Outcome.FAILED, Result.Outcome.PASSED,
+                *[Result.Outcome.FAILED] * 10]
+    old = create_old_submissions(author, problem, outcomes)
+    recent = create_old_submissions(author, problem,
+                                    [Result.Outcome.FAILED] * 2, days_ago=1)
+    other = create_old_submissions(UserFactory(), problem,
+                                   [Result.Outcome.FAILED] * 3)
+
+    archives = archive_submissions(
+        cutoff=timezone.now() - timedelta(days=180), keep_last=10)
+
+    kept = set(Submission.objects.values_list('id', flat=True))
+    archived = {old[0].id, old[2].id, old[3].id}
+    assert len(archives) == 1
+    assert archives[0].submission_count == 3
+    assert kept == {s.id for s in old + recent + other} - archived
+    assert not Result.objects.filter(submission_id__in=archived).exists()
+
+
+@pytest.mark.django_db
+def test_restore_submission_archive(admin_client):
+    author = UserFactory()
+    problem = ProblemFactory()
+    old = create_old_submissions(author, problem,
+                                 [Result.Outcome.FAILED] * 3)
+    archived = Submission.objects.select_related('result').get(id=old[0].id)
+    archive, = archive_submissions(cutoff=timezone.now(), keep_last=2)
+
+    response = admin_client.post(
+        reverse('admin:submissions_submissionarchive_changelist'),
+        {'action': 'restore_archives', '_selected_action': [archive.id]})
+
+    restored = Submission.objects.select_related('result').get(
+        id=archived.id)
+    archive.refresh_from_db()
+    assert response.status_code == status.HTTP_302_FOUND
+    assert archive.restored_at is not None
+    assert restored.created_at == archived.created_at
+    assert restored.solution == archived.solution
+    assert restored.result.output == archived.result.output
+    assert restored.result.outcome == archived.result.outcome
+
+
+@pytest.mark.django_db
+def test_restored_submissions_not_archived_again():
+    author = UserFactory()
+    problem = ProblemFactory()
+    old = create_old_submissions(author, problem,
+                                 [Result.Outcome.FAILED] * 3)
+    archive, = archive_submissions(cutoff=timezone.now(), keep_last=2)
+
+    restore_archive(archive)
+
+    assert archive_submissions(cutoff=timezone.now(), keep_last=2) == []
+    assert Submission.objects.get(id=old[0].id).restored_at is not None
+
+
+def count_changelist_queries(admin_client, url_name) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(reverse(url_name))
+    assert response.status_code == status.HTTP_200_OK
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', [
+    'admin:submissions_submission_changelist',
+    'admin:submissions_result_changelist',
+])
+def test_admin_changelist_query_count_independent_of_rows(admin_client,
+                                                          url_name):
+    ResultFactory.create_batch(2)
+    # Loads and caches the session user
+    count_changelist_queries(admin_client, url_name)
+    few = count_changelist_queries(admin_client, url_name)
+    ResultFactory.create_batch(10)
+    many = count_changelist_queries(admin_client, url_name)
+
+    assert few == many
+
+
+@pytest.mark.django_db
+def test_submission_admin_keyset_pagination(admin_client):
+    submissions = SubmissionFactory.create_batch(5)
+    url = reverse('admin:submissions_submission_changelist')
+
+    with patch.object(SubmissionAdmin, 'list_per_page', 2), \
+            CaptureQueriesContext(connection) as queries:
+        first = admin_client.get(url)
+        second = admin_client.get(
+            url, {'cursor': first.context['cl'].next_cursor})
+
+    newest = sorted(submission.id for submission in submissions)[::-1]
+    assert [s.id for s in first.context['cl'].result_list] == newest[:2]
+    assert [s.id for s in second.context['cl'].result_list] == newest[2:4]
+    assert not any('OFFSET' in query['sql']
+                   for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_submission_admin_autocomplete_filter(admin_client):
+    problem, other_problem = ProblemFactory.create_batch(2)
+    SubmissionFactory(problem=problem)
+    SubmissionFactory(problem=other_problem)
+
+    response = admin_client.get(
+        reverse('admin:submissions_submission_changelist'),
+        {'problem__id__exact': problem.id})
+
+    assert [s.problem_id for s in response.context['cl'].result_list] == [
+        problem.id]
+    assert problem.title in response.content.decode()
+    assert other_problem.title not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_submission_admin_estimates_count(admin_client):
+    SubmissionFactory.create_batch(2)
+
+    with patch('jarcode.admin_changelist.ESTIMATED_COUNT_THRESHOLD', 0), \
+            CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(
+            reverse('admin:submissions_submission_changelist'))
+
+    assert response.context['cl'].paginator.is_estimated
+    assert not any('COUNT(' in query['sql']
+                   for query in queries.captured_queries)
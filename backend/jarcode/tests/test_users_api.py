@@ -415,3 +415,46 @@ def test_edit_profile_success(api_client):
     assert response.status_code == status.HTTP_200_OK
     assert response.data["first_name"] == payload["first_name"]
     assert response.data["last_name"] == payload["last_name"]
+
+
+@pytest.mark.django_db
+def test_me_session_and_user_served_from_cache(api_client,
+                                               django_assert_num_queries):
+    user = UserFactory(is_active=True)
+    api_client.force_login(user)
+    url = reverse("me")
+    api_client.get(url)
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["id"] == user.id
+
+
+@pytest.mark.django_db
+def test_cached_user_invalidated_on_save(api_client):
+    user = UserFactory(is_active=True, first_name="Before")
+    api_client.force_login(user)
+    url = reverse("me")
+    api_client.get(url)
+
+    user.first_name = "After"
+    user.save()
+    response = api_client.get(url)
+
+    assert response.data["first_name"] == "After"
+
+
+@pytest.mark.django_db
+def test_deactivated_user_not_served_from_cache(api_client):
+    user = UserFactory(is_active=True)
+    api_client.force_login(user)
+    url = reverse("me")
+    api_client.get(url)
+
+    user.is_active = False
+    user.save()
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,37 @@
+import copy
+import time
+from django.contrib.auth.backends import ModelBackend
+from .consts import USER_CACHE_TIMEOUT, USER_CACHE_MAX_SIZE
+
+# user id -> (expiry, user), local to the process
+_user_cache = {}
+
+
+def invalidate_cached_user(user_id) -> None:
+    _user_cache.pop(user_id, None)
+
+
+def clear_user_cache() -> None:
+    _user_cache.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend keeping the users it loads for sessions in a short-lived
+    per-process cache, so authenticated requests skip the User query.
+    Entries are dropped on User save / delete in this process and expire
+    after USER_CACHE_TIMEOUT in the others.
+    """
+
+    def get_user(self, user_id):
+        cached = _user_cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return copy.copy(cached[1])
+
+        user = super().get_user(user_id)
+        if user is not None:
+            if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+                _user_cache.clear()
+            _user_cache[user_id] = (time.monotonic() + USER_CACHE_TIMEOUT,
+                                    copy.copy(user))
+        return user
@@ -14,3 +14,10 @@ ACCOUNT_VERIFICATION_BASE_URL = 'http://localhost/verify-account'
 
 # TOOD for development only, change later
 PASSWORD_RESET_BASE_URL = 'http://localhost/reset-password'
+
+# Per-process cache of users looked up by session
+USER_CACHE_TIMEOUT = 30                              # 30 SECONDS
+USER_CACHE_MAX_SIZE = 10000
+
+# User fields shown next to the problems and courses of the user
+GENERIC_INFO_FIELDS = ['first_name', 'last_name', 'is_content_creator']
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import User
+from .consts import GENERIC_INFO_FIELDS
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 
@@ -49,7 +50,7 @@ class UserLoggedSerializer(serializers.ModelSerializer):
 class UserGenericInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'is_content_creator']
+        fields = GENERIC_INFO_FIELDS
 
 
 class EmailUserSerializer(serializers.Serializer):
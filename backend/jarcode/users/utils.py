@@ -5,6 +5,7 @@ from .consts import (
     PASSWORD_RESET_TOKEN_TIMEOUT,
     ACCOUNT_VERIFICATION_BASE_URL,
     PASSWORD_RESET_BASE_URL,
+    GENERIC_INFO_FIELDS,
     )
 from uuid import uuid4
 from django.core.cache import cache
@@ -61,3 +62,14 @@ def generate_and_send_password_reset_token(user: User) -> None:
     )
     send_password_reset_link.send(email=user.email,
                                   link=password_reset_link)
+
+
+def is_generic_info_saved(created: bool, update_fields) -> bool:
+    """
+    True when a save of an existing user may have changed the
+    GENERIC_INFO_FIELDS shown with the user's problems and courses.
+    """
+    if created:
+        return False
+    return (update_fields is None
+            or not set(GENERIC_INFO_FIELDS).isdisjoint(update_fields))
@@ -120,10 +120,15 @@ export async function deleteChapter(courseId, chapterId) {
  * Get lessons for a chapter
  * @param {number} courseId - Course ID
  * @param {number} chapterId - Chapter ID
+ * @param {string} fields - Optional comma separated fields to return
  * @returns {Promise<Array>} List of lessons
  */
-export async function getLessonsForChapter(courseId, chapterId) {
-  const response = await apiClient.get(`${BASE}${courseId}/chapters/${chapterId}/lessons/`);
+export async function getLessonsForChapter(courseId, chapterId, fields = null) {
+  const params = {};
+  if (fields) params.fields = fields;
+  const response = await apiClient.get(`${BASE}${courseId}/chapters/${chapterId}/lessons/`, {
+    params,
+  });
   return response.data;
 }
 
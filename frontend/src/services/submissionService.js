@@ -2,6 +2,9 @@ import apiClient from './api';
 
 const BASE = (problemId) => `/problems/${problemId}/submissions/`;
 
+// Solutions, outputs and evaluations are loaded with getSubmission on selection
+const LIST_FIELDS = 'id,status,created_at,result.outcome';
+
 /**
  * List submissions for a problem
  * @param {number} problemId - Problem ID
@@ -9,8 +12,20 @@ const BASE = (problemId) => `/problems/${problemId}/submissions/`;
  * @returns {Promise<Object>} Response with submissions data
  */
 export async function listSubmissions(problemId, cursor = null) {
-  const url = cursor ? `${BASE(problemId)}?cursor=${encodeURIComponent(cursor)}` : BASE(problemId);
-  const response = await apiClient.get(url);
+  const params = { fields: LIST_FIELDS };
+  if (cursor) params.cursor = cursor;
+  const response = await apiClient.get(BASE(problemId), { params });
+  return response.data;
+}
+
+/**
+ * Get submission details
+ * @param {number} problemId - Problem ID
+ * @param {number} submissionId - Submission ID
+ * @returns {Promise<Object>} Submission data
+ */
+export async function getSubmission(problemId, submissionId) {
+  const response = await apiClient.get(`${BASE(problemId)}${submissionId}/`);
   return response.data;
 }
 
@@ -27,5 +42,6 @@ export async function createSubmission(problemId, payload) {
 
 export default {
   listSubmissions,
+  getSubmission,
   createSubmission,
 };
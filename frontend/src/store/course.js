@@ -188,11 +188,11 @@ export const useCourseStore = defineStore('course', () => {
     }
   }
 
-  async function fetchLessons(courseId, chapterId) {
+  async function fetchLessons(courseId, chapterId, fields = null) {
     isLoading.value = true;
     error.value = null;
     try {
-      const data = await courseService.getLessonsForChapter(courseId, chapterId);
+      const data = await courseService.getLessonsForChapter(courseId, chapterId, fields);
       return data;
     } catch (err) {
       error.value = {
@@ -32,6 +32,26 @@ export const useSubmissionStore = defineStore('submission', () => {
     }
   }
 
+  /**
+   * Get submission details
+   * @param {number} problemId - Problem ID
+   * @param {number} submissionId - Submission ID
+   * @returns {Promise<Object|null>} Submission or null on error
+   */
+  async function getSubmission(problemId, submissionId) {
+    error.value = null;
+    try {
+      return await submissionService.getSubmission(problemId, submissionId);
+    } catch (err) {
+      error.value = {
+        message: getErrorMessage(err),
+        details: err.details || err,
+        status: err.status || 0,
+      };
+      return null;
+    }
+  }
+
   /**
    * Create a new submission
    * @param {number} problemId - Problem ID
@@ -76,6 +96,7 @@ export const useSubmissionStore = defineStore('submission', () => {
     error,
     currentSubmission,
     listSubmissions,
+    getSubmission,
     createSubmission,
     setCurrentSubmission,
     clearError,